@@ -0,0 +1,318 @@
+import bisect
+from array import array
+from itertools import islice
+from pynput import mouse
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+
+from backend.keys import code_of, key_object
+from utils.macro_format import ColumnarFlow, timestamped, A_MOVE, A_CLICK, A_SCROLL, A_KEY_PRESS
+
+# Opcodes for compiled playback plans
+OP_MOVE = 0
+OP_MOUSE_DOWN = 1
+OP_MOUSE_UP = 2
+OP_SCROLL = 3
+OP_KEY_DOWN = 4
+OP_KEY_UP = 5
+
+# Cache key on the macro dict. Underscore keys are runtime-only and never saved.
+PLAN_KEY = "_plan"
+
+# Events between held-input snapshots in a plan's seek index
+SNAPSHOT_EVERY = 2048
+
+# Mouse path synthesis between move keyframes
+INTERPOLATION_MODES = ("off", "linear", "catmull_rom")
+# Keyframes further apart than this are a pause followed by a move, not one motion
+MAX_KEYFRAME_GAP = 0.25
+
+
+def parse_button(button_str) -> mouse.Button:
+    """Convert a stored button string (e.g. 'Button.right') to a mouse.Button."""
+    button_str = str(button_str)
+    if "right" in button_str: return mouse.Button.right
+    if "middle" in button_str: return mouse.Button.middle
+    return mouse.Button.left
+
+
+def parse_key(key_str: Optional[str]):
+    """Convert a stored key string back to a Key object, char or vk KeyCode."""
+    return key_object(code_of(key_str))
+
+
+class PlaybackPlan:
+    """
+    A flow compiled once into parallel arrays.
+
+    Each event i is described by ops[i], times[i] (absolute integer nanoseconds
+    from the start of the macro), the integer arguments a[i]/b[i] (coords or scroll deltas) and
+    objs[i] (the resolved mouse.Button / keyboard.Key, or None).
+    """
+
+    def __init__(self):
+        self.ops = array('B')
+        self.times = array('q')
+        self.a = array('i')
+        self.b = array('i')
+        self.objs: List[Any] = []
+        # The flow and motion spec this plan was built from (used for cache validation)
+        self.source = None
+        self.source_len = 0
+        self.motion = None
+        # Seek index: held inputs and pointer position every SNAPSHOT_EVERY events, built on first seek
+        self._snapshots: Optional[List[Tuple[tuple, Optional[Tuple[int, int]]]]] = None
+
+    def __len__(self):
+        return len(self.ops)
+
+    def rows(self, start: int = 0):
+        """Iterates (op, t, a, b, obj) tuples, the same shape iter_ops yields, from event `start`."""
+        rows = zip(self.ops, self.times, self.a, self.b, self.objs)
+        return islice(rows, start, None) if start else rows
+
+    def index_at(self, t: float) -> int:
+        """
+        Index of the first event at or after timeline offset t (seconds).
+
+        times holds exact absolute timestamps, so this is a binary search
+        rather than a walk over the flow.
+        """
+        return bisect.bisect_left(self.times, round(t * 1e9))
+
+    def _build_snapshots(self):
+        snapshots = []
+        held: Dict[Any, int] = {} # obj -> OP_MOUSE_DOWN / OP_KEY_DOWN, in press order
+        pos = None
+        ops, a, b, objs = self.ops, self.a, self.b, self.objs
+        for i in range(len(ops)):
+            if i % SNAPSHOT_EVERY == 0:
+                snapshots.append((tuple(held.items()), pos))
+            pos = self._apply(held, pos, ops[i], a[i], b[i], objs[i])
+        self._snapshots = snapshots
+
+    @staticmethod
+    def _apply(held, pos, op, a, b, obj):
+        if op == OP_MOVE:
+            return (a, b)
+        if op == OP_MOUSE_DOWN or op == OP_KEY_DOWN:
+            held[obj] = op
+        elif op == OP_MOUSE_UP or op == OP_KEY_UP:
+            held.pop(obj, None)
+        return pos
+
+    def state_at(self, index: int) -> Tuple[List[Tuple[int, Any]], Optional[Tuple[int, int]]]:
+        """
+        Input state just before event `index`.
+
+        Returns ([(OP_MOUSE_DOWN | OP_KEY_DOWN, obj), ...] still held, last
+        pointer position or None). Starts from the nearest snapshot, so at most
+        SNAPSHOT_EVERY events are replayed.
+        """
+        if self._snapshots is None:
+            self._build_snapshots()
+        index = max(0, min(index, len(self.ops)))
+        if not self._snapshots:
+            return [], None
+        k = min(index // SNAPSHOT_EVERY, len(self._snapshots) - 1)
+        items, pos = self._snapshots[k]
+        held = dict(items)
+        for i in range(k * SNAPSHOT_EVERY, index):
+            pos = self._apply(held, pos, self.ops[i], self.a[i], self.b[i], self.objs[i])
+        return [(op, obj) for obj, op in held.items()], pos
+
+    @property
+    def duration(self) -> float:
+        return self.times[-1] / 1e9 if self.times else 0.0
+
+    def add(self, op: int, t: int, a: int = 0, b: int = 0, obj=None):
+        self.ops.append(op)
+        self.times.append(t)
+        self.a.append(a)
+        self.b.append(b)
+        self.objs.append(obj)
+
+
+def iter_ops(events: Iterable[Dict[str, Any]]):
+    """
+    Decode event dicts into (op, t, a, b, obj) tuples, one at a time, with t
+    the event's 't_ns' timestamp (legacy 'delay' events are converted on the fly).
+
+    Works on any iterable, so a streamed flow can be played without ever being
+    held in memory. Button and key resolution is memoized per distinct string,
+    so a 200k event flow only resolves each key once.
+    """
+    buttons: Dict[str, Any] = {}
+    keys: Dict[str, Any] = {}
+
+    for event in timestamped(events):
+        t = event["t_ns"]
+        action = event.get("action")
+
+        if action == "mouse_move":
+            coords = event.get("coords")
+            if coords:
+                yield OP_MOVE, t, int(coords[0]), int(coords[1]), None
+
+        elif action == "mouse_click":
+            button_str = event.get("button")
+            btn = buttons.get(button_str)
+            if btn is None:
+                btn = buttons[button_str] = parse_button(button_str)
+            yield (OP_MOUSE_DOWN if event.get("pressed") else OP_MOUSE_UP), t, 0, 0, btn
+
+        elif action == "mouse_scroll":
+            yield OP_SCROLL, t, int(event.get("dx", 0)), int(event.get("dy", 0)), None
+
+        elif action in ("key_press", "key_release"):
+            key_str = event.get("key")
+            if key_str not in keys:
+                keys[key_str] = parse_key(key_str)
+            key = keys[key_str]
+            if key:
+                yield (OP_KEY_DOWN if action == "key_press" else OP_KEY_UP), t, 0, 0, key
+
+
+def motion_spec(mode: str, hz) -> Optional[Tuple[str, int]]:
+    """(mode, hz) for interpolate_rows, or None when synthesis is off."""
+    if mode not in INTERPOLATION_MODES[1:] or not hz or hz <= 0:
+        return None
+    return mode, int(hz)
+
+
+def _hermite(p0, p1, p2, p3, t0, t1, t2, t3, u):
+    """
+    Catmull-Rom point between p1 and p2 at fraction u, with tangents scaled by
+    the keyframe times so unevenly spaced keyframes do not overshoot.
+    """
+    gap = t2 - t1
+    m1 = (p2 - p0) * gap / (t2 - t0) if t2 > t0 else p2 - p1
+    m2 = (p3 - p1) * gap / (t3 - t1) if t3 > t1 else p2 - p1
+    u2 = u * u
+    u3 = u2 * u
+    return ((2 * u3 - 3 * u2 + 1) * p1 + (u3 - 2 * u2 + u) * m1
+            + (-2 * u3 + 3 * u2) * p2 + (u3 - u2) * m2)
+
+
+def interpolate_rows(rows, mode: str = "linear", hz: int = 125, max_gap: float = MAX_KEYFRAME_GAP):
+    """
+    Synthesizes OP_MOVE rows between adjacent move keyframes at `hz` samples/s.
+
+    Consecutive moves closer than max_gap are joined. A mouse button press or
+    release in between does not break the path: the pointer holds still until
+    the button event and the segment starts from there, so a drag follows the
+    synthesized path from its first move. Key and scroll events and long
+    pauses end the path. Works on any row iterable with one row of lookahead,
+    so streamed playback can use it too.
+
+    Args:
+        rows: (op, t, a, b, obj) rows, e.g. PlaybackPlan.rows() or iter_ops().
+        mode: "linear" or "catmull_rom".
+        hz: Output rate of the synthesized path.
+        max_gap: Longest keyframe gap (s) to interpolate across.
+    """
+    step = 1e9 / hz
+    max_gap = max_gap * 1e9
+    spline = mode == "catmull_rom"
+    it = iter(rows)
+    before = anchor = None # Previous two keyframes of the current path (anchor: where it continues from)
+    cur = next(it, None)
+    while cur is not None:
+        nxt = next(it, None)
+        op = cur[0]
+        if op == OP_MOVE:
+            gap = cur[1] - anchor[1] if anchor is not None else 0
+            if step < gap <= max_gap:
+                t1, t2 = anchor[1], cur[1]
+                x1, y1, x2, y2 = anchor[2], anchor[3], cur[2], cur[3]
+                if spline:
+                    p0 = before or anchor
+                    p3 = nxt if nxt is not None and nxt[0] == OP_MOVE and nxt[1] - t2 <= max_gap else cur
+                last = (x1, y1)
+                t = t1 + step
+                # Stop short of the keyframe so no sample lands right on top of it
+                while t < t2 - step * 0.5:
+                    u = (t - t1) / gap
+                    if spline:
+                        x = _hermite(p0[2], x1, x2, p3[2], p0[1], t1, t2, p3[1], u)
+                        y = _hermite(p0[3], y1, y2, p3[3], p0[1], t1, t2, p3[1], u)
+                    else:
+                        x = x1 + (x2 - x1) * u
+                        y = y1 + (y2 - y1) * u
+                    pos = (round(x), round(y))
+                    if pos != last:
+                        yield OP_MOVE, round(t), pos[0], pos[1], None
+                        last = pos
+                    t += step
+            before = anchor if anchor is not None and gap <= max_gap else None
+            anchor = cur
+        elif op == OP_MOUSE_DOWN or op == OP_MOUSE_UP:
+            if anchor is not None:
+                # Same position, but the next segment may only start moving after the click
+                anchor = (OP_MOVE, cur[1], anchor[2], anchor[3], None)
+        else:
+            before = anchor = None
+        yield cur
+        cur = nxt
+
+
+def compile_flow(events, motion: Optional[Tuple[str, int]] = None) -> PlaybackPlan:
+    """
+    Compile a list of event dicts (or a ColumnarFlow) into a PlaybackPlan.
+
+    With a motion spec (see motion_spec) the stored moves are treated as
+    keyframes and the path between them is synthesized into the plan.
+    """
+    if isinstance(events, ColumnarFlow):
+        plan = compile_columns(events)
+    else:
+        plan = PlaybackPlan()
+        for op, t, a, b, obj in iter_ops(events):
+            plan.add(op, t, a, b, obj)
+    if motion:
+        keyframes = plan
+        plan = PlaybackPlan()
+        for op, t, a, b, obj in interpolate_rows(keyframes.rows(), *motion):
+            plan.add(op, t, a, b, obj)
+    plan.motion = motion
+    return plan
+
+
+def compile_columns(flow: ColumnarFlow) -> PlaybackPlan:
+    """Compile a ColumnarFlow straight from its columns, without building event dicts."""
+    plan = PlaybackPlan()
+    buttons = [parse_button(b) for b in flow.buttons]
+    keys = [parse_key(k) for k in flow.keys]
+    xs, ys, refs, auxs = flow.x, flow.y, flow.ref, flow.aux
+
+    for i, code in enumerate(flow.actions):
+        t = flow.times_ns[i]
+        if code == A_MOVE:
+            plan.add(OP_MOVE, t, xs[i], ys[i])
+        elif code == A_CLICK:
+            plan.add(OP_MOUSE_DOWN if auxs[i] else OP_MOUSE_UP, t, obj=buttons[refs[i]])
+        elif code == A_SCROLL:
+            plan.add(OP_SCROLL, t, refs[i], auxs[i])
+        else:
+            key = keys[refs[i]]
+            if key:
+                plan.add(OP_KEY_DOWN if code == A_KEY_PRESS else OP_KEY_UP, t, obj=key)
+    return plan
+
+
+def get_plan(data: Dict[str, Any], motion: Optional[Tuple[str, int]] = None) -> PlaybackPlan:
+    """
+    Return the compiled plan for a macro, compiling and caching it on first use.
+
+    The cached plan is invalidated when the 'flow' list is replaced or resized,
+    or when a different motion spec is asked for.
+    """
+    events = data.get("flow", [])
+    plan = data.get(PLAN_KEY)
+    if plan is not None and plan.source is events and plan.source_len == len(events) and plan.motion == motion:
+        return plan
+
+    plan = compile_flow(events, motion)
+    plan.source = events
+    plan.source_len = len(events)
+    data[PLAN_KEY] = plan
+    return plan
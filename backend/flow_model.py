@@ -0,0 +1,196 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from typing import Dict, Any, List, Tuple
+
+from utils.macro_format import ColumnarFlow, ACTION_NAMES, A_CLICK
+
+# Group kinds
+GROUP_EVENT = 0 # A single non-move event
+GROUP_PATH = 1  # A run of consecutive mouse_move events
+
+# Cache key on the macro dict (runtime-only, never saved)
+MODEL_KEY = "_groups"
+
+_NOT_HELD: Tuple[str, ...] = ()
+
+
+class FlowModel:
+    """
+    Grouped view of a flow, kept on the side instead of inside the event dicts.
+
+    Consecutive mouse moves collapse into one path group; a path is a drag when
+    a mouse button is held at its start. Groups live in parallel arrays (kind,
+    first event index, event count) plus the buttons held when each group starts,
+    which lets append() and replace() regroup incrementally instead of from
+    scratch. Per-action counts and total duration are maintained alongside.
+    """
+
+    def __init__(self, flow):
+        self.flow = flow
+        self.kinds = array('B')
+        self.starts = array('l')
+        self.counts = array('l')
+        self.held: List[Tuple[str, ...]] = [] # Buttons down at each group's start (shared tuples)
+        self.action_counts: Counter = Counter()
+        self.end_ns = 0 # Timestamp of the last processed event
+        self._buttons: Tuple[str, ...] = _NOT_HELD # Buttons down after the last processed event
+        self._processed = 0
+        self.append()
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def group(self, i: int) -> Tuple[int, int, int, str]:
+        """Returns (kind, first_event_index, event_count, drag_button) of group i."""
+        held = self.held[i]
+        drag_btn = held[0] if self.kinds[i] == GROUP_PATH and held else ""
+        return self.kinds[i], self.starts[i], self.counts[i], drag_btn
+
+    def group_of(self, index: int) -> int:
+        """Returns the group containing event index."""
+        return bisect_right(self.starts, index) - 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "events": self._processed,
+            "groups": len(self.kinds),
+            "duration": self.duration,
+            "by_action": dict(self.action_counts),
+        }
+
+    @property
+    def duration(self) -> float:
+        return self.end_ns / 1e9
+
+    # --- Incremental maintenance ---
+
+    def append(self):
+        """Groups events added to the flow since the last call."""
+        self._process(self._processed, len(self.flow))
+
+    def replace(self, index: int, event: Dict[str, Any]):
+        """
+        Replaces flow[index] (a list or a ColumnarFlow) and regroups around it.
+
+        Regrouping starts one group before the edit (the edit may merge into it)
+        and stops as soon as it lines up with the old grouping again (same group
+        boundary, same held buttons), so an edit usually touches only a few groups.
+        """
+        old_action = self._row(index)[0]
+        self.action_counts[old_action] -= 1
+        if not self.action_counts[old_action]:
+            del self.action_counts[old_action]
+        self.flow[index] = event
+        action, t, _, _ = self._row(index)
+        self.action_counts[action] += 1
+        if index == self._processed - 1:
+            self.end_ns = t
+
+        final = self._buttons
+        g = max(self.group_of(index) - 1, 0)
+        old_kinds, old_starts, old_counts, old_held = (
+            self.kinds[g:], self.starts[g:], self.counts[g:], self.held[g:]
+        )
+        self._truncate(g)
+        self._buttons = old_held[0]
+        pos = old_starts[0]
+        end = self._processed
+
+        while pos < end:
+            self._process(pos, pos + 1, count=False)
+            pos += 1
+            if pos <= index or pos >= end:
+                continue
+            j = bisect_left(old_starts, pos)
+            if (j < len(old_starts) and old_starts[j] == pos and old_held[j] == self._buttons
+                    and not self._absorbs(pos)):
+                # Converged: the remaining old groups are still valid
+                self.kinds.extend(old_kinds[j:])
+                self.starts.extend(old_starts[j:])
+                self.counts.extend(old_counts[j:])
+                self.held.extend(old_held[j:])
+                self._buttons = final
+                return
+
+    # --- Internals ---
+
+    def _absorbs(self, pos: int) -> bool:
+        """True if the last group would extend to include flow[pos]."""
+        return self.kinds[-1] == GROUP_PATH and self._row(pos)[0] == "mouse_move"
+
+    def _row(self, index: int):
+        return next(self._rows(index, index + 1))
+
+    def _rows(self, begin: int, end: int):
+        """Yields (action, t_ns, button, pressed) for flow[begin:end]."""
+        flow = self.flow
+        if isinstance(flow, ColumnarFlow):
+            # Read the columns directly instead of materializing event dicts
+            times, refs, auxs = flow.times_ns, flow.ref, flow.aux
+            for i in range(begin, end):
+                code = flow.actions[i]
+                if code == A_CLICK:
+                    yield "mouse_click", times[i], flow.buttons[refs[i]], auxs[i]
+                else:
+                    yield ACTION_NAMES[code], times[i], None, False
+            return
+        t = self.end_ns
+        for i in range(begin, end):
+            event = flow[i]
+            t = event.get("t_ns", t)
+            yield event.get("action"), t, event.get("button"), event.get("pressed")
+
+    def _truncate(self, g: int):
+        del self.kinds[g:]
+        del self.starts[g:]
+        del self.counts[g:]
+        del self.held[g:]
+
+    def _process(self, begin: int, end: int, count: bool = True):
+        kinds, starts, counts, held = self.kinds, self.starts, self.counts, self.held
+        buttons = self._buttons
+
+        for i, (action, t, btn, pressed) in zip(range(begin, end), self._rows(begin, end)):
+            if count:
+                self.action_counts[action] += 1
+                self.end_ns = t
+
+            if action == "mouse_move":
+                if kinds and kinds[-1] == GROUP_PATH and starts[-1] + counts[-1] == i:
+                    counts[-1] += 1
+                    continue
+                kinds.append(GROUP_PATH)
+            else:
+                kinds.append(GROUP_EVENT)
+            starts.append(i)
+            counts.append(1)
+            held.append(buttons)
+
+            if action == "mouse_click":
+                if pressed:
+                    if btn not in buttons:
+                        buttons = buttons + (btn,)
+                elif btn in buttons:
+                    buttons = tuple(b for b in buttons if b != btn)
+
+        self._buttons = buttons
+        if count:
+            self._processed = end
+
+
+def get_flow_model(data: Dict[str, Any]) -> FlowModel:
+    """
+    Return the grouped model for a macro, building and caching it on first use.
+
+    A cached model follows appends to the same flow list; it is rebuilt when the
+    'flow' is replaced.
+    """
+    flow = data.get("flow", [])
+    model = data.get(MODEL_KEY)
+    if model is None or model.flow is not flow:
+        model = FlowModel(flow)
+        data[MODEL_KEY] = model
+    elif model._processed != len(flow):
+        model.append()
+    return model
@@ -1,6 +1,8 @@
 from pynput import keyboard
 from typing import Callable, Dict, Optional
 
+from backend.keys import pynput_hotkey
+
 class HotkeyManager:
     def __init__(self):
         self.listener = None
@@ -48,24 +50,4 @@ class HotkeyManager:
         - "f8" -> "<f8>"
         - "CTRL + SHIFT + ALT + R" -> "<ctrl>+<shift>+<alt>+r"
         """
-        if not key_str: return None
-        
-        key_str = key_str.lower().strip()
-        
-        # Simple single keys (f8, a, 1)
-        if "+" not in key_str and " " not in key_str:
-            if len(key_str) > 1: return f"<{key_str}>" # e.g. <f8>, <esc> 
-            return key_str # e.g. a
-            
-        # Complex combos
-        parts = [p.strip() for p in key_str.split("+")]
-        formatted = []
-        for p in parts:
-            if p in ["ctrl", "shift", "alt", "cmd", "win"]:
-                formatted.append(f"<{p}>")
-            elif len(p) > 1: # f8, esc
-                formatted.append(f"<{p}>")
-            else:
-                formatted.append(p)
-                
-        return "+".join(formatted)
+        return pynput_hotkey(key_str)
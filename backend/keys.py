@@ -0,0 +1,163 @@
+import threading
+from pynput import keyboard
+from typing import Any, Dict, FrozenSet, List, Optional
+
+# Single registry of key codes shared by the recorder, player, hotkeys and trim
+# logic. Every key gets a small integer code the first time it is seen; the
+# stored string form, the playback object and the side-less "base" code (ctrl_l
+# -> ctrl, 'R' -> 'r') are precomputed per code, so hot paths do list/dict
+# lookups instead of string munging.
+#
+# Stored forms (round-trip exactly):
+#   'a'          printable character
+#   'Key.enter'  named pynput key
+#   '<65437>'    key with only a virtual-key code (numpad, media keys, ...)
+
+_lock = threading.Lock()
+_reprs: List[str] = []            # code -> stored string
+_objects: List[Any] = []          # code -> object for keyboard.Controller.press/release
+_base: List[int] = []             # code -> code of the side-less, lower-case key
+_by_repr: Dict[str, int] = {}     # stored string -> code
+_by_special: Dict[Any, int] = {}  # keyboard.Key member -> code
+_by_vk: Dict[int, int] = {}       # vk-only KeyCode -> code
+
+# Friendly names accepted in hotkey strings
+_ALIASES = {"win": "cmd", "control": "ctrl", "return": "enter", "escape": "esc"}
+_SIDES = ("_l", "_r")
+
+
+def _intern(rep: str, obj: Any) -> int:
+    with _lock:
+        code = _by_repr.get(rep)
+        if code is not None:
+            return code
+        code = len(_reprs)
+        _reprs.append(rep)
+        _objects.append(obj)
+        _base.append(code)
+        _by_repr[rep] = code
+    # Resolved outside the lock: it may intern the lower-case / side-less key
+    _base[code] = _resolve_base(rep, code)
+    return code
+
+
+def _resolve_base(rep: str, code: int) -> int:
+    if rep.startswith("Key."):
+        name = rep[4:]
+        for side in _SIDES:
+            if name.endswith(side) and ("Key." + name[:-2]) in _by_repr:
+                return _by_repr["Key." + name[:-2]]
+        return code
+    if len(rep) == 1 and rep != rep.lower():
+        return _char_code(rep.lower())
+    return code
+
+
+def _char_code(char: str) -> int:
+    code = _by_repr.get(char)
+    return code if code is not None else _intern(char, char)
+
+
+def _vk_code(vk: int) -> int:
+    code = _by_vk.get(vk)
+    if code is None:
+        code = _intern(f"<{vk}>", keyboard.KeyCode.from_vk(vk))
+        _by_vk[vk] = code
+    return code
+
+
+# Named keys are registered once, in a stable order, at import
+for _key in sorted(keyboard.Key, key=lambda k: k.name):
+    _by_special[_key] = _intern(f"Key.{_key.name}", _key)
+for _rep in list(_by_repr):
+    _base[_by_repr[_rep]] = _resolve_base(_rep, _by_repr[_rep])
+
+
+# --- Lookups ---
+
+def key_code(key) -> Optional[int]:
+    """Code of a pynput key object (as delivered to listener callbacks)."""
+    code = _by_special.get(key) if isinstance(key, keyboard.Key) else None
+    if code is not None:
+        return code
+    char = getattr(key, "char", None)
+    if char is not None:
+        code = _by_repr.get(char)
+        return code if code is not None else _intern(char, char)
+    vk = getattr(key, "vk", None)
+    return _vk_code(vk) if vk is not None else None
+
+
+def code_of(rep: Optional[str]) -> Optional[int]:
+    """Code of a stored key string; None if it is missing or not a key."""
+    if not rep:
+        return None
+    code = _by_repr.get(rep)
+    if code is not None:
+        return code
+    if len(rep) == 1:
+        return _intern(rep, rep)
+    if rep[0] == "<" and rep[-1] == ">" and rep[1:-1].isdigit():
+        return _vk_code(int(rep[1:-1]))
+    return None # e.g. 'Key.<name>' unknown to this pynput backend
+
+
+def key_repr(code: int) -> str:
+    """Stored string of a code."""
+    return _reprs[code]
+
+
+def key_object(code: Optional[int]):
+    """Object for keyboard.Controller.press/release, or None."""
+    return _objects[code] if code is not None else None
+
+
+def base_code(code: Optional[int]) -> Optional[int]:
+    """Code of the same key ignoring side and case (ctrl_r -> ctrl, 'A' -> 'a')."""
+    return _base[code] if code is not None else None
+
+
+def binding_name(key) -> str:
+    """User-facing name for a key pressed while binding a hotkey ('f8', 'a', '<65437>')."""
+    code = base_code(key_code(key))
+    if code is None:
+        return str(key).lower()
+    rep = _reprs[code]
+    return rep[4:] if rep.startswith("Key.") else rep.lower()
+
+
+# --- Hotkey strings ('f8', 'ctrl+shift+alt+r', 'CTRL + SHIFT + ALT + R') ---
+
+def _hotkey_parts(spec: str) -> List[str]:
+    if not spec:
+        return []
+    parts = [p.strip().lower() for p in spec.split("+")]
+    return [_ALIASES.get(p, p) for p in parts if p]
+
+
+def _part_code(part: str) -> Optional[int]:
+    if len(part) == 1:
+        return base_code(_char_code(part))
+    if part.startswith("<") and part.endswith(">"):
+        return base_code(code_of(part)) # vk form
+    code = _by_repr.get("Key." + part)
+    return base_code(code) if code is not None else None
+
+
+def hotkey_codes(spec: str) -> FrozenSet[int]:
+    """Base codes of every key in a hotkey string, for `base_code(c) in codes` checks."""
+    return frozenset(c for c in map(_part_code, _hotkey_parts(spec)) if c is not None)
+
+
+def pynput_hotkey(spec: str) -> Optional[str]:
+    """Hotkey string in keyboard.GlobalHotKeys format: 'ctrl+alt+r' -> '<ctrl>+<alt>+r'."""
+    parts = _hotkey_parts(spec)
+    if not parts:
+        return None
+    formatted = []
+    for p in parts:
+        if len(p) == 1 or (p.startswith("<") and p.endswith(">")):
+            formatted.append(p)
+        else:
+            formatted.append(f"<{p}>")
+    return "+".join(formatted)
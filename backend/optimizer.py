@@ -0,0 +1,248 @@
+from array import array
+from typing import Any, Callable, Dict, List, Tuple
+
+from utils.macro_format import ColumnarFlow, A_MOVE, A_SCROLL, A_KEY_PRESS, A_KEY_RELEASE
+
+# Default pipeline options (the "optimizer" setting overrides any of these).
+# Defaults never change what the macro types or where it clicks.
+DEFAULT_OPTIONS = {
+    "drop_duplicate_moves": True,   # Moves to where the pointer already is
+    "drop_overwritten_moves": True, # Zero-delay moves replaced by the next move
+    "collapse_autorepeat": False,   # Repeated key_press of a held key (changes typed output: synthetic presses do not auto-repeat)
+    "path_tolerance": 1.0,          # RDP tolerance in pixels (0 = keep every move)
+    "max_move_gap": 0.05,           # Longest time (s) between kept points of a simplified path
+    "max_idle": 0.0,                # Cap on the gap between events, in seconds (0 = off)
+}
+
+
+# --- Helpers ---
+
+def _select(flow: ColumnarFlow, keep: List[int]) -> ColumnarFlow:
+    """New flow made of the rows at the given indexes (tables are shared)."""
+    out = ColumnarFlow()
+    out.keys, out.buttons = flow.keys, flow.buttons
+    for name in ("actions", "times_ns", "x", "y", "ref", "aux"):
+        column = getattr(flow, name)
+        setattr(out, name, array(column.typecode, [column[i] for i in keep]))
+    return out
+
+
+def _keep_where(flow: ColumnarFlow, drop) -> ColumnarFlow:
+    """Drops rows flagged in `drop`, except the last one, so the macro's length never changes."""
+    n = len(flow)
+    if n:
+        drop[n - 1] = False
+    if not any(drop):
+        return flow
+    return _select(flow, [i for i in range(n) if not drop[i]])
+
+
+# --- Passes ---
+# Each takes a ColumnarFlow plus options and returns a ColumnarFlow (possibly the
+# same object when nothing changed). Absolute timestamps mean a dropped event's
+# delay is simply absorbed by the next one, so timing is preserved.
+
+def drop_duplicate_moves(flow: ColumnarFlow, **_) -> ColumnarFlow:
+    """Removes moves to the position the pointer is already at."""
+    drop = [False] * len(flow)
+    last = None
+    for i, code in enumerate(flow.actions):
+        if code <= A_SCROLL:
+            pos = (flow.x[i], flow.y[i])
+            if code == A_MOVE and pos == last:
+                drop[i] = True
+            last = pos
+    return _keep_where(flow, drop)
+
+
+def drop_overwritten_moves(flow: ColumnarFlow, **_) -> ColumnarFlow:
+    """Removes a move immediately followed, with zero delay, by another move."""
+    actions, times = flow.actions, flow.times_ns
+    drop = [False] * len(flow)
+    for i in range(len(flow) - 1):
+        if actions[i] == A_MOVE and actions[i + 1] == A_MOVE and times[i + 1] == times[i]:
+            drop[i] = True
+    return _keep_where(flow, drop)
+
+
+def collapse_autorepeat(flow: ColumnarFlow, **_) -> ColumnarFlow:
+    """
+    Keeps only the first key_press of a key until it is released (OS auto-repeat).
+
+    Opt-in: a replayed key-down does not auto-repeat in the target app, so this
+    types fewer characters than the recording did.
+    """
+    drop = [False] * len(flow)
+    held = set()
+    for i, code in enumerate(flow.actions):
+        if code == A_KEY_PRESS:
+            key = flow.ref[i]
+            if key in held:
+                drop[i] = True
+            held.add(key)
+        elif code == A_KEY_RELEASE:
+            held.discard(flow.ref[i])
+    return _keep_where(flow, drop)
+
+
+def _rdp(xs, ys, start: int, end: int, tolerance: float, keep: List[bool]):
+    """Marks the Ramer-Douglas-Peucker points of xs/ys[start..end] (inclusive) in keep."""
+    tol2 = tolerance * tolerance
+    stack = [(start, end)]
+    while stack:
+        a, b = stack.pop()
+        if b - a < 2:
+            continue
+        ax, ay = xs[a], ys[a]
+        dx, dy = xs[b] - ax, ys[b] - ay
+        length2 = dx * dx + dy * dy
+        best, best_d = -1, tol2
+        for i in range(a + 1, b):
+            px, py = xs[i] - ax, ys[i] - ay
+            if length2:
+                cross = px * dy - py * dx
+                d = cross * cross / length2
+            else:
+                d = px * px + py * py # Closed path: distance from the endpoint
+            if d > best_d:
+                best, best_d = i, d
+        if best >= 0:
+            keep[best] = True
+            stack.append((a, best))
+            stack.append((best, b))
+
+
+def simplify_paths(flow: ColumnarFlow, path_tolerance: float = 1.0, max_move_gap: float = 0.05, **_) -> ColumnarFlow:
+    """
+    Ramer-Douglas-Peucker simplification of every run of consecutive moves.
+
+    Run endpoints are always kept, as is any point needed so that kept points
+    are never more than max_move_gap seconds apart; a slow straight drag
+    therefore still advances steadily instead of jumping at the end.
+    """
+    if path_tolerance <= 0:
+        return flow
+    actions, times = flow.actions, flow.times_ns
+    n = len(flow)
+    keep = [True] * n
+    gap_ns = round(max_move_gap * 1e9) if max_move_gap > 0 else 0
+    i = 0
+    while i < n:
+        if actions[i] != A_MOVE:
+            i += 1
+            continue
+        j = i
+        while j + 1 < n and actions[j + 1] == A_MOVE:
+            j += 1
+        if j - i >= 2:
+            for k in range(i + 1, j):
+                keep[k] = False
+            _rdp(flow.x, flow.y, i, j, path_tolerance, keep)
+            if gap_ns:
+                last = times[i]
+                for k in range(i + 1, j + 1):
+                    if keep[k]:
+                        last = times[k]
+                    elif times[k + 1] - last > gap_ns:
+                        keep[k] = True
+                        last = times[k]
+        i = j + 1
+    return _keep_where(flow, [not k for k in keep])
+
+
+def cap_idle_gaps(flow: ColumnarFlow, max_idle: float = 0.0, **_) -> ColumnarFlow:
+    """Shortens every pause longer than max_idle seconds to max_idle. Changes timing by design."""
+    if max_idle <= 0 or not len(flow):
+        return flow
+    cap = round(max_idle * 1e9)
+    times = flow.times_ns
+    out_times = array('q')
+    shift = 0
+    prev = 0
+    for t in times:
+        gap = t - prev
+        if gap > cap:
+            shift += gap - cap
+        out_times.append(t - shift)
+        prev = t
+    if not shift:
+        return flow
+    out = ColumnarFlow()
+    out.actions, out.x, out.y, out.ref, out.aux = flow.actions, flow.x, flow.y, flow.ref, flow.aux
+    out.keys, out.buttons = flow.keys, flow.buttons
+    out.times_ns = out_times
+    return out
+
+
+# Pipeline order: cheap exact removals first, then the lossy/path passes
+PASSES: List[Tuple[str, Callable[..., ColumnarFlow], Callable[[Dict[str, Any]], bool]]] = [
+    ("drop_duplicate_moves", drop_duplicate_moves, lambda o: o["drop_duplicate_moves"]),
+    ("drop_overwritten_moves", drop_overwritten_moves, lambda o: o["drop_overwritten_moves"]),
+    ("collapse_autorepeat", collapse_autorepeat, lambda o: o["collapse_autorepeat"]),
+    ("simplify_paths", simplify_paths, lambda o: o["path_tolerance"] > 0),
+    ("cap_idle_gaps", cap_idle_gaps, lambda o: o["max_idle"] > 0),
+]
+
+
+def _duration(flow: ColumnarFlow) -> float:
+    return flow.times_ns[-1] / 1e9 if len(flow) else 0.0
+
+
+def optimize_flow(events, options: Dict[str, Any] = None, progress=None) -> Tuple[ColumnarFlow, List[Dict[str, Any]]]:
+    """
+    Runs the enabled passes over a flow.
+
+    Args:
+        events: Event dicts or a ColumnarFlow (not modified).
+        options: Overrides for DEFAULT_OPTIONS.
+        progress: Optional IOProgress; its phase names the running pass and a
+                  cancel takes effect between passes.
+
+    Returns:
+        (optimized flow, [{"pass", "removed", "time_saved"}, ...]) with one
+        report per pass that ran; time_saved is the drop in duration (s)
+        across that pass.
+    """
+    opts = dict(DEFAULT_OPTIONS, **(options or {}))
+    flow = ColumnarFlow.from_events(events)
+    reports = []
+    for name, fn, enabled in PASSES:
+        if not enabled(opts):
+            continue
+        if progress: progress.step(phase=name.replace("_", " ").capitalize())
+        before, duration = len(flow), _duration(flow)
+        flow = fn(flow, **opts)
+        reports.append({"pass": name, "removed": before - len(flow), "time_saved": duration - _duration(flow)})
+    return flow, reports
+
+
+def optimize_macro(data: Dict[str, Any], options: Dict[str, Any] = None, progress=None):
+    """
+    Returns (new macro dict, reports). The input macro is left untouched, and
+    the result's metadata records the totals under 'optimized'.
+    """
+    flow, reports = optimize_flow(data.get("flow", []), options, progress)
+    metadata = dict(data.get("metadata", {}))
+    metadata["optimized"] = {
+        "removed": sum(r["removed"] for r in reports),
+        "time_saved": sum(r["time_saved"] for r in reports),
+    }
+    return {"flow": flow, "metadata": metadata}, reports
+
+
+def format_reports(reports: List[Dict[str, Any]], events_before: int) -> str:
+    """Human-readable per-pass summary; time saved is shown for passes that changed timing."""
+    lines = []
+    for r in reports:
+        line = f"{r['pass'].replace('_', ' ')}: -{r['removed']} events"
+        if r["time_saved"]:
+            line += f", -{r['time_saved']:.2f}s"
+        lines.append(line)
+    removed = sum(r["removed"] for r in reports)
+    time_saved = sum(r["time_saved"] for r in reports)
+    pct = removed / events_before * 100 if events_before else 0.0
+    total = f"Total: {events_before} -> {events_before - removed} events ({pct:.1f}% smaller)"
+    if time_saved:
+        total += f", {time_saved:.2f}s shorter"
+    lines.append(total)
+    return "\n".join(lines)
@@ -1,7 +1,14 @@
 import time
 import threading
 from pynput import mouse, keyboard
-from typing import List, Dict, Any
+from collections.abc import Sequence
+from typing import List, Dict, Any, Optional
+
+from backend.scheduler import DeadlineScheduler
+from backend.progress import PlaybackProgress, ProgressNotifier
+from backend.compiler import (
+    get_plan, compile_flow, iter_ops, interpolate_rows, OP_MOVE, OP_MOUSE_DOWN, OP_MOUSE_UP, OP_SCROLL, OP_KEY_DOWN, OP_KEY_UP
+)
 
 class Player:
     def __init__(self):
@@ -9,6 +16,11 @@ class Player:
         self.keyboard_controller = keyboard.Controller()
         self.playing = False
         self.safety_triggered = False
+        # Lateness statistics of the last deadline-scheduled loop
+        self.last_timing: Dict[str, float] = {}
+        # Live position of the current run, published to subscribers off-thread
+        self.progress = PlaybackProgress()
+        self.notifier = ProgressNotifier(self.progress)
         
         # Tripwire listener
         self.safety_listener = None
@@ -26,87 +38,155 @@ class Player:
         # or check a specific "Stop" key globally.
         pass
 
-    def play(self, data: Dict[str, Any], speed: float = 1.0):
+    def subscribe_progress(self, callback, interval: float = 0.25) -> int:
+        """
+        Calls callback(snapshot) at most every `interval` seconds while playing,
+        plus once when a run ends. Callbacks run on the notifier thread, never on
+        the playback loop. Returns a token for unsubscribe_progress().
+        """
+        return self.notifier.subscribe(callback, interval)
+
+    def unsubscribe_progress(self, token: int):
+        self.notifier.unsubscribe(token)
+
+    def get_progress(self) -> Dict[str, Any]:
+        """Snapshot of the current run: index/total, elapsed, ETA, lateness."""
+        return self.progress.snapshot()
+
+    def play(self, data, speed: float = 1.0, scheduler: str = "deadline", start: float = 0.0,
+             start_index: Optional[int] = None, motion=None):
         """
         Replays the recorded macro.
         
         Args:
-            data: The full macro data including 'flow' list.
+            data: The full macro data including 'flow', or any iterable of events.
+                  A list (or columnar) flow is compiled once and cached; any other
+                  iterable (e.g. a streamed file) is decoded on the fly.
             speed: Playback speed multiplier (1.0 = normal).
+            scheduler: "deadline" fires events at absolute deadlines on the recorded
+                       timeline (drift-free); "relative" sleeps each event's delay.
+            start: Timeline offset (seconds) to start from.
+            start_index: Event index to resume at instead (e.g. a checkpoint);
+                         the first event keeps its recorded delay.
+            motion: Optional (mode, hz) from compiler.motion_spec; stored moves
+                    become keyframes and the path between them is synthesized
+                    at that rate.
         """
         self.playing = True
         self.safety_triggered = False
-        events = data.get("flow", [])
         
-        print(f"Starting playback of {len(events)} events...")
+        events = data.get("flow", []) if isinstance(data, dict) else data
+        first, base = 0, 0 # base: timeline offset (ns) that is due immediately
+        if isinstance(events, Sequence):
+            # Compiled once per macro and cached on it, so loops skip re-parsing
+            plan = get_plan(data, motion) if isinstance(data, dict) else compile_flow(events, motion)
+            total, duration = len(plan), plan.duration
+            if start_index is not None or start > 0:
+                first, base = self._seek(plan, start, start_index)
+            rows = plan.rows(first)
+            print(f"Starting playback of {len(plan)} events...")
+        else:
+            if start_index is not None or start > 0:
+                raise ValueError("A streamed flow cannot seek; open the stream at the offset instead")
+            rows = iter_ops(events)
+            if motion:
+                rows = interpolate_rows(rows, *motion)
+            total, duration = 0, 0.0
+            print("Starting streamed playback...")
         
         # Safety: We can also listen for a specific key effectively to abort
         # For MVP, let's rely on the UI 'Stop' or a global hotkey if valid
         
-        for event in events:
-            if not self.playing:
-                print("Playback stopped manually.")
-                break
-                
-            # Apply delay
-            delay = event.get("delay", 0)
-            if delay > 0:
-                time.sleep(delay / speed)
-            
-            action = event.get("action")
-            
-            if action == "mouse_move":
-                coords = event.get("coords")
-                if coords:
-                    self.mouse_controller.position = tuple(coords)
-                    
-            elif action == "mouse_click":
-                button_str = event.get("button")
-                pressed = event.get("pressed")
-                # Parse button string back to enum
-                btn = mouse.Button.left
-                if "right" in button_str: btn = mouse.Button.right
-                elif "middle" in button_str: btn = mouse.Button.middle
+        # Bind hot attributes to locals for the inner loop
+        mouse_ctl = self.mouse_controller
+        kb_ctl = self.keyboard_controller
+        sleep = time.sleep
+        clock = time.perf_counter_ns
+        prev_t = base
+        progress = self.progress
+        
+        deadline = scheduler == "deadline"
+        sched = DeadlineScheduler(speed, lambda: self.playing)
+        sched.start()
+        progress.begin(total, duration, speed, first, base / 1e9)
+        progress.origin = sched.origin / 1e9
+        # Shift the timeline instead of every event: offset `base` is due right now
+        sched.origin -= round(base / speed)
+        lateness = sched.lateness
+        self.notifier.notify()
+        
+        try:
+            for i, (op, t, a, b, obj) in enumerate(rows, first + 1):
+                if not self.playing:
+                    print("Playback stopped manually.")
+                    break
                 
-                if pressed:
-                    self.mouse_controller.press(btn)
+                # Apply delay
+                if deadline:
+                    if not sched.wait_until(t):
+                        continue # Stopped mid-wait; loop head reports it
                 else:
-                    self.mouse_controller.release(btn)
-                    
-            elif action == "mouse_scroll":
-                dx = event.get("dx", 0)
-                dy = event.get("dy", 0)
-                self.mouse_controller.scroll(dx, dy)
+                    delay = t - prev_t
+                    prev_t = t
+                    if delay > 0:
+                        sleep(delay / speed / 1e9)
+                    progress.lateness = (clock() - sched.deadline(t)) / 1e9
                 
-            elif action == "key_press":
-                key_str = event.get("key")
-                key = self._parse_key(key_str)
-                if key:
-                    self.keyboard_controller.press(key)
-                    
-            elif action == "key_release":
-                key_str = event.get("key")
-                key = self._parse_key(key_str)
-                if key:
-                    self.keyboard_controller.release(key)
-                    
+                if op == OP_MOVE:
+                    mouse_ctl.position = (a, b)
+                elif op == OP_MOUSE_DOWN:
+                    mouse_ctl.press(obj)
+                elif op == OP_MOUSE_UP:
+                    mouse_ctl.release(obj)
+                elif op == OP_SCROLL:
+                    mouse_ctl.scroll(a, b)
+                elif op == OP_KEY_DOWN:
+                    kb_ctl.press(obj)
+                elif op == OP_KEY_UP:
+                    kb_ctl.release(obj)
+                
+                # Plain attribute stores only; the notifier derives the rest
+                progress.index = i
+                progress.position_ns = t
+                if deadline:
+                    progress.lateness = lateness[-1]
+        finally:
+            progress.end()
+            self.notifier.notify()
+        
         # Loop finished actions
+        if deadline:
+            self.last_timing = sched.stats()
+            print("Playback timing: max {max_ms:.2f}ms, p50 {p50_ms:.2f}ms, p99 {p99_ms:.2f}ms late "
+                  "over {events} events.".format(**self.last_timing))
         print("Playback sequence iteration finished.")
 
+    def _seek(self, plan, start: float, start_index: Optional[int]):
+        """
+        Finds where to start in a plan and restores the input state there.
+
+        Returns (first event index, timeline offset in ns that is due immediately).
+        The pointer is moved to its last recorded position and every key and
+        mouse button held at that point is pressed again, so drags and held
+        modifiers continue correctly.
+        """
+        if start_index is None:
+            first, base = plan.index_at(start), round(start * 1e9)
+        else:
+            first = max(0, min(start_index, len(plan)))
+            base = plan.times[first - 1] if first else 0
+        
+        held, pos = plan.state_at(first)
+        if pos is not None:
+            self.mouse_controller.position = pos
+        for op, obj in held:
+            if op == OP_MOUSE_DOWN:
+                self.mouse_controller.press(obj)
+            else:
+                self.keyboard_controller.press(obj)
+        print(f"Seeking to event {first}/{len(plan)} ({base / 1e9:.3f}s), re-pressed {len(held)} held input(s).")
+        return first, base
+
     def stop(self):
         """Forces playback to stop."""
         self.playing = False
-
-    def _parse_key(self, key_str: str):
-        """Helper to convert string back to Key object or char."""
-        if key_str is None:
-            return None
-        # If it looks like 'Key.enter', we need to map it to the actual Key enum
-        if key_str.startswith("Key."):
-            try:
-                # Reflection to get the attribute from pynput.keyboard.Key
-                attr = key_str.split(".")[1]
-                return getattr(keyboard.Key, attr)
-            except AttributeError:
-                return None
-        return key_str
@@ -0,0 +1,121 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from backend.compiler import get_plan
+from utils.file_manager import load_macro
+
+
+class PlaylistItem:
+    def __init__(self, path: str, loops: int = 1):
+        self.path = path
+        self.loops = max(1, int(loops))
+
+    @property
+    def name(self) -> str:
+        return os.path.basename(self.path)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"path": self.path, "loops": self.loops}
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "PlaylistItem":
+        return cls(d["path"], d.get("loops", 1))
+
+
+class PlaylistRunner:
+    """
+    Plays a sequence of macro files, each for its own number of loops.
+
+    While one item plays, the next one is loaded and compiled on a single
+    background worker, so moving to the next item costs no load time. Items
+    that fail to load are skipped. run() blocks; call it from the playback
+    thread and stop it with player.stop().
+    """
+
+    def __init__(self, player, items: List[PlaylistItem], speed: float = 1.0, scheduler: str = "deadline",
+                 repeat: bool = False, loader: Callable[[str], Dict[str, Any]] = load_macro, motion=None):
+        self.player = player
+        self.items = list(items)
+        self.speed = speed
+        self.scheduler = scheduler
+        self.motion = motion # Path synthesis spec (compiler.motion_spec), applied when preloading
+        self.repeat = repeat
+        self.loader = loader
+
+        # Called on the playback thread; UI callers must marshal to their own thread
+        self.on_item_start: Optional[Callable[[int, PlaylistItem], None]] = None
+        self.on_loop: Optional[Callable[[int, int], None]] = None # (loop, total loops of item)
+
+        self.items_played = 0
+        self.gaps_ms: List[float] = [] # Time between one item ending and the next starting
+        self.errors: List[str] = []
+
+    def _prepare(self, item: PlaylistItem) -> Dict[str, Any]:
+        """Loads and compiles one item (runs on the preload worker)."""
+        t0 = time.perf_counter()
+        data = self.loader(item.path)
+        get_plan(data, self.motion) # Cached on the macro, so play() starts without compiling
+        print(f"Preloaded {item.name} ({len(data.get('flow', []))} events) in {(time.perf_counter() - t0) * 1000:.0f}ms")
+        return data
+
+    def _next_index(self, i: int) -> Optional[int]:
+        if i + 1 < len(self.items):
+            return i + 1
+        return 0 if self.repeat else None
+
+    def run(self) -> int:
+        """Plays the playlist until it ends or the player is stopped. Returns items played."""
+        if not self.items:
+            return 0
+
+        player = self.player
+        pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="playlist-preload")
+        try:
+            i = 0
+            current = pool.submit(self._prepare, self.items[0])
+            ended_at = None
+            player.playing = True
+            while player.playing:
+                item = self.items[i]
+                try:
+                    data = current.result()
+                except Exception as e:
+                    data = None
+                    self.errors.append(f"{item.name}: {e}")
+                    print(f"Playlist: skipping {item.name}: {e}")
+                if not player.playing:
+                    break # Stopped while waiting for the preload
+
+                # Start loading the next item before playing this one
+                nxt = self._next_index(i)
+                if nxt is not None:
+                    if self.items[nxt].path == item.path and data is not None:
+                        current = pool.submit(lambda d=data: d) # Same file again: reuse it
+                    else:
+                        current = pool.submit(self._prepare, self.items[nxt])
+
+                if data is not None and data.get("flow"):
+                    if ended_at is not None:
+                        self.gaps_ms.append((time.perf_counter() - ended_at) * 1000)
+                    if self.on_item_start:
+                        self.on_item_start(i, item)
+                    for loop in range(1, item.loops + 1):
+                        if not player.playing:
+                            break
+                        if self.on_loop:
+                            self.on_loop(loop, item.loops)
+                        player.play(data, speed=self.speed, scheduler=self.scheduler, motion=self.motion)
+                    ended_at = time.perf_counter()
+                    self.items_played += 1
+
+                if nxt is None or (nxt == 0 and self.items_played == 0):
+                    break # End of playlist (or nothing in it could be loaded)
+                i = nxt
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+        if self.gaps_ms:
+            print(f"Playlist switch gap: max {max(self.gaps_ms):.1f}ms over {len(self.gaps_ms)} switches.")
+        return self.items_played
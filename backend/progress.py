@@ -0,0 +1,162 @@
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+
+class PlaybackProgress:
+    """
+    Live playback position, written by the playback loop and read by anyone.
+
+    The loop only assigns a few plain attributes per event (index, timeline
+    position in integer nanoseconds, lateness); everything derived (elapsed, ETA, percent) is computed
+    when a snapshot is taken, so reading progress never slows playback down.
+    """
+
+    def __init__(self):
+        self.run = 0           # Incremented on every play() call
+        self.active = False
+        self.index = 0         # Events fired so far in this run
+        self.total = 0         # Events in the run (0 if streamed / unknown)
+        self.position_ns = 0   # Timeline offset of the last fired event (ns, unscaled)
+        self.duration = 0.0    # Timeline length (s, unscaled; 0 if unknown)
+        self.offset = 0.0      # Timeline offset the run started from (seek/resume)
+        self.lateness = 0.0    # How late the last event fired (s)
+        self.speed = 1.0
+        self.origin = 0.0
+        self.finished_at = 0.0
+
+    def begin(self, total: int, duration: float, speed: float, index: int = 0, offset: float = 0.0):
+        self.index = index
+        self.total = total
+        self.position_ns = round(offset * 1e9)
+        self.offset = offset
+        self.duration = duration
+        self.lateness = 0.0
+        self.speed = speed
+        self.origin = time.perf_counter()
+        self.run += 1
+        self.active = True
+
+    def end(self):
+        self.finished_at = time.perf_counter()
+        self.active = False
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Consistent-enough copy of the current progress, with derived fields."""
+        now = time.perf_counter() if self.active else self.finished_at
+        elapsed = max(0.0, now - self.origin) if self.run else 0.0
+        speed = self.speed or 1.0
+        index, total, duration, lateness = self.index, self.total, self.duration, self.lateness
+
+        eta = None
+        if duration > 0:
+            # Where the timeline is now, allowing for how far behind we run
+            expected = min(duration, self.offset + max(0.0, (elapsed - lateness) * speed))
+            eta = 0.0 if not self.active else max(0.0, (duration - expected) / speed)
+            fraction = expected / duration
+        else:
+            expected = self.position_ns / 1e9
+            fraction = index / total if total else 0.0
+
+        return {
+            "run": self.run,
+            "active": self.active,
+            "index": index,
+            "total": total,
+            "position": self.position_ns / 1e9,
+            "elapsed": elapsed,
+            "expected": expected,
+            "duration": duration,
+            "eta": eta,
+            "fraction": min(1.0, fraction),
+            "lateness_ms": lateness * 1000,
+        }
+
+
+class _Subscription:
+    def __init__(self, callback, interval, run):
+        self.callback = callback
+        self.interval = interval
+        # One schedule for the subscription's lifetime, so a heartbeat longer than
+        # a loop still fires while loops keep restarting
+        self.next_due = time.monotonic() + interval
+        # (run, active) of the last snapshot handed over. Starts as the current
+        # run's final state, so a run that began earlier is never reported.
+        self.delivered = (run, False)
+
+
+class ProgressNotifier:
+    """
+    Delivers progress snapshots to subscribers on its own thread.
+
+    Each subscriber gets at most one callback per its interval while playback
+    is active (the interval keeps running across runs, e.g. loops), plus one
+    final snapshot when a run it was subscribed for ends. Slow callbacks only
+    delay other subscribers, never the playback loop.
+    """
+
+    def __init__(self, progress: PlaybackProgress):
+        self.progress = progress
+        self._subs: Dict[int, _Subscription] = {}
+        self._next_token = 1
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def subscribe(self, callback: Callable[[Dict[str, Any]], None], interval: float = 0.25) -> int:
+        """Registers callback(snapshot). Returns a token for unsubscribe()."""
+        with self._lock:
+            token = self._next_token
+            self._next_token += 1
+            self._subs[token] = _Subscription(callback, max(0.02, interval), self.progress.run)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+        self._wake.set()
+        return token
+
+    def unsubscribe(self, token: int):
+        with self._lock:
+            self._subs.pop(token, None)
+        self._wake.set()
+
+    def notify(self):
+        """Wakes the notifier early (e.g. when a run starts or ends)."""
+        self._wake.set()
+
+    def _run(self):
+        while True:
+            with self._lock:
+                subs: List[_Subscription] = list(self._subs.values())
+            if not subs:
+                with self._lock:
+                    if not self._subs:
+                        self._thread = None
+                        return
+                continue
+
+            progress = self.progress
+            now = time.monotonic()
+            snap = None
+            wait = None # Idle: sleep until play() starts or ends a run
+            for sub in subs:
+                state = (progress.run, progress.active)
+                # Deliver on schedule while playing, plus once when a run finishes
+                due = now >= sub.next_due if progress.active else progress.run and state != sub.delivered
+                if due:
+                    if snap is None:
+                        snap = progress.snapshot()
+                    sub.delivered = state
+                    if progress.active:
+                        # Final snapshots are extra; they do not shift the schedule
+                        sub.next_due = now + sub.interval
+                    try:
+                        sub.callback(snap)
+                    except Exception as e:
+                        print(f"Progress subscriber failed: {e}")
+                if progress.active:
+                    left = max(0.0, sub.next_due - now)
+                    wait = left if wait is None else min(wait, left)
+
+            self._wake.wait(wait)
+            self._wake.clear()
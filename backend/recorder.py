@@ -1,14 +1,40 @@
 import time
 import threading
+import itertools
 from pynput import mouse, keyboard
 from typing import List, Dict, Any, Optional
 
+from backend.keys import key_code, key_repr, base_code, hotkey_codes
+from utils.journal import JournalWriter, iter_journal
+from utils.macro_format import ColumnarFlow
+
+# Compact event codes pushed by the hook callbacks
+EV_MOVE = 0
+EV_CLICK = 1
+EV_SCROLL = 2
+EV_PRESS = 3
+EV_RELEASE = 4
+
 class Recorder:
+    # Capacity of the capture ring (power of two). At ~1000 events/s this is over a
+    # minute of input, far more than the drain thread ever lags behind.
+    RING_SIZE = 1 << 16
+    # How often the drain thread wakes up when the ring is empty
+    DRAIN_INTERVAL = 0.005
+    # Adaptive mouse move sampling (start(sampling=...) overrides any of these).
+    # A move is kept when the pointer leaves the path predicted from the last kept
+    # move's velocity, so curves and speed changes are sampled densely while
+    # straight or slow segments only keep a point every max_interval_ms.
+    DEFAULT_SAMPLING = {
+        "tolerance_px": 1.0,    # Allowed deviation from the predicted path (0 = keep every move)
+        "min_interval_ms": 2,   # Densest sampling (500Hz) during fast, curving motion
+        "max_interval_ms": 50,  # Sparsest sampling (20Hz) on straight or slow segments
+    }
+
     def __init__(self, stop_key: str = "f8", on_stop: Optional[callable] = None, blocked_keys: set = None):
         self.events: List[Dict[str, Any]] = []
-        self.start_time: float = 0
-        self.last_event_time: float = 0
-        self.last_move_time: float = 0
+        self.start_ns: int = 0         # perf_counter_ns() when recording started
+        self.last_event_time: int = 0
         self.last_pos = (0, 0)
         self.recording: bool = False
         self.mouse_listener: Optional[mouse.Listener] = None
@@ -16,33 +42,97 @@ class Recorder:
         self.stop_key = stop_key
         self.on_stop = on_stop
         self.blocked_keys = blocked_keys or set()  # Keys to never record
-        
-        # We need a lock to prevent race conditions when appending events from multiple threads (mouse/kb)
-        self.lock = threading.Lock()
-    
-    def _normalize_key(self, key) -> str:
-        """Normalize a key to a simple string for comparison."""
-        try:
-            return key.char.lower() if key.char else ""
-        except AttributeError:
-            return key.name.lower() if hasattr(key, 'name') else str(key).lower().replace("key.", "")
-    
-    def _is_blocked(self, key) -> bool:
-        """Check if a key is in the blocked set."""
-        if not self.blocked_keys:
-            return False
-        normalized = self._normalize_key(key)
-        return normalized in self.blocked_keys
-
-    def start(self):
-        """Starts the global listener."""
+        self._compile_keys()
+
+        # Hook callbacks never take a lock: they claim a sequence number (atomic
+        # under the GIL) and drop a tuple into a preallocated ring. The drain thread
+        # converts the tuples into stored events off the OS hook path.
+        self._ring: List[Optional[tuple]] = [None] * self.RING_SIZE
+        self._mask = self.RING_SIZE - 1
+        self._seq = itertools.count()
+        self._read = 0
+        self._drain_thread: Optional[threading.Thread] = None
+        self._draining = False
+        self._stop_lock = threading.Lock()
+
+        # Optional spill-to-disk journal (see start())
+        self.journal: Optional[JournalWriter] = None
+        self.memory_cap = 0
+        self.spilled = False
+        self._rebuild = None # (journal path, event count) of a spilled capture still to be read back
+
+        # Capture cost accounting. Hooks only measure; the totals are kept on the
+        # drain side so the mouse and keyboard listener threads never share a +=.
+        self.captured = 0
+        self.dropped = 0
+        self.overhead_ns = 0
+        self.overhead_max_ns = 0
+
+        # Move sampler state (drain side only)
+        self._configure_sampling(None)
+        self._reset_sampler((0, 0), 0)
+
+    def _configure_sampling(self, sampling: Optional[Dict[str, Any]]):
+        opts = dict(self.DEFAULT_SAMPLING, **(sampling or {}))
+        self._tol2 = float(opts["tolerance_px"]) ** 2
+        self._min_ns = int(opts["min_interval_ms"] * 1_000_000)
+        self._max_ns = int(opts["max_interval_ms"] * 1_000_000)
+
+    def _reset_sampler(self, pos, t: int):
+        self._anchor = (pos[0], pos[1], t) # Last kept move
+        self._velocity = (0.0, 0.0)        # px/ns between the last two kept moves
+        self._pending = None               # Latest move not kept (yet)
+        self.moves_seen = 0
+        self.moves_kept = 0
+        self._first_move_ns = self._last_move_ns = 0
+
+    def _compile_keys(self):
+        """Resolves stop/blocked key names to key-registry codes once per recording."""
+        stop = hotkey_codes(self.stop_key) if self.stop_key is not None else frozenset()
+        self._stop_code = next(iter(stop)) if len(stop) == 1 else None # Single keys only
+        self._blocked_codes = frozenset().union(*(hotkey_codes(k) for k in self.blocked_keys))
+
+    def _is_blocked(self, code) -> bool:
+        """Check if a key code is in the blocked set."""
+        return base_code(code) in self._blocked_codes
+
+    def start(self, journal_path: Optional[str] = None, metadata: Optional[Dict[str, Any]] = None,
+              memory_cap: int = 0, sampling: Optional[Dict[str, Any]] = None):
+        """
+        Starts the global listener.
+
+        Args:
+            journal_path: If set, every event is also streamed to an append-only
+                          journal at this path, so an interrupted capture can be
+                          recovered (see utils.journal.recover_journal).
+            metadata: Metadata stored in the journal header.
+            memory_cap: With a journal, the maximum number of events kept in memory.
+                        Beyond it events live only on disk until stop().
+            sampling: Overrides for DEFAULT_SAMPLING.
+        """
         self.events = []
-        self.recording = True
-        self.start_time = time.time()
-        self.last_event_time = self.start_time
-        self.last_move_time = self.start_time
+        self.journal = JournalWriter(journal_path, metadata) if journal_path else None
+        self.memory_cap = memory_cap if journal_path else 0
+        self.spilled = False
+        self._rebuild = None
+        self._ring = [None] * self.RING_SIZE
+        self._mask = self.RING_SIZE - 1
+        self._seq = itertools.count()
+        self._read = 0
+        self.captured = self.dropped = self.overhead_ns = self.overhead_max_ns = 0
+        self._compile_keys()
+        self._configure_sampling(sampling)
+
+        # Monotonic clock only: wall-clock jumps (NTP, DST) never reach the timeline
+        self.start_ns = self.last_event_time = time.perf_counter_ns()
         self.last_pos = mouse.Controller().position
-        
+        self._reset_sampler(self.last_pos, self.start_ns)
+        self.recording = True
+
+        self._draining = True
+        self._drain_thread = threading.Thread(target=self._drain_loop, daemon=True)
+        self._drain_thread.start()
+
         # Start listeners
         self.mouse_listener = mouse.Listener(
             on_move=self._on_move,
@@ -53,125 +143,258 @@ class Recorder:
             on_press=self._on_press,
             on_release=self._on_release
         )
-        
+
         self.mouse_listener.start()
         self.keyboard_listener.start()
         print(f"Recorder started (Stop Key: {self.stop_key}).")
 
-    def stop(self) -> List[Dict[str, Any]]:
-        """Stops the listener and returns the recorded events."""
-        self.recording = False
-        if self.mouse_listener:
-            self.mouse_listener.stop()
-            self.mouse_listener = None
-        if self.keyboard_listener:
-            self.keyboard_listener.stop()
-            self.keyboard_listener = None
-            
-        print(f"Recorder stopped. Captured {len(self.events)} events.")
+    def stop(self, rebuild: bool = True) -> List[Dict[str, Any]]:
+        """
+        Stops the listener and returns the recorded events.
+
+        A capture that spilled to its journal is read back from disk first. With
+        rebuild=False that is left to rebuild_spilled() (e.g. on a worker thread,
+        since it takes a while for long captures); check needs_rebuild.
+        """
+        with self._stop_lock:
+            self.recording = False
+            if self.mouse_listener:
+                self.mouse_listener.stop()
+                self.mouse_listener = None
+            if self.keyboard_listener:
+                self.keyboard_listener.stop()
+                self.keyboard_listener = None
+
+            # Let the drain thread empty the ring before handing back the events
+            self._draining = False
+            if self._drain_thread and self._drain_thread is not threading.current_thread():
+                self._drain_thread.join()
+            self._drain_thread = None
+
+            if self.journal:
+                self.journal.close()
+                if self.spilled:
+                    self._rebuild = (self.journal.path, self.journal.count)
+                self.journal = None
+
+        stats = self.capture_stats()
+        sampling = self.sampling_stats()
+        total = self._rebuild[1] if self._rebuild else len(self.events)
+        print(f"Recorder stopped. Captured {total} events "
+              f"(hook cost avg {stats['avg_us']:.1f}us, max {stats['max_us']:.1f}us, dropped {stats['dropped']}).")
+        if sampling["moves_seen"]:
+            print(f"Mouse sampling: kept {sampling['moves_kept']}/{sampling['moves_seen']} moves "
+                  f"({sampling['kept_hz']:.1f}Hz of {sampling['seen_hz']:.1f}Hz reported).")
+        if rebuild:
+            self.rebuild_spilled()
         return self.events
 
-    def _get_delay(self) -> float:
-        """Calculates delay from the last event."""
-        current_time = time.time()
-        delay = current_time - self.last_event_time
-        self.last_event_time = current_time
-        return delay
+    @property
+    def needs_rebuild(self) -> bool:
+        """True after stop(rebuild=False) while the spilled capture is not read back yet."""
+        return self._rebuild is not None
 
-    def _on_move(self, x, y):
-        # Optimization: Only record if moved significant distance or enough time passed
-        with self.lock:
-            if not self.recording: return
-            
-            # Optimization: High fidelity (100Hz) for smooth playback
-            # Only throttle slightly to avoid excessive CPU usage
-            time_since_move = time.time() - self.last_move_time
-            if time_since_move < 0.01:
-                return
+    def rebuild_spilled(self, progress=None) -> List[Dict[str, Any]]:
+        """
+        Rebuilds a spilled capture compactly from its journal (instead of as dicts)
+        and returns the events. If an IOProgress is given it tracks the events read
+        and can cancel; the capture then stays on disk and can be rebuilt again.
+        """
+        if self._rebuild is None:
+            return self.events
+        path, count = self._rebuild
+        if progress:
+            progress.events_total = count
+            progress.step(events=0, phase="Reading journal")
+        self.events = ColumnarFlow.from_events(iter_journal(path), progress)
+        self._rebuild = None
+        return self.events
+
+    def capture_stats(self) -> Dict[str, float]:
+        """Per-event cost of the hook callbacks for the last recording. Read after stop()."""
+        n = self.captured
+        return {
+            "captured": n,
+            "dropped": self.dropped,
+            "avg_us": self.overhead_ns / n / 1000 if n else 0.0,
+            "max_us": self.overhead_max_ns / 1000,
+        }
 
-            self.last_pos = (x, y)
-            self.last_move_time = time.time()
-            
-            self.events.append({
-                "action": "mouse_move",
-                "coords": (x, y),
-                "delay": self._get_delay()
-            })
+    def sampling_stats(self) -> Dict[str, float]:
+        """Mouse moves reported by the OS vs. kept by the sampler, and their rates over the moving span. Read after stop()."""
+        span = (self._last_move_ns - self._first_move_ns) / 1e9
+        return {
+            "moves_seen": self.moves_seen,
+            "moves_kept": self.moves_kept,
+            "seen_hz": self.moves_seen / span if span > 0 else 0.0,
+            "kept_hz": self.moves_kept / span if span > 0 else 0.0,
+        }
+
+    # --- Hook side: keep these as cheap as possible ---
+
+    def _push(self, t: int, code, a=None, b=None, c=None):
+        """Publishes one event stamped t, the perf_counter_ns() taken on entering its callback."""
+        seq = next(self._seq)
+        # Overwrites the oldest entry if the drain thread is a full ring behind;
+        # the drain side notices the sequence gap and counts it as dropped.
+        # The cost (whole callback so far) travels with the entry; only the final store is not counted.
+        self._ring[seq & self._mask] = (seq, code, t, a, b, c, time.perf_counter_ns() - t)
+
+    def _on_move(self, x, y):
+        t = time.perf_counter_ns()
+        if self.recording:
+            self._push(t, EV_MOVE, x, y)
 
     def _on_click(self, x, y, button, pressed):
-        with self.lock:
-            if not self.recording: return
-            self.events.append({
-                "action": "mouse_click",
-                "coords": (x, y),
-                "button": str(button),
-                "pressed": pressed,
-                "delay": self._get_delay()
-            })
+        t = time.perf_counter_ns()
+        if self.recording:
+            self._push(t, EV_CLICK, (x, y), button, pressed)
 
     def _on_scroll(self, x, y, dx, dy):
-        with self.lock:
-            if not self.recording: return
-            self.events.append({
-                "action": "mouse_scroll",
-                "coords": (x, y),
-                "dx": dx,
-                "dy": dy,
-                "delay": self._get_delay()
-            })
+        t = time.perf_counter_ns()
+        if self.recording:
+            self._push(t, EV_SCROLL, (x, y), dx, dy)
 
     def _on_press(self, key):
+        t = time.perf_counter_ns()
         if not self.recording: return
-        
-        # Check if this key is blocked (part of the hotkey combo)
-        if self._is_blocked(key):
-            return  # Don't record this key at all
-        
-        # check for stop key
-        try:
-            k = key.char
-        except AttributeError:
-            k = key.name # e.g. "f8"
-
-        # Check raw match or Key.<key> match
-        key_str = str(key).replace("Key.", "")
-        
-        if self.stop_key is None:
-            pass # Skip internal check
-        elif key_str == self.stop_key or k == self.stop_key:
-            print("Stop key pressed.")
-            self.stop()
-            if self.on_stop:
-                self.on_stop()
-            return
 
-        with self.lock:
-            try:
-                key_char = key.char
-            except AttributeError:
-                key_char = str(key)
-                
-            self.events.append({
-                "action": "key_press",
-                "key": key_char,
-                "delay": self._get_delay()
-            })
+        if self._stop_code is not None:
+            # check for stop key (integer compare via the key registry)
+            if base_code(key_code(key)) == self._stop_code:
+                print("Stop key pressed.")
+                self.stop()
+                if self.on_stop:
+                    self.on_stop()
+                return
+
+        self._push(t, EV_PRESS, key)
 
     def _on_release(self, key):
-        if not self.recording: return
-        
-        # Check if this key is blocked
-        if self._is_blocked(key):
-            return  # Don't record this key at all
-            
-        with self.lock:
-            try:
-                key_char = key.char
-            except AttributeError:
-                key_char = str(key)
-                
-            self.events.append({
-                "action": "key_release",
-                "key": key_char,
-                "delay": self._get_delay()
-            })
+        t = time.perf_counter_ns()
+        if self.recording:
+            self._push(t, EV_RELEASE, key)
+
+    # --- Drain side ---
+
+    def _drain_loop(self):
+        while True:
+            active = self._draining
+            if not self._drain() and not active:
+                # Producers are stopped and the ring is empty; the last move is final
+                self._flush_move()
+                break
+            if self.journal:
+                self.journal.tick()
+            time.sleep(self.DRAIN_INTERVAL)
+
+    def _drain(self) -> int:
+        """Moves every published ring entry into self.events. Returns the count."""
+        ring, mask = self._ring, self._mask
+        drained = 0
+        while True:
+            slot = self._read & mask
+            item = ring[slot]
+            if item is None or item[0] < self._read:
+                return drained # Not published yet
+            if item[0] > self._read:
+                # Lapped by the producers: everything in between was overwritten
+                self.dropped += item[0] - self._read
+                self._read = item[0]
+            ring[slot] = None
+            self._read += 1
+            cost = item[6]
+            self.captured += 1
+            self.overhead_ns += cost
+            if cost > self.overhead_max_ns:
+                self.overhead_max_ns = cost
+            self._store(item)
+            drained += 1
+
+    def _store(self, item):
+        """Converts one captured tuple into the stored event representation."""
+        _seq, code, t, a, b, c, _cost = item
+
+        if code == EV_MOVE:
+            self._sample_move(a, b, t)
+            return
+
+        # Anything else happens where the pointer is now, so land the path first
+        self._flush_move()
+        if code == EV_CLICK:
+            event = {"action": "mouse_click", "coords": a, "button": str(b), "pressed": c}
+        elif code == EV_SCROLL:
+            event = {"action": "mouse_scroll", "coords": a, "dx": b, "dy": c}
+        else:
+            # Blocked keys (e.g. part of the hotkey combo) are never recorded
+            key = key_code(a)
+            if key is None or self._is_blocked(key):
+                return
+            event = {"action": "key_press" if code == EV_PRESS else "key_release", "key": key_repr(key)}
+
+        self._emit(event, t)
+
+    def _emit(self, event: Dict[str, Any], t: int):
+        event["t_ns"] = self._offset(t)
+        self.events.append(event)
+
+        if self.journal:
+            self.journal.append(event)
+            if self.memory_cap and len(self.events) >= self.memory_cap:
+                # Everything is on disk already (or pending in the journal buffer)
+                self.events = []
+                self.spilled = True
+
+    def _sample_move(self, x, y, t: int):
+        """
+        Decides whether a reported move is kept (dead reckoning).
+
+        The previous unkept move is committed once the pointer strays more than
+        tolerance_px from where the last kept move's velocity says it should be
+        (a turn or speed change started there), or once max_interval_ms has
+        passed. Repeated positions never count, so a resting pointer costs nothing.
+        """
+        self.moves_seen += 1
+        if not self._first_move_ns:
+            self._first_move_ns = t
+        self._last_move_ns = t
+
+        pending = self._pending
+        ax, ay, at = self._anchor
+        if pending is None:
+            if (x, y) != (ax, ay):
+                self._pending = (x, y, t)
+            return
+        if (x, y) == (pending[0], pending[1]):
+            return # Not moving; keep the time it arrived there
+
+        dt = t - at
+        ex = ax + self._velocity[0] * dt - x
+        ey = ay + self._velocity[1] * dt - y
+        if (ex * ex + ey * ey > self._tol2 or dt > self._max_ns) and pending[2] - at >= self._min_ns:
+            self._commit_move(pending)
+        self._pending = (x, y, t)
+
+    def _commit_move(self, sample):
+        x, y, t = sample
+        ax, ay, at = self._anchor
+        dt = t - at
+        # After a pause the pointer starts from rest, not at the average speed since
+        self._velocity = ((x - ax) / dt, (y - ay) / dt) if 0 < dt <= self._max_ns else (0.0, 0.0)
+        self._anchor = sample
+        self._pending = None
+        self.last_pos = (x, y)
+        self.moves_kept += 1
+        self._emit({"action": "mouse_move", "coords": (x, y)}, t)
+
+    def _flush_move(self):
+        """Keeps the pending move, if any (before a click/key, or at the end)."""
+        if self._pending is not None:
+            self._commit_move(self._pending)
+
+    def _offset(self, t: int) -> int:
+        """Absolute offset (ns) of a stored event from the start of the recording."""
+        # Mouse and keyboard hooks run on different threads, so clamp tiny reorderings
+        if t > self.last_event_time:
+            self.last_event_time = t
+        return self.last_event_time - self.start_ns
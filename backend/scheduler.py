@@ -0,0 +1,78 @@
+import time
+from array import array
+from typing import Callable, Dict, Optional
+
+
+class DeadlineScheduler:
+    """
+    Fires events at absolute monotonic deadlines instead of relative sleeps.
+
+    Deadlines are integer nanoseconds computed from the recorded timeline
+    (origin + t / speed) against perf_counter_ns, so
+    sleep overshoot and controller call costs never accumulate: an event that
+    fires late simply leaves less waiting for the next one, and when playback
+    falls behind it catches up by firing immediately.
+    """
+
+    # Sleep coarsely until this close to the deadline, then spin
+    SPIN_THRESHOLD_NS = 800_000
+    # Longest single sleep, so a stop request is noticed during long gaps
+    MAX_SLEEP = 0.1
+
+    def __init__(self, speed: float = 1.0, is_running: Optional[Callable[[], bool]] = None):
+        self.speed = speed
+        self.is_running = is_running or (lambda: True)
+        self.origin = 0 # perf_counter_ns() at the start of the timeline
+        self.lateness = array('d')
+
+    def start(self):
+        """Anchors the timeline at the current monotonic time."""
+        self.origin = time.perf_counter_ns()
+        self.lateness = array('d')
+
+    def deadline(self, t: int) -> int:
+        """perf_counter_ns() value at which timeline offset t (ns, unscaled) is due."""
+        return self.origin + (t if self.speed == 1.0 else round(t / self.speed))
+
+    def wait_until(self, t: int) -> bool:
+        """
+        Blocks until timeline offset t (nanoseconds, unscaled) is reached.
+
+        Returns False if the run was stopped while waiting.
+        """
+        clock = time.perf_counter_ns
+        deadline = self.deadline(t)
+        remaining = deadline - clock()
+
+        while remaining > self.SPIN_THRESHOLD_NS:
+            if not self.is_running():
+                return False
+            time.sleep(min((remaining - self.SPIN_THRESHOLD_NS) / 1e9, self.MAX_SLEEP))
+            remaining = deadline - clock()
+
+        now = clock()
+        while now < deadline:
+            now = clock()
+
+        self.lateness.append((now - deadline) / 1e9)
+        return True
+
+    def stats(self) -> Dict[str, float]:
+        """Per-event lateness statistics for the current run, in milliseconds."""
+        return lateness_stats(self.lateness)
+
+
+def lateness_stats(samples) -> Dict[str, float]:
+    """Summarizes lateness samples (seconds) as max/p50/p99/mean milliseconds."""
+    n = len(samples)
+    if not n:
+        return {"events": 0, "max_ms": 0.0, "p50_ms": 0.0, "p99_ms": 0.0, "mean_ms": 0.0}
+
+    ordered = sorted(samples)
+    return {
+        "events": n,
+        "max_ms": ordered[-1] * 1000,
+        "p50_ms": ordered[n // 2] * 1000,
+        "p99_ms": ordered[min(n - 1, int(n * 0.99))] * 1000,
+        "mean_ms": sum(ordered) / n * 1000,
+    }
@@ -6,7 +6,7 @@ import sys
 # Add path for imports
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from ui.app import App
+from utils.startup import StartupTimer
 
 def resource_path(relative_path):
     """ Get absolute path to resource, works for dev and for PyInstaller """
@@ -17,54 +17,21 @@ def resource_path(relative_path):
         base_path = os.path.abspath(".")
     return os.path.join(base_path, relative_path)
 
-def show_splash():
-    """Show splash screen before main app loads."""
-    import customtkinter as ctk
-    import time
-    
-    splash_root = ctk.CTk()
-    splash_root.withdraw()
-    
-    splash = ctk.CTkToplevel(splash_root)
-    splash.overrideredirect(True)
-    splash.attributes('-topmost', True)
-    
-    # Center on screen
-    w, h = 400, 200
-    sw = splash.winfo_screenwidth()
-    sh = splash.winfo_screenheight()
-    x = (sw // 2) - (w // 2)
-    y = (sh // 2) - (h // 2)
-    splash.geometry(f"{w}x{h}+{x}+{y}")
-    
-    # Transparent key trick
-    TRANS_KEY = "#000001"
-    splash.configure(fg_color=TRANS_KEY)
-    try: splash.attributes("-transparentcolor", TRANS_KEY)
-    except: pass
-    
-    # Main frame
-    frame = ctk.CTkFrame(splash, fg_color="#18181b", corner_radius=20, border_width=2, border_color="#8e44ad")
-    frame.pack(expand=True, fill="both")
-    
-    # Logo text
-    ctk.CTkLabel(frame, text="POLARIS", font=ctk.CTkFont(size=36, weight="bold"), text_color="#a1a1aa").pack(pady=(40, 5))
-    ctk.CTkLabel(frame, text="Automation Made Simple", font=ctk.CTkFont(size=14), text_color="#71717a").pack()
-    ctk.CTkLabel(frame, text="Loading...", font=ctk.CTkFont(size=11), text_color="#52525b").pack(pady=(30, 0))
+if __name__ == "__main__":
+    # The macro library indexes files on a process pool; frozen builds need this
+    import multiprocessing
+    multiprocessing.freeze_support()
     
-    splash.update()
-    splash_root.after(1500, splash_root.quit)
-    splash_root.mainloop()
+    timer = StartupTimer()
     
-    splash.destroy()
-    splash_root.destroy()
-
-if __name__ == "__main__":
-    # Show splash screen
-    show_splash()
+    # Only customtkinter is needed to get the splash up; the app builds behind it
+    import customtkinter
+    timer.mark("import customtkinter")
+    from ui.app import App
+    timer.mark("import ui")
     
-    # Launch main app
-    app = App()
+    # Launch main app (shows the splash until it is ready)
+    app = App(timer=timer)
     
     # Set window icon
     icon_path_ico = resource_path(os.path.join("assets", "icon.ico"))
@@ -84,5 +51,7 @@ if __name__ == "__main__":
             app.iconphoto(True, app.icon_photo)
         except Exception as e:
             print(f"Png icon error: {e}")
+    timer.mark("window icon")
+    timer.report()
     
     app.mainloop()
@@ -0,0 +1,367 @@
+### Copyright @Akmal Riyas
+
+"""
+Headless command-line runner: python -m polaris <command> ...
+
+Records, plays, inspects, converts, optimizes and benchmarks .polaris files
+without building the GUI. Nothing here imports customtkinter (or Tk), and
+pynput is only imported by the commands that actually touch input devices.
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+# Add path for imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.config import load_settings
+from utils.file_manager import load_macro, save_macro, sniff_format, open_macro_stream
+from utils.remap import REMAP_MODES, remap_macro
+
+
+def _screen_metadata(screen=None):
+    """Recording metadata; resolution comes from --screen or the OS (Windows) if available."""
+    md = {"created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
+    size = None
+    if screen:
+        w, _, h = screen.lower().partition("x")
+        size = (int(w), int(h))
+    elif sys.platform == "win32":
+        try:
+            import ctypes
+            user32 = ctypes.windll.user32
+            size = (user32.GetSystemMetrics(0), user32.GetSystemMetrics(1))
+        except Exception:
+            pass
+    if size:
+        md["screen_width"], md["screen_height"] = size
+    return md
+
+
+def _webhook(args, settings):
+    if not args.webhook:
+        return None
+    from utils.webhook_manager import WebhookManager
+    url = settings.get("webhook_url", "")
+    if not url:
+        print("Webhook requested but no webhook_url is configured in settings.json.")
+        return None
+    return WebhookManager(url=url, enabled=True)
+
+
+def _level(args, settings):
+    return settings.get("compression_level", 1) if args.level is None else args.level
+
+
+def _fmt_duration(seconds):
+    mins, secs = divmod(int(seconds), 60)
+    hours, mins = divmod(mins, 60)
+    return f"{hours}:{mins:02}:{secs:02}" if hours else f"{mins:02}:{secs:02}"
+
+
+# --- Commands ---
+
+def cmd_record(args, settings):
+    from backend.recorder import Recorder
+
+    stop_key = args.stop_key or settings.get("rec_key", "f8")
+    webhook = _webhook(args, settings)
+    recorder = Recorder(stop_key=stop_key, blocked_keys={settings.get("play_key", "f12")})
+
+    if args.countdown:
+        print(f"Recording starts in {args.countdown}s...")
+        time.sleep(args.countdown)
+
+    metadata = _screen_metadata(args.screen)
+    recorder.start(sampling=settings.get("move_sampling"))
+    if webhook: webhook.on_recording_started()
+    print(f"Recording. Press {stop_key} (or Ctrl+C) to stop.")
+
+    deadline = time.monotonic() + args.duration if args.duration else None
+    try:
+        while recorder.recording:
+            if deadline and time.monotonic() >= deadline:
+                break
+            time.sleep(0.05)
+    except KeyboardInterrupt:
+        pass
+    events = recorder.stop()
+    metadata["sampling"] = recorder.sampling_stats()
+
+    save_macro(args.output, {"metadata": metadata, "flow": events}, fmt=args.format or settings.get("save_format", "binary"),
+               level=_level(args, settings))
+    print(f"Saved {len(events)} events to {args.output}")
+    if webhook:
+        webhook.on_recording_finished(len(events))
+        webhook.close()
+    return 0
+
+
+def cmd_play(args, settings):
+    from backend.player import Player
+
+    if args.stream and (args.start or args.start_index is not None):
+        # Skipping ahead in a stream cannot see which keys/buttons were held by then
+        print("Streamed playback always starts at the beginning; drop --stream to use --start/--start-index "
+              "(held keys and buttons are only restored from a loaded macro).")
+        return 2
+
+    data = open_macro_stream(args.file) if args.stream else load_macro(args.file)
+    if not args.stream and not data.get("flow"):
+        print("Macro is empty.")
+        return 1
+
+    remap = args.remap or (settings.get("resolution_remap") if settings.get("resolution_remap") in REMAP_MODES else None)
+    if remap and not args.stream:
+        md = _screen_metadata(args.screen)
+        if "screen_width" not in md:
+            print("Cannot detect the screen size for remapping; pass --screen WxH.")
+            return 2
+        remapped = remap_macro(data, md["screen_width"], md["screen_height"], remap)
+        if remapped:
+            src = data["metadata"]
+            print(f"Remapped {src['screen_width']}x{src['screen_height']} -> "
+                  f"{md['screen_width']}x{md['screen_height']} ({remap})")
+            data = remapped
+
+    loop_mode = "count" if args.count else ("infinite" if args.infinite else "once")
+    total_loops = args.count or (-1 if args.infinite else 1)
+    if args.stream and loop_mode != "once":
+        print("Streamed playback can only run once.")
+        return 2
+
+    scheduler = args.scheduler or settings.get("playback_scheduler", "deadline")
+    from backend.compiler import motion_spec
+    motion = motion_spec(args.interpolate or settings.get("move_interpolation", "off"),
+                         args.rate or settings.get("move_rate_hz", 125))
+    player = Player()
+    webhook = _webhook(args, settings)
+
+    # Optional global stop key, same as the GUI's play key
+    hotkeys = None
+    stop_key = args.stop_key or settings.get("play_key", "f12")
+    if stop_key:
+        from backend.hotkeys import HotkeyManager
+        hotkeys = HotkeyManager()
+        hotkeys.start({stop_key: player.stop})
+
+    if args.progress:
+        player.subscribe_progress(
+            lambda p: print(f"  {p['index']}/{p['total'] or '?'} events, "
+                            f"{p['fraction'] * 100:5.1f}%, lateness {p['lateness_ms']:.1f}ms"),
+            interval=args.progress)
+    heartbeat = settings.get("webhook_heartbeat_sec", 0)
+    loop = 0
+    if webhook:
+        webhook.on_playback_started(os.path.basename(args.file), loop_mode, total_loops)
+        if heartbeat:
+            player.subscribe_progress(lambda p: webhook.on_playback_progress(p, loop), interval=heartbeat)
+
+    if args.delay:
+        print(f"Playback starts in {args.delay}s...")
+        time.sleep(args.delay)
+
+    # Only the first loop starts part-way
+    seek = {"start": args.start, "start_index": args.start_index}
+    player.playing = True
+    try:
+        while player.playing:
+            loop += 1
+            if loop_mode != "once":
+                print(f"Loop {loop}" + (f"/{total_loops}" if loop_mode == "count" else ""))
+            player.play(data, speed=args.speed, scheduler=scheduler, motion=motion, **seek)
+            seek = {}
+            if not player.playing or loop_mode == "once" or (loop_mode == "count" and loop >= total_loops):
+                break
+    except KeyboardInterrupt:
+        print("Interrupted.")
+    finally:
+        player.stop()
+        if hotkeys: hotkeys.stop()
+        if webhook:
+            webhook.on_playback_finished(loop)
+            webhook.close()
+    return 0
+
+
+def summarize(data):
+    """Event counts, duration and resolution of a loaded macro."""
+    from backend.flow_model import get_flow_model
+    stats = get_flow_model(data).stats()
+    md = data.get("metadata", {})
+    return {
+        "events": stats["events"],
+        "duration": stats["duration"],
+        "by_action": stats["by_action"],
+        "groups": stats["groups"],
+        "screen_width": md.get("screen_width"),
+        "screen_height": md.get("screen_height"),
+        "created_at": md.get("created_at"),
+    }
+
+
+def cmd_inspect(args, settings):
+    fmt = sniff_format(args.file)
+    summary = summarize(load_macro(args.file))
+    summary["format"] = fmt
+    summary["size_bytes"] = os.path.getsize(args.file)
+
+    if args.json:
+        print(json.dumps(summary, indent=4))
+        return 0
+
+    print(f"File:       {args.file} ({fmt}, {summary['size_bytes']:,} bytes)")
+    print(f"Created:    {summary['created_at'] or '-'}")
+    print(f"Resolution: {summary['screen_width'] or '-'}x{summary['screen_height'] or '-'}")
+    print(f"Duration:   {_fmt_duration(summary['duration'])} ({summary['duration']:.3f}s)")
+    print(f"Events:     {summary['events']} ({summary['groups']} groups)")
+    for action, n in sorted(summary["by_action"].items(), key=lambda kv: -kv[1]):
+        print(f"  {action:<14} {n}")
+    return 0
+
+
+def cmd_convert(args, settings):
+    data = load_macro(args.input)
+    save_macro(args.output, data, fmt=args.format, level=_level(args, settings))
+    print(f"Converted {args.input} ({sniff_format(args.input)}, {os.path.getsize(args.input):,} bytes) -> "
+          f"{args.output} ({args.format}, {os.path.getsize(args.output):,} bytes)")
+    return 0
+
+
+def cmd_optimize(args, settings):
+    from backend.optimizer import optimize_macro, format_reports
+
+    data = load_macro(args.input)
+    options = dict(settings.get("optimizer", {}))
+    if args.tolerance is not None: options["path_tolerance"] = args.tolerance
+    if args.max_idle is not None: options["max_idle"] = args.max_idle
+    if args.collapse_autorepeat: options["collapse_autorepeat"] = True
+
+    optimized, reports = optimize_macro(data, options)
+    print(format_reports(reports, len(data.get("flow", []))))
+    if args.output:
+        save_macro(args.output, optimized, fmt=args.format or settings.get("save_format", "binary"),
+                   level=_level(args, settings))
+        print(f"Saved to {args.output} ({os.path.getsize(args.output):,} bytes)")
+    return 0
+
+
+def _timed(fn, repeat):
+    best = None
+    result = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        dt = time.perf_counter() - t0
+        best = dt if best is None else min(best, dt)
+    return best * 1000, result
+
+
+def cmd_benchmark(args, settings):
+    from backend.compiler import compile_flow
+
+    repeat = max(1, args.repeat)
+    rows = []
+    load_ms, data = _timed(lambda: load_macro(args.file), repeat)
+    rows.append(("load", load_ms, f"{len(data.get('flow', []))} events"))
+
+    compile_ms, plan = _timed(lambda: compile_flow(data["flow"]), repeat)
+    rows.append(("compile plan", compile_ms, f"{len(plan)} ops"))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for fmt in ("binary", "json"):
+            path = os.path.join(tmp, f"bench.{fmt}.polaris")
+            save_ms, _ = _timed(lambda: save_macro(path, data, fmt=fmt), repeat)
+            rows.append((f"save {fmt}", save_ms, f"{os.path.getsize(path):,} bytes"))
+            reload_ms, _ = _timed(lambda: load_macro(path), repeat)
+            rows.append((f"load {fmt}", reload_ms, ""))
+
+    print(f"Benchmark of {args.file} (best of {repeat}):")
+    for name, ms, note in rows:
+        print(f"  {name:<14} {ms:9.1f} ms  {note}")
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="polaris", description="Polaris headless macro runner.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("record", help="Record a macro until the stop key is pressed.")
+    p.add_argument("output", help="Output .polaris file")
+    p.add_argument("--stop-key", help="Key that stops recording (default: settings rec_key)")
+    p.add_argument("--duration", type=float, help="Stop automatically after this many seconds")
+    p.add_argument("--countdown", type=float, default=0, help="Seconds to wait before recording")
+    p.add_argument("--format", choices=("binary", "json"), help="File format (default: settings save_format)")
+    p.add_argument("--screen", help="Resolution to store, e.g. 1920x1080 (detected on Windows)")
+    p.add_argument("--level", type=int, choices=range(10), metavar="0-9", help="Compression level (default: settings)")
+    p.add_argument("--webhook", action="store_true", help="Send webhook notifications")
+    p.set_defaults(func=cmd_record)
+
+    p = sub.add_parser("play", help="Play a macro.")
+    p.add_argument("file")
+    loops = p.add_mutually_exclusive_group()
+    loops.add_argument("--count", type=int, help="Play this many loops")
+    loops.add_argument("--infinite", action="store_true", help="Loop until stopped")
+    p.add_argument("--speed", type=float, default=1.0, help="Speed multiplier (default 1.0)")
+    p.add_argument("--scheduler", choices=("deadline", "relative"), help="Timing mode (default: settings)")
+    p.add_argument("--stream", action="store_true", help="Stream events from disk instead of loading the file")
+    p.add_argument("--stop-key", help="Global key that stops playback (default: settings play_key)")
+    p.add_argument("--delay", type=float, default=0, help="Seconds to wait before playing")
+    start = p.add_mutually_exclusive_group()
+    start.add_argument("--start", type=float, default=0.0, metavar="SEC", help="Start this many seconds into the macro")
+    start.add_argument("--start-index", type=int, metavar="N", help="Start at event N (e.g. from a checkpoint)")
+    p.add_argument("--progress", type=float, metavar="SEC", help="Print progress every SEC seconds")
+    p.add_argument("--interpolate", choices=("off", "linear", "catmull_rom"),
+                   help="Synthesize mouse paths between stored moves (default: settings)")
+    p.add_argument("--rate", type=int, metavar="HZ", help="Output rate for --interpolate (default: settings)")
+    p.add_argument("--remap", choices=REMAP_MODES, help="Remap coordinates to this screen (default: settings)")
+    p.add_argument("--screen", help="Target resolution for --remap, e.g. 2560x1440 (detected on Windows)")
+    p.add_argument("--webhook", action="store_true", help="Send webhook notifications")
+    p.set_defaults(func=cmd_play)
+
+    p = sub.add_parser("inspect", help="Show event counts, duration and resolution.")
+    p.add_argument("file")
+    p.add_argument("--json", action="store_true", help="Print the summary as JSON")
+    p.set_defaults(func=cmd_inspect)
+
+    p = sub.add_parser("convert", help="Convert between binary and JSON formats.")
+    p.add_argument("input")
+    p.add_argument("output")
+    p.add_argument("--format", choices=("binary", "json"), default="binary")
+    p.add_argument("--level", type=int, choices=range(10), metavar="0-9", help="Compression level (default: settings)")
+    p.set_defaults(func=cmd_convert)
+
+    p = sub.add_parser("optimize", help="Remove redundant events and report what each pass saved.")
+    p.add_argument("input")
+    p.add_argument("output", nargs="?", help="Where to save the result (omit for a dry run)")
+    p.add_argument("--tolerance", type=float, metavar="PX", help="Path simplification tolerance (0 = off)")
+    p.add_argument("--max-idle", type=float, metavar="SEC", help="Cap pauses at this many seconds")
+    p.add_argument("--collapse-autorepeat", action="store_true",
+                   help="Drop OS auto-repeat key presses (types fewer characters on playback)")
+    p.add_argument("--format", choices=("binary", "json"), help="File format (default: settings save_format)")
+    p.add_argument("--level", type=int, choices=range(10), metavar="0-9", help="Compression level (default: settings)")
+    p.set_defaults(func=cmd_optimize)
+
+    p = sub.add_parser("benchmark", help="Time load, compile and save of a macro.")
+    p.add_argument("file")
+    p.add_argument("--repeat", type=int, default=3)
+    p.set_defaults(func=cmd_benchmark)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        return args.func(args, load_settings())
+    except FileNotFoundError as e:
+        print(e)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
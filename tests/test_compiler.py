@@ -0,0 +1,55 @@
+import pytest
+
+pytest.importorskip("pynput")
+
+from backend.compiler import OP_KEY_DOWN, OP_MOUSE_DOWN, OP_MOUSE_UP, OP_MOVE, compile_flow, interpolate_rows, iter_ops
+
+MS = 1_000_000
+
+
+def _moves(rows):
+    return [(t // MS, a, b) for op, t, a, b, _ in rows if op == OP_MOVE]
+
+
+def test_drag_follows_path_from_press():
+    rows = [
+        (OP_MOVE, 0, 0, 0, None),
+        (OP_MOUSE_DOWN, 50 * MS, 0, 0, "left"),
+        (OP_MOVE, 150 * MS, 100, 0, None),
+        (OP_MOUSE_UP, 160 * MS, 0, 0, "left"),
+    ]
+    out = list(interpolate_rows(rows, "linear", hz=100))
+    times = [r[1] for r in out]
+    assert times == sorted(times)
+    # Pointer stays put until the press, then walks to the keyframe in steps
+    press = out.index(rows[1])
+    assert _moves(out[:press]) == [(0, 0, 0)]
+    drag = _moves(out[press:])
+    assert drag[0] == (60, 10, 0)
+    assert drag[-1] == (150, 100, 0)
+    assert len(drag) == 10
+
+
+def test_key_event_ends_path():
+    rows = [
+        (OP_MOVE, 0, 0, 0, None),
+        (OP_KEY_DOWN, 10 * MS, 0, 0, "a"),
+        (OP_MOVE, 100 * MS, 100, 0, None),
+    ]
+    assert list(interpolate_rows(rows, "linear", hz=100)) == rows
+
+
+@pytest.mark.parametrize("mode", ["linear", "catmull_rom"])
+def test_long_pause_is_not_bridged(mode):
+    rows = [
+        (OP_MOVE, 0, 0, 0, None),
+        (OP_MOUSE_DOWN, 10 * MS, 0, 0, "left"),
+        (OP_MOVE, 5000 * MS, 100, 0, None),
+    ]
+    assert list(interpolate_rows(rows, mode, hz=100, max_gap=1.0)) == rows
+
+
+def test_legacy_delays_are_timed():
+    events = [{"action": "mouse_move", "coords": (i, i), "delay": 0.01} for i in range(8)]
+    assert [t for _, t, _, _, _ in iter_ops(iter(events))] == [10 * MS * (i + 1) for i in range(8)]
+    assert compile_flow(events).duration == pytest.approx(0.08)
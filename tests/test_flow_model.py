@@ -0,0 +1,65 @@
+import pytest
+
+from backend.flow_model import FlowModel
+from utils.macro_format import ColumnarFlow
+
+MS = 1_000_000
+
+
+def _flow():
+    t = 0
+    events = []
+
+    def add(event):
+        nonlocal t
+        t += 10 * MS
+        event["t_ns"] = t
+        events.append(event)
+
+    for i in range(3):
+        add({"action": "mouse_move", "coords": (i, i)})
+    add({"action": "mouse_click", "coords": (2, 2), "button": "Button.left", "pressed": True})
+    for i in range(3):
+        add({"action": "mouse_move", "coords": (10 + i, 2)})
+    add({"action": "mouse_click", "coords": (12, 2), "button": "Button.left", "pressed": False})
+    add({"action": "key_press", "key": "'a'"})
+    add({"action": "key_release", "key": "'a'"})
+    for i in range(2):
+        add({"action": "mouse_move", "coords": (20, 20 + i)})
+    return events
+
+
+def _state(model):
+    return (list(model.kinds), list(model.starts), list(model.counts), model.held,
+            model.stats(), model._buttons)
+
+
+@pytest.mark.parametrize("columnar", [False, True])
+@pytest.mark.parametrize("index, event", [
+    (1, {"action": "key_press", "key": "'b'"}),                        # splits a path
+    (3, {"action": "mouse_move", "coords": (5, 5)}),                  # merges two paths, drops the drag
+    (7, {"action": "mouse_click", "button": "Button.right", "pressed": True}), # button stays held
+    (8, {"action": "mouse_move", "coords": (1, 1)}),                  # joins the following run
+    (11, {"action": "mouse_scroll", "coords": (0, 0), "dx": 0, "dy": 1}), # last event
+])
+def test_edit_matches_rebuild(columnar, index, event):
+    events = _flow()
+    flow = ColumnarFlow.from_events(events) if columnar else events
+    model = FlowModel(flow)
+    event = dict(event, t_ns=events[index]["t_ns"])
+    model.replace(index, event)
+
+    assert flow[index]["action"] == event["action"]
+    assert _state(model) == _state(FlowModel(flow))
+
+
+def test_append_then_edit_matches_rebuild():
+    events = _flow()
+    flow = events[:5]
+    model = FlowModel(flow)
+    flow.extend(events[5:])
+    model.append()
+    assert _state(model) == _state(FlowModel(flow))
+
+    model.replace(4, {"action": "key_press", "key": "'c'", "t_ns": events[4]["t_ns"]})
+    assert _state(model) == _state(FlowModel(flow))
@@ -0,0 +1,229 @@
+import gzip
+import json
+import struct
+
+import pytest
+
+from utils import chunked_format, macro_format
+from utils.file_manager import load_macro, save_macro
+from utils.macro_format import ColumnarFlow, FLAG_NS, FLAG_ZLIB, HEADER
+
+
+def _events():
+    """A small flow touching every action type, with uneven nanosecond times."""
+    events = []
+    t = 0
+    for i in range(40):
+        t += 1_000_003 * (i % 7 + 1)
+        kind = i % 5
+        if kind == 0:
+            events.append({"action": "mouse_move", "coords": (i * 3, -i), "t_ns": t})
+        elif kind == 1:
+            events.append({"action": "mouse_click", "coords": (i, i), "button": "Button.left",
+                           "pressed": i % 2 == 1, "t_ns": t})
+        elif kind == 2:
+            events.append({"action": "mouse_scroll", "coords": (5, 6), "dx": -1, "dy": 2, "t_ns": t})
+        elif kind == 3:
+            events.append({"action": "key_press", "key": "'a'", "t_ns": t})
+        else:
+            events.append({"action": "key_release", "key": "Key.shift", "t_ns": t})
+    return events
+
+
+def _normalized(events):
+    return [dict(e, coords=tuple(e["coords"])) if "coords" in e else dict(e) for e in events]
+
+
+def _set_flags(path, flags):
+    with open(path, "r+b") as f:
+        f.seek(6) # magic (4) + version (2)
+        f.write(struct.pack("<H", flags))
+
+
+@pytest.fixture
+def events():
+    return _events()
+
+
+# --- Round trips ---
+
+@pytest.mark.parametrize("level", [0, 6])
+def test_v2_round_trip(tmp_path, events, level):
+    path = tmp_path / "v2.polaris"
+    path.write_bytes(macro_format.encode_flow(ColumnarFlow.from_events(events), {"k": 1}, level))
+    metadata, flow = macro_format.read_file(str(path))
+    assert metadata == {"k": 1}
+    assert _normalized(flow) == _normalized(events)
+    assert _normalized(macro_format.iter_file(str(path))) == _normalized(events)
+    summary = macro_format.read_summary(str(path))
+    assert summary["events"] == len(events)
+    assert summary["duration"] == events[-1]["t_ns"] / 1e9
+
+
+@pytest.mark.parametrize("level", [0, 1])
+def test_v3_round_trip(tmp_path, events, level):
+    path = str(tmp_path / "v3.polaris")
+    save_macro(path, {"flow": events, "metadata": {"k": 2}}, fmt="binary", level=level)
+    assert macro_format.file_version(path) == chunked_format.VERSION
+    data = load_macro(path)
+    assert data["metadata"] == {"k": 2}
+    assert _normalized(data["flow"]) == _normalized(events)
+    assert _normalized(macro_format.iter_file(path)) == _normalized(events)
+
+
+def test_json_v2_v3_chain(tmp_path, events):
+    """JSON -> v3 -> JSON -> v2 -> v3 keeps every event and timestamp."""
+    json_path, v3_path, json2_path, v2_path, v3b_path = (str(tmp_path / n) for n in ("a.json", "b", "c.json", "d", "e"))
+    save_macro(json_path, {"flow": events, "metadata": {}}, fmt="json")
+    save_macro(v3_path, load_macro(json_path), fmt="binary")
+    save_macro(json2_path, load_macro(v3_path), fmt="json")
+    with open(v2_path, "wb") as f:
+        f.write(macro_format.encode_flow(ColumnarFlow.from_events(load_macro(json2_path)["flow"]), {}, 1))
+    save_macro(v3b_path, load_macro(v2_path), fmt="binary", level=0)
+    assert _normalized(load_macro(v3b_path)["flow"]) == _normalized(events)
+
+
+def test_legacy_delays_convert_without_drift(tmp_path):
+    legacy = [{"action": "mouse_move", "coords": [i, i], "delay": 0.001} for i in range(100_000)]
+    path = str(tmp_path / "legacy.json")
+    save_macro(path, {"flow": legacy, "metadata": {}}, fmt="json")
+    flow = load_macro(path)["flow"]
+    assert "delay" not in flow[0]
+    assert flow[-1]["t_ns"] == 100_000 * 1_000_000
+
+
+def test_json_keeps_delays_for_older_builds(tmp_path, events):
+    path = str(tmp_path / "old.json")
+    save_macro(path, {"flow": events, "metadata": {}}, fmt="json")
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        stored = json.load(f)["flow"]
+    # What a delay-only reader reconstructs
+    t, times = 0, []
+    for event in stored:
+        t += event["delay"]
+        times.append(t)
+    assert times == pytest.approx([e["t_ns"] / 1e9 for e in events], abs=1e-9)
+    assert _normalized(load_macro(path)["flow"]) == _normalized(events)
+
+
+def test_legacy_microsecond_files_scale_to_ns(tmp_path, events):
+    us = ColumnarFlow.from_events(events)
+    us.times_ns = type(us.times_ns)('q', [t // 1000 for t in us.times_ns])
+    expected = [t // 1000 * 1000 for t in ColumnarFlow.from_events(events).times_ns]
+
+    v2 = str(tmp_path / "v2.polaris")
+    with open(v2, "wb") as f:
+        f.write(macro_format.encode_flow(us, {}, 1))
+    _set_flags(v2, FLAG_ZLIB) # As written before FLAG_NS existed
+    assert list(macro_format.read_file(v2)[1].times_ns) == expected
+    assert macro_format.read_summary(v2)["duration"] == expected[-1] / 1e9
+
+    v3 = str(tmp_path / "v3.polaris")
+    with open(v3, "wb") as f:
+        chunked_format.write_flow(f, us, {}, level=1, chunk_events=8)
+    _set_flags(v3, FLAG_ZLIB)
+    assert list(macro_format.read_file(v3)[1].times_ns) == expected
+    with chunked_format.ChunkedReader(v3) as reader:
+        assert reader.duration == expected[-1] / 1e9
+        assert reader.seek_time(expected[9] / 1e9) == 9
+
+
+def test_new_files_are_flagged_ns(tmp_path, events):
+    path = str(tmp_path / "v3.polaris")
+    save_macro(path, {"flow": events, "metadata": {}}, level=1)
+    with open(path, "rb") as f:
+        flags = HEADER.unpack(f.read(HEADER.size))[2]
+    assert flags & FLAG_NS and flags & FLAG_ZLIB
+
+
+# --- Damaged files ---
+
+@pytest.mark.parametrize("fmt", ["v2", "v3"])
+def test_truncated_files_raise(tmp_path, events, fmt):
+    path = str(tmp_path / "m.polaris")
+    if fmt == "v2":
+        with open(path, "wb") as f:
+            f.write(macro_format.encode_flow(ColumnarFlow.from_events(events), {}, 0))
+    else:
+        save_macro(path, {"flow": events, "metadata": {}}, level=1)
+    blob = open(path, "rb").read()
+    for cut in (HEADER.size + 3, len(blob) // 2, len(blob) - 1):
+        with open(path, "wb") as f:
+            f.write(blob[:cut])
+        with pytest.raises((ValueError, struct.error)):
+            macro_format.read_file(path)
+
+
+@pytest.mark.parametrize("fmt", ["v2", "v3"])
+def test_corrupt_compressed_data_raises(tmp_path, events, fmt):
+    path = str(tmp_path / "m.polaris")
+    if fmt == "v2":
+        with open(path, "wb") as f:
+            f.write(macro_format.encode_flow(ColumnarFlow.from_events(events), {}, 6))
+    else:
+        save_macro(path, {"flow": events, "metadata": {}}, level=6)
+    blob = bytearray(open(path, "rb").read())
+    # Flip bytes in the middle of the compressed columns/chunk
+    for i in range(len(blob) // 2, len(blob) // 2 + 8):
+        blob[i] ^= 0xFF
+    with open(path, "wb") as f:
+        f.write(blob)
+    with pytest.raises(ValueError):
+        macro_format.read_file(path)
+
+
+def test_not_a_polaris_file(tmp_path):
+    path = tmp_path / "x.polaris"
+    path.write_bytes(b"nope" + bytes(40))
+    with pytest.raises(ValueError):
+        macro_format.file_version(str(path))
+
+
+# --- Seek index ---
+
+def test_seek_time_at_chunk_boundaries(tmp_path):
+    # Events every 10 ms, except a 1 s gap between chunk 0 (0..3) and chunk 1 (4..7)
+    times = [10, 20, 30, 40, 1040, 1050, 1060, 1070, 1080]
+    events = [{"action": "mouse_move", "coords": (i, i), "t_ns": ms * 1_000_000} for i, ms in enumerate(times)]
+    path = str(tmp_path / "s.polaris")
+    with open(path, "wb") as f:
+        chunked_format.write_flow(f, ColumnarFlow.from_events(events), {}, level=1, chunk_events=4)
+
+    with chunked_format.ChunkedReader(path) as reader:
+        assert [c.count for c in reader.chunks] == [4, 4, 1]
+        cases = {
+            0.0: 0,       # Before the first event
+            0.040: 3,     # Last event of chunk 0
+            0.0400001: 4, # Just after it: lands in the gap, answered by chunk 1
+            0.5: 4,       # Middle of the gap
+            1.040: 4,     # First event of chunk 1
+            1.070: 7,     # Last event of chunk 1
+            1.075: 8,     # Between chunks 1 and 2
+            1.080: 8,     # Only event of the last chunk
+            2.0: 9,       # Past the end
+        }
+        for seconds, index in cases.items():
+            assert reader.seek_time(seconds) == index, seconds
+        # Index seeks re-base on the previous event, across a chunk boundary
+        first = next(reader.iter_events(start_index=4))
+        assert first["t_ns"] == (1040 - 40) * 1_000_000
+
+    resumed = list(macro_format.iter_file(path, start=1.045))
+    assert [e["coords"] for e in resumed] == [(i, i) for i in range(5, 9)]
+    assert resumed[0]["t_ns"] == 5_000_000
+
+
+@pytest.mark.parametrize("times, expected", [
+    ([0, 10, 20, 20, 20, 20, 30, 40], 2), # Equal times straddle chunks 0 and 1
+    ([0, 10, 20, 20, 20, 20, 20, 30], 2), # ...and fill chunk 1 completely
+    ([0, 10, 15, 20, 20, 20, 30, 40], 3), # Chunk 1 starts exactly at the seek time
+])
+def test_seek_time_with_equal_times_across_chunks(tmp_path, times, expected):
+    events = [{"action": "mouse_move", "coords": (i, i), "t_ns": t} for i, t in enumerate(times)]
+    path = str(tmp_path / "eq.polaris")
+    with open(path, "wb") as f:
+        chunked_format.write_flow(f, ColumnarFlow.from_events(events), {}, level=1, chunk_events=3)
+
+    with chunked_format.ChunkedReader(path) as reader:
+        assert reader.seek_time(20e-9) == expected
+        assert len(list(reader.iter_events(start=20e-9))) == len(times) - expected
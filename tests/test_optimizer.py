@@ -0,0 +1,15 @@
+from backend.optimizer import format_reports, optimize_macro
+
+MS = 1_000_000
+
+
+def test_reports_time_saved_per_pass():
+    # Ten quick moves, then ten moves 500 ms apart
+    events = [{"action": "mouse_move", "coords": (i % 3, 0), "t_ns": i * MS * (1 if i < 10 else 500)}
+              for i in range(20)]
+    optimized, reports = optimize_macro({"flow": events}, {"max_idle": 0.5})
+    saved = {r["pass"]: r["time_saved"] for r in reports}
+    assert saved["cap_idle_gaps"] > 0
+    assert all(v == 0 for name, v in saved.items() if name != "cap_idle_gaps")
+    assert optimized["metadata"]["optimized"]["time_saved"] == sum(saved.values())
+    assert f"-{saved['cap_idle_gaps']:.2f}s" in format_reports(reports, len(events))
@@ -0,0 +1,58 @@
+import threading
+import time
+
+from backend.progress import PlaybackProgress, ProgressNotifier
+
+
+def _play_loops(progress, notifier, loops, loop_time):
+    """Drives progress the way Player.play does for `loops` back-to-back short runs."""
+    for _ in range(loops):
+        progress.begin(total=100, duration=loop_time, speed=1.0)
+        notifier.notify()
+        end = time.monotonic() + loop_time
+        while time.monotonic() < end:
+            progress.index += 1
+            time.sleep(0.005)
+        progress.end()
+        notifier.notify()
+        time.sleep(0.01) # Gap between loops
+
+
+def test_heartbeat_fires_across_short_loops():
+    progress = PlaybackProgress()
+    notifier = ProgressNotifier(progress)
+    beats = []
+    lock = threading.Lock()
+
+    def on_progress(snap):
+        if snap["active"]:
+            with lock:
+                beats.append(time.monotonic())
+
+    token = notifier.subscribe(on_progress, interval=0.3)
+    start = time.monotonic()
+    # Every loop is far shorter than the heartbeat interval
+    _play_loops(progress, notifier, loops=12, loop_time=0.1)
+    elapsed = time.monotonic() - start
+    notifier.unsubscribe(token)
+
+    assert len(beats) >= int(elapsed / 0.3) - 1
+    gaps = [b - a for a, b in zip(beats, beats[1:])]
+    assert all(g >= 0.25 for g in gaps), gaps
+
+
+def test_final_snapshot_needs_a_run_after_subscribing():
+    progress = PlaybackProgress()
+    notifier = ProgressNotifier(progress)
+    _play_loops(progress, notifier, loops=1, loop_time=0.02)
+
+    seen = []
+    token = notifier.subscribe(seen.append, interval=0.05)
+    time.sleep(0.2)
+    assert seen == [] # The finished run predates the subscription
+
+    _play_loops(progress, notifier, loops=1, loop_time=0.02)
+    time.sleep(0.2)
+    notifier.unsubscribe(token)
+    finals = [s for s in seen if not s["active"]]
+    assert len(finals) == 1 and finals[0]["run"] == 2
@@ -0,0 +1,92 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip("requests")
+
+from utils.webhook_manager import WebhookManager
+
+
+class _Endpoint:
+    """Local stand-in for a webhook URL that records every POST."""
+
+    def __init__(self, responses=None):
+        self.posts = []             # (monotonic time, payload)
+        self.responses = list(responses or []) # (status, headers) served before falling back to 204
+        endpoint = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers["Content-Length"]))
+                endpoint.posts.append((time.monotonic(), json.loads(body)))
+                status, headers = endpoint.responses.pop(0) if endpoint.responses else (204, {})
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/hook"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def embeds(self):
+        return [e["title"] for _t, p in self.posts for e in p["embeds"]]
+
+
+@pytest.fixture
+def endpoint():
+    ep = _Endpoint()
+    yield ep
+    ep.close()
+
+
+def _manager(url):
+    wm = WebhookManager(url, enabled=True)
+    wm.COALESCE_WINDOW = 0.2
+    wm.BACKOFF_BASE = 0.05
+    return wm
+
+
+def test_burst_is_coalesced_into_one_post(endpoint):
+    wm = _manager(endpoint.url)
+    for i in range(4):
+        wm.send_status(f"msg {i}", "burst")
+    wm.close()
+    assert len(endpoint.posts) == 1
+    assert endpoint.embeds() == [f"Polaris | msg {i}" for i in range(4)]
+
+
+def test_429_waits_for_retry_after():
+    ep = _Endpoint(responses=[(429, {"Retry-After": "0.4"})])
+    try:
+        wm = _manager(ep.url)
+        wm.send_status("limited", "retry me")
+        wm.close()
+        assert len(ep.posts) == 2 # Rejected once, then delivered
+        assert ep.posts[1][0] - ep.posts[0][0] >= 0.35
+        assert ep.posts[0][1] == ep.posts[1][1]
+    finally:
+        ep.close()
+
+
+def test_close_drains_everything_in_order(endpoint):
+    wm = _manager(endpoint.url)
+    titles = [f"msg {i}" for i in range(25)]
+    for title in titles:
+        wm.send_status(title, "drain")
+    wm.close()
+    # MAX_EMBEDS per post, nothing lost or reordered
+    assert [len(p["embeds"]) for _t, p in endpoint.posts] == [10, 10, 5]
+    assert endpoint.embeds() == [f"Polaris | {t}" for t in titles]
+    assert wm.dropped == 0
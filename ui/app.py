@@ -11,36 +11,69 @@ from datetime import datetime
 # Add path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from backend.recorder import Recorder
-from backend.player import Player
-from backend.hotkeys import HotkeyManager
+# backend.recorder/player/hotkeys pull in pynput; they are imported in App.__init__
+# while the splash is already on screen.
 from ui.overlay import RecordingOverlay, PlaybackOverlay
+from ui.virtual_list import VirtualList
+from backend.flow_model import get_flow_model, GROUP_PATH
+from backend.compiler import motion_spec
 from utils.file_manager import save_macro, load_macro
 from utils.config import load_settings, save_settings
+from utils.io_progress import IOProgress, OperationCancelled
+from utils.checkpoint import CHECKPOINT_FILE, macro_fingerprint, save_checkpoint, clear_checkpoint, find_resume_point
+from utils.remap import REMAP_MODES, remap_macro
 from utils.webhook_manager import WebhookManager
+from utils.journal import EXTENSION as JOURNAL_EXT, find_journals, recover_journal
 
 class App(ctk.CTk):
-    def __init__(self):
+    def __init__(self, show_splash=True, timer=None):
         super().__init__()
+        mark = timer.mark if timer else (lambda phase: None)
+        
+        # Build behind a splash: the window stays withdrawn until it is ready
+        splash = None
+        if show_splash:
+            from ui.splash import SplashScreen
+            self.withdraw()
+            splash = SplashScreen(self)
+            mark("splash shown")
 
         # --- Data & Configuration ---
         self.settings = load_settings()
         self.current_macro_data = {"flow": [], "metadata": {}}
+        self.current_journal = None # Journal backing the unsaved recording, if any
+        self.library_index = None # Opened with the Library page
+        self.library_rows = []
         
         # Keep track of internal listeners/threads
         self.playback_lock = threading.Lock()
         self.playback_thread = None
         
         # --- Backend Setup ---
+        if splash: splash.update_status("Loading input hooks...")
+        from backend.recorder import Recorder
+        from backend.player import Player
+        from backend.hotkeys import HotkeyManager
+        mark("import backend")
+        
         self.hotkey_manager = HotkeyManager()
         self.recorder = Recorder(stop_key=None)
         self.player = Player()
+        self._progress_subs = []
         self.webhook_manager = WebhookManager(
             url=self.settings.get("webhook_url", ""),
             enabled=self.settings.get("webhook_enabled", False)
         )
         
+        # Components follow the settings they depend on instead of re-reading the dict
+        self.settings.subscribe("rec_key", lambda *_: self._update_hotkeys())
+        self.settings.subscribe("play_key", lambda *_: self._update_hotkeys())
+        self.settings.subscribe("webhook_url", self._on_webhook_setting)
+        self.settings.subscribe("webhook_enabled", self._on_webhook_setting)
+        mark("backend setup")
+        
         # --- UI Setup ---
+        if splash: splash.update_status("Building interface...")
         self.title("Polaris Macro")
         self.geometry("1100x750")
         
@@ -62,11 +95,17 @@ class App(ctk.CTk):
         self.grid_rowconfigure(0, weight=1)
 
         # Components
+        # Only the home page is built up front; the other pages are built the
+        # first time they are selected (see select_frame).
         self._create_sidebar()
         self._create_home_frame()
-        self._create_playback_frame()
-        self._create_webhooks_frame()
-        self._create_settings_frame()
+        self.frames = {"home": self.home_frame}
+        self.frame_builders = {
+            "playback": self._create_playback_frame,
+            "library": self._create_library_frame,
+            "webhooks": self._create_webhooks_frame,
+            "settings": self._create_settings_frame,
+        }
         
         # Init state
         self.select_frame("home")
@@ -74,6 +113,26 @@ class App(ctk.CTk):
         
         # Apply modern background
         self.configure(fg_color="#18181b") # Very dark grey/black
+        mark("build ui")
+        
+        if splash:
+            self.deiconify()
+            splash.close()
+        
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+        
+        # Offer to recover recordings interrupted by a crash
+        self.after(500, self._check_journal_recovery)
+
+    def on_close(self):
+        """Stops background workers and flushes pending webhooks before exiting."""
+        self.player.stop()
+        self.hotkey_manager.stop()
+        # Short budget: a slow endpoint must not hang the window on exit
+        self.webhook_manager.close(timeout=1.0)
+        if self.library_index: self.library_index.close()
+        self.settings.flush()
+        self.destroy()
 
     def _update_hotkeys(self):
         """Updates global hotkeys based on settings."""
@@ -106,10 +165,10 @@ class App(ctk.CTk):
         self.sidebar_frame = ctk.CTkFrame(self, width=240, corner_radius=0, fg_color="#202023")
         self.sidebar_frame.grid(row=0, column=0, sticky="nsew")
         
-        # Configure grid rows - row 5 expands to push bottom elements down
+        # Configure grid rows - row 6 expands to push bottom elements down
         for i in range(10):
             self.sidebar_frame.grid_rowconfigure(i, weight=0)
-        self.sidebar_frame.grid_rowconfigure(5, weight=1)  # Spacer row expands
+        self.sidebar_frame.grid_rowconfigure(6, weight=1)  # Spacer row expands
         
         # Logo / Title
         self.logo_label = ctk.CTkLabel(
@@ -123,28 +182,32 @@ class App(ctk.CTk):
         # Nav Buttons
         self.btn_nav_home = self._create_nav_btn("Home", "home", 1)
         self.btn_nav_playback = self._create_nav_btn("Playback", "playback", 2)
-        self.btn_nav_webhooks = self._create_nav_btn("Webhooks", "webhooks", 3)
-        self.btn_nav_settings = self._create_nav_btn("Settings", "settings", 4)
+        self.btn_nav_library = self._create_nav_btn("Library", "library", 3)
+        self.btn_nav_webhooks = self._create_nav_btn("Webhooks", "webhooks", 4)
+        self.btn_nav_settings = self._create_nav_btn("Settings", "settings", 5)
         
-        # Row 5 is empty spacer (weight=1 pushes everything below to bottom)
+        # Row 6 is empty spacer (weight=1 pushes everything below to bottom)
         
         # Metadata Panel
         self.meta_frame = ctk.CTkFrame(self.sidebar_frame, fg_color="transparent")
-        self.meta_frame.grid(row=6, column=0, padx=20, pady=(10, 5), sticky="sw")
+        self.meta_frame.grid(row=7, column=0, padx=20, pady=(10, 5), sticky="sw")
         
         self.lbl_meta_date = ctk.CTkLabel(self.meta_frame, text="", text_color="gray50", font=ctk.CTkFont(size=11))
         self.lbl_meta_date.pack(anchor="w")
         
         self.lbl_meta_res = ctk.CTkLabel(self.meta_frame, text="", text_color="gray50", font=ctk.CTkFont(size=11))
         self.lbl_meta_res.pack(anchor="w")
+        
+        self.lbl_meta_stats = ctk.CTkLabel(self.meta_frame, text="", text_color="gray50", font=ctk.CTkFont(size=11))
+        self.lbl_meta_stats.pack(anchor="w")
 
         # Version
         self.version_label = ctk.CTkLabel(self.sidebar_frame, text="v1.3", text_color="gray40", font=ctk.CTkFont(size=10))
-        self.version_label.grid(row=7, column=0, padx=20, pady=(5, 2), sticky="sw")
+        self.version_label.grid(row=8, column=0, padx=20, pady=(5, 2), sticky="sw")
 
         # Credits (at very bottom)
         self.credits_label = ctk.CTkLabel(self.sidebar_frame, text="Made with ❤ by Akmal", text_color="#E91E63", font=ctk.CTkFont(size=10))
-        self.credits_label.grid(row=8, column=0, padx=20, pady=(0, 15), sticky="sw")
+        self.credits_label.grid(row=9, column=0, padx=20, pady=(0, 15), sticky="sw")
 
     def _create_nav_btn(self, text, name, row):
         btn = ctk.CTkButton(
@@ -194,6 +257,10 @@ class App(ctk.CTk):
         self.btn_load = ctk.CTkButton(self.ribbon, text="Import", width=90, height=38, fg_color="#3f3f46", hover_color="#52525b",
                                       command=self.load_macro_file)
         self.btn_load.pack(side="right", padx=5, pady=20)
+        
+        self.btn_optimize = ctk.CTkButton(self.ribbon, text="Optimize", width=90, height=38, fg_color="#3f3f46", hover_color="#52525b",
+                                          command=self.optimize_current_macro)
+        self.btn_optimize.pack(side="right", padx=5, pady=20)
 
         # Flow Header (Custom Styled)
         self.flow_header_frame = ctk.CTkFrame(self.home_frame, fg_color="transparent", height=30)
@@ -203,7 +270,8 @@ class App(ctk.CTk):
         ctk.CTkLabel(self.flow_header_frame, text="ACTIONS", font=ctk.CTkFont(size=12, weight="bold"), text_color="gray60").pack(side="right", padx=10)
 
         # Workspace with modern styling (No label_text, using custom header above)
-        self.workspace_frame = ctk.CTkScrollableFrame(self.home_frame, label_text="", fg_color="#27272a")
+        # Virtualized: only the visible rows exist as widgets, however long the macro is
+        self.workspace_frame = VirtualList(self.home_frame, fg_color="#27272a")
         self.workspace_frame.grid(row=2, column=0, padx=30, pady=(0, 30), sticky="nsew")
         
         # Status Bar Panel
@@ -266,6 +334,147 @@ class App(ctk.CTk):
         if current_mode == "Count":
             self.lbl_loop_count.grid(row=2, column=0, sticky="w", pady=10)
             self.entry_loop_count.grid(row=2, column=1, sticky="w", padx=15, pady=10)
+        
+        # Timing row
+        ctk.CTkLabel(self.playback_grid, text="Timing:", text_color="gray60", font=ctk.CTkFont(size=13)).grid(row=3, column=0, sticky="w", pady=10)
+        self.opt_scheduler = ctk.CTkOptionMenu(self.playback_grid, values=["Precise", "Classic"], 
+                                               command=self.on_scheduler_change, fg_color="#3f3f46", 
+                                               button_color="#52525b", width=150, height=32)
+        self.opt_scheduler.set("Precise" if self.settings.get("playback_scheduler", "deadline") == "deadline" else "Classic")
+        self.opt_scheduler.grid(row=3, column=1, sticky="w", padx=15, pady=10)
+        
+        # Playlist Section
+        playlist_section = ctk.CTkFrame(playback_container, fg_color="#27272a", corner_radius=12)
+        playlist_section.pack(fill="x", padx=0, pady=10)
+        
+        hdr = ctk.CTkFrame(playlist_section, fg_color="transparent", height=30)
+        hdr.pack(fill="x", padx=20, pady=(15, 5))
+        ctk.CTkLabel(hdr, text="Playlist", font=ctk.CTkFont(size=16, weight="bold"), text_color="white").pack(side="left")
+        ctk.CTkLabel(hdr, text="QUEUE", font=ctk.CTkFont(size=11, weight="bold"), text_color="#71717a").pack(side="right")
+        ctk.CTkFrame(playlist_section, height=2, fg_color="#3f3f46").pack(fill="x", padx=20, pady=(0, 10))
+        
+        ctk.CTkLabel(playlist_section, text="Plays macros in order; the next one loads in the background while the current one runs.",
+                     text_color="#71717a", font=ctk.CTkFont(size=11)).pack(anchor="w", padx=20)
+        
+        self.playlist_view = VirtualList(playlist_section, row_height=24, height=130, fg_color="#18181b", corner_radius=8)
+        self.playlist_view.pack(fill="x", padx=20, pady=10)
+        
+        row = ctk.CTkFrame(playlist_section, fg_color="transparent")
+        row.pack(fill="x", padx=20, pady=(0, 15))
+        ctk.CTkLabel(row, text="Loops:", text_color="gray60", font=ctk.CTkFont(size=13)).pack(side="left")
+        self.entry_playlist_loops = ctk.CTkEntry(row, width=50, height=32, placeholder_text="1")
+        self.entry_playlist_loops.insert(0, "1")
+        self.entry_playlist_loops.pack(side="left", padx=(5, 10))
+        ctk.CTkButton(row, text="Add Macros...", width=110, height=32, fg_color="#3f3f46", hover_color="#52525b",
+                      command=self.add_playlist_items).pack(side="left", padx=(0, 5))
+        ctk.CTkButton(row, text="Remove Last", width=100, height=32, fg_color="#3f3f46", hover_color="#52525b",
+                      command=self.remove_playlist_item).pack(side="left", padx=5)
+        ctk.CTkButton(row, text="Clear", width=60, height=32, fg_color="#3f3f46", hover_color="#52525b",
+                      command=self.clear_playlist).pack(side="left", padx=5)
+        
+        self.sw_playlist_repeat = ctk.CTkSwitch(row, text="Repeat", command=self.toggle_playlist_repeat, progress_color="#10b981")
+        if self.settings.get("playlist_repeat", False): self.sw_playlist_repeat.select()
+        self.sw_playlist_repeat.pack(side="left", padx=10)
+        ctk.CTkButton(row, text="▶ Play Playlist", width=120, height=32, fg_color="#10b981", hover_color="#059669",
+                      command=self.start_playlist).pack(side="right")
+        
+        self._refresh_playlist_view()
+
+    def _create_library_frame(self):
+        self.library_frame = ctk.CTkFrame(self, corner_radius=0, fg_color="transparent")
+        self.library_frame.grid_columnconfigure(0, weight=1)
+        self.library_frame.grid_rowconfigure(2, weight=1)
+        
+        # Folder row
+        top = ctk.CTkFrame(self.library_frame, fg_color="#27272a", corner_radius=12)
+        top.grid(row=0, column=0, padx=30, pady=(30, 10), sticky="ew")
+        self.lbl_library_dir = ctk.CTkLabel(top, text=self.settings.get("library_dir", "") or "No folder selected",
+                                            text_color="gray60", font=ctk.CTkFont(size=13), anchor="w")
+        self.lbl_library_dir.pack(side="left", fill="x", expand=True, padx=20, pady=15)
+        ctk.CTkButton(top, text="Rescan", width=80, height=32, fg_color="#3f3f46", hover_color="#52525b",
+                      command=self.refresh_library).pack(side="right", padx=(5, 20))
+        ctk.CTkButton(top, text="Choose Folder...", width=120, height=32, fg_color="#3f3f46", hover_color="#52525b",
+                      command=self.choose_library_dir).pack(side="right", padx=5)
+        
+        # Filter row
+        filt = ctk.CTkFrame(self.library_frame, fg_color="transparent")
+        filt.grid(row=1, column=0, padx=30, pady=(0, 5), sticky="ew")
+        self.entry_library_search = ctk.CTkEntry(filt, width=260, height=32, placeholder_text="Search by name...")
+        self.entry_library_search.pack(side="left")
+        self.entry_library_search.bind("<KeyRelease>", lambda e: self._query_library())
+        self.opt_library_sort = ctk.CTkOptionMenu(filt, values=["Name", "Date", "Duration", "Events", "Size"],
+                                                  command=lambda c: self._query_library(), fg_color="#3f3f46",
+                                                  button_color="#52525b", width=120, height=32)
+        self.opt_library_sort.pack(side="left", padx=10)
+        self.sw_library_desc = ctk.CTkSwitch(filt, text="Descending", command=self._query_library, progress_color="#10b981")
+        self.sw_library_desc.pack(side="left", padx=5)
+        self.lbl_library_status = ctk.CTkLabel(filt, text="", text_color="#71717a", font=ctk.CTkFont(size=11))
+        self.lbl_library_status.pack(side="right")
+        
+        # Results (double-click loads)
+        self.library_view = VirtualList(self.library_frame, fg_color="#27272a", corner_radius=12, command=self._open_library_row)
+        self.library_view.grid(row=2, column=0, padx=30, pady=(5, 30), sticky="nsew")
+        
+        from utils.library import LibraryIndex
+        self.library_index = LibraryIndex(self.settings.get("library_db", "library.db"))
+        self.refresh_library()
+
+    def choose_library_dir(self):
+        d = filedialog.askdirectory()
+        if not d: return
+        self.settings["library_dir"] = d
+        save_settings(self.settings)
+        self.lbl_library_dir.configure(text=d)
+        self.refresh_library()
+
+    def refresh_library(self):
+        """Rescans the library folder on a worker; only changed files are re-read."""
+        directory = self.settings.get("library_dir", "")
+        if not directory or not os.path.isdir(directory):
+            self._query_library()
+            return
+        self.lbl_library_status.configure(text="Scanning...")
+        
+        def progress(done, total):
+            self.after(0, lambda: self.lbl_library_status.configure(text=f"Indexing {done}/{total}..."))
+        
+        def work():
+            try:
+                result = self.library_index.refresh(directory, progress=progress)
+                msg = f"{result['files']} macros ({result['indexed']} updated"
+                msg += f", {result['errors']} unreadable)" if result["errors"] else ")"
+            except Exception as e:
+                msg = f"Scan failed: {e}"
+            self.after(0, lambda: self._query_library(msg))
+        threading.Thread(target=work, daemon=True).start()
+
+    def _query_library(self, status=None):
+        sort = {"Name": "name", "Date": "created_at", "Duration": "duration", "Events": "events", "Size": "size"}
+        directory = self.settings.get("library_dir", "")
+        self.library_rows = self.library_index.query(
+            directory=directory or None,
+            search=self.entry_library_search.get().strip(),
+            sort=sort.get(self.opt_library_sort.get(), "name"),
+            descending=bool(self.sw_library_desc.get()),
+        ) if directory else []
+        if status:
+            self.lbl_library_status.configure(text=status)
+        self.library_view.set_source(len(self.library_rows), self._format_library_row)
+
+    def _format_library_row(self, i):
+        r = self.library_rows[i]
+        bg = "#27272a" if i % 2 == 0 else "#18181b"
+        if r["error"]:
+            return f"  {r['name']:<40} unreadable: {r['error'][:60]}", bg
+        mins, secs = divmod(int(r["duration"] or 0), 60)
+        res = f"{r['screen_width']}x{r['screen_height']}" if r["screen_width"] else "-"
+        return (f"  {r['name'][:40]:<40} {res:>10}  {mins:02}:{secs:02}  {r['events']:>8} ev  "
+                f"{r['clicks']:>5} clk  {r['key_presses']:>5} key  {r['created_at'] or '-'}"), bg
+
+    def _open_library_row(self, i):
+        path = self.library_rows[i]["path"]
+        self.select_frame("home")
+        self._do_load(path)
 
     def _create_settings_frame(self):
         self.settings_frame = ctk.CTkFrame(self, corner_radius=0, fg_color="transparent")
@@ -312,6 +521,47 @@ class App(ctk.CTk):
         if self.settings.get("show_overlay", True): self.sw_overlay.select()
         else: self.sw_overlay.deselect()
         self.sw_overlay.pack(anchor="w", pady=5)
+        
+        # Recording safety
+        self._add_setting_section(self.settings_container, "Crash Safety", "Recording")
+        self.sw_spill = ctk.CTkSwitch(self.curr_sec_frame, text="Stream Recordings to Disk", command=self.toggle_spill, progress_color="#7c3aed")
+        if self.settings.get("spill_to_disk", False): self.sw_spill.select()
+        else: self.sw_spill.deselect()
+        self.sw_spill.pack(anchor="w", pady=5)
+        ctk.CTkLabel(self.curr_sec_frame, text="Long captures survive crashes and use bounded memory.", text_color="gray60", font=ctk.CTkFont(size=12)).pack(anchor="w", padx=5)
+        
+        # Resolution handling on load
+        self._add_setting_section(self.settings_container, "Resolution Mismatch", "Loading")
+        remap_labels = {"warn": "Warn", "scale": "Scale", "letterbox": "Letterbox", "offset": "Center"}
+        self.opt_remap = ctk.CTkOptionMenu(self.curr_sec_frame, values=list(remap_labels.values()),
+                                           command=self.on_remap_change, fg_color="#3f3f46", button_color="#52525b", width=220)
+        self.opt_remap.set(remap_labels.get(self.settings.get("resolution_remap", "warn"), "Warn"))
+        self.opt_remap.pack(anchor="w", pady=(5, 10))
+        ctk.CTkLabel(self.curr_sec_frame, text="Scale, Letterbox and Center remap coordinates to this screen when a macro loads.", text_color="gray60", font=ctk.CTkFont(size=12)).pack(anchor="w", padx=5)
+        
+        # Mouse path synthesis
+        self._add_setting_section(self.settings_container, "Mouse Motion", "Playback")
+        motion_row = ctk.CTkFrame(self.curr_sec_frame, fg_color="transparent")
+        motion_row.pack(anchor="w", pady=(5, 10))
+        self.opt_interpolation = ctk.CTkOptionMenu(motion_row, values=list(self.INTERPOLATION_LABELS),
+                                                   command=self.on_motion_change, fg_color="#3f3f46", button_color="#52525b", width=160)
+        mode = self.settings.get("move_interpolation", "off")
+        self.opt_interpolation.set(next((k for k, v in self.INTERPOLATION_LABELS.items() if v == mode), "Off"))
+        self.opt_interpolation.pack(side="left", padx=(0, 10))
+        self.opt_move_rate = ctk.CTkOptionMenu(motion_row, values=["60 Hz", "125 Hz", "250 Hz", "500 Hz"],
+                                               command=self.on_motion_change, fg_color="#3f3f46", button_color="#52525b", width=110)
+        self.opt_move_rate.set(f"{self.settings.get('move_rate_hz', 125)} Hz")
+        self.opt_move_rate.pack(side="left")
+        ctk.CTkLabel(self.curr_sec_frame, text="Linear and Smooth treat stored moves as keyframes and fill in the path at this rate.", text_color="gray60", font=ctk.CTkFont(size=12)).pack(anchor="w", padx=5)
+        
+        # File size vs. save speed
+        self._add_setting_section(self.settings_container, "Compression", "Saving")
+        self.opt_compression = ctk.CTkOptionMenu(self.curr_sec_frame, values=list(self.COMPRESSION_LABELS),
+                                                 command=self.on_compression_change, fg_color="#3f3f46", button_color="#52525b", width=220)
+        level = self.settings.get("compression_level", 1)
+        self.opt_compression.set(next((k for k, v in self.COMPRESSION_LABELS.items() if v == level), "Fast"))
+        self.opt_compression.pack(anchor="w", pady=(5, 10))
+        ctk.CTkLabel(self.curr_sec_frame, text="Higher levels give smaller files but take longer to save.", text_color="gray60", font=ctk.CTkFont(size=12)).pack(anchor="w", padx=5)
 
     def _create_webhooks_frame(self):
         self.webhooks_frame = ctk.CTkFrame(self, corner_radius=0, fg_color="transparent")
@@ -371,13 +621,36 @@ class App(ctk.CTk):
         self.settings["show_overlay"] = bool(val)
         save_settings(self.settings)
 
+    def toggle_spill(self):
+        self.settings["spill_to_disk"] = bool(self.sw_spill.get())
+        save_settings(self.settings)
+
+    def on_remap_change(self, choice):
+        modes = {"Warn": "warn", "Scale": "scale", "Letterbox": "letterbox", "Center": "offset"}
+        self.settings["resolution_remap"] = modes.get(choice, "warn")
+        save_settings(self.settings)
+
+    COMPRESSION_LABELS = {"None": 0, "Fast": 1, "Balanced": 6, "Max": 9}
+    INTERPOLATION_LABELS = {"Off": "off", "Linear": "linear", "Smooth": "catmull_rom"}
+
+    def on_motion_change(self, _choice=None):
+        self.settings["move_interpolation"] = self.INTERPOLATION_LABELS.get(self.opt_interpolation.get(), "off")
+        self.settings["move_rate_hz"] = int(self.opt_move_rate.get().split()[0])
+        save_settings(self.settings)
+
+    def on_compression_change(self, choice):
+        self.settings["compression_level"] = self.COMPRESSION_LABELS.get(choice, 1)
+        save_settings(self.settings)
+
     def toggle_webhooks(self):
         enabled = bool(self.sw_webhook.get())
         url = self.entry_webhook_url.get().strip()
         self.settings["webhook_enabled"] = enabled
         self.settings["webhook_url"] = url
         save_settings(self.settings)
-        self.webhook_manager.update_settings(url, enabled)
+
+    def _on_webhook_setting(self, key, value, old):
+        self.webhook_manager.update_settings(self.settings.get("webhook_url", ""), self.settings.get("webhook_enabled", False))
 
     def send_test_webhook(self):
         self.webhook_manager.send_status("🧪 Test Notification", "Webhook integration is correctly configured!", "success")
@@ -415,6 +688,47 @@ class App(ctk.CTk):
         except ValueError:
             pass  # Invalid input, ignore
 
+    def add_playlist_items(self):
+        files = filedialog.askopenfilenames(filetypes=[("Polaris Macro", "*.polaris")])
+        if not files: return
+        try:
+            loops = max(1, min(9999, int(self.entry_playlist_loops.get())))
+        except ValueError:
+            loops = 1
+        self.settings.setdefault("playlist", []).extend({"path": f, "loops": loops} for f in files)
+        save_settings(self.settings)
+        self._refresh_playlist_view()
+
+    def remove_playlist_item(self):
+        if self.settings.get("playlist"):
+            self.settings["playlist"].pop()
+            save_settings(self.settings)
+            self._refresh_playlist_view()
+
+    def clear_playlist(self):
+        self.settings["playlist"] = []
+        save_settings(self.settings)
+        self._refresh_playlist_view()
+
+    def toggle_playlist_repeat(self):
+        self.settings["playlist_repeat"] = bool(self.sw_playlist_repeat.get())
+        save_settings(self.settings)
+
+    def _refresh_playlist_view(self, playing_index=None):
+        items = self.settings.get("playlist", [])
+        
+        def row(i):
+            item = items[i]
+            marker = "▶" if i == playing_index else f"{i + 1}."
+            bg = "#064e3b" if i == playing_index else ("#27272a" if i % 2 == 0 else "#18181b")
+            return f"  {marker} {os.path.basename(item['path'])}   ×{item.get('loops', 1)}", bg
+        self.playlist_view.set_source(len(items), row, keep_position=playing_index is not None)
+
+    def on_scheduler_change(self, choice):
+        # Precise = absolute deadlines on the recorded timeline, Classic = per-event sleeps
+        self.settings["playback_scheduler"] = "deadline" if choice == "Precise" else "relative"
+        save_settings(self.settings)
+
     def on_rec_preset_change(self, choice):
         if choice == "Custom":
             self.settings["rec_preset"] = "Custom"
@@ -458,8 +772,7 @@ class App(ctk.CTk):
             self.settings["play_preset"] = preset
             self.lbl_play_custom.configure(text=f"Active Bind: {key}")
             
-        save_settings(self.settings)
-        self._update_hotkeys()
+        save_settings(self.settings) # Hotkeys restart through the rec_key/play_key subscriptions
 
     def listen_for_key(self, type_):
         # Modal Overlay inside window
@@ -485,14 +798,14 @@ class App(ctk.CTk):
         # Check current key to ensure we don't capture the mouse click that opened this
         time.sleep(0.2)
         
+        from pynput import keyboard
+        from backend.keys import binding_name
+        
         def on_press(key):
-            try: k = key.char
-            except: k = key.name
-            if k is None: k = str(key)
+            k = binding_name(key)
             self.after(0, lambda: self._finish_listen(type_, k))
             return False 
             
-        from pynput import keyboard
         self.key_listener = keyboard.Listener(on_press=on_press)
         self.key_listener.start()
 
@@ -510,7 +823,7 @@ class App(ctk.CTk):
     
     # ... End keybind logic ...
 
-    def show_loading(self, msg):
+    def show_loading(self, msg, progress=None):
         # Windowless Overlay style
         self.loading_overlay = ctk.CTkFrame(self, fg_color="#18181b")
         self.loading_overlay.place(relx=0, rely=0, relwidth=1, relheight=1)
@@ -519,40 +832,86 @@ class App(ctk.CTk):
         container.place(relx=0.5, rely=0.5, anchor="center")
         
         ctk.CTkLabel(container, text="⏳", font=ctk.CTkFont(size=40)).pack(padx=50, pady=(40, 10))
-        ctk.CTkLabel(container, text=msg, font=ctk.CTkFont(size=16, weight="bold")).pack(padx=50, pady=(10, 40))
-        self.update()
+        ctk.CTkLabel(container, text=msg, font=ctk.CTkFont(size=16, weight="bold")).pack(padx=50, pady=(10, 40 if progress is None else 10))
+        if progress is None:
+            self.update()
+            return
+        
+        # Background operation: live progress plus a way out
+        self.loading_bar = ctk.CTkProgressBar(container, width=260, progress_color="#7c3aed")
+        self.loading_bar.set(0)
+        self.loading_bar.pack(padx=50, pady=5)
+        self.loading_detail = ctk.CTkLabel(container, text="", text_color="gray60", font=ctk.CTkFont(size=12))
+        self.loading_detail.pack(padx=50, pady=5)
+        ctk.CTkButton(container, text="Cancel", width=120, fg_color="#3f3f46", hover_color="#52525b",
+                      command=progress.cancel).pack(padx=50, pady=(10, 40))
+        self._poll_loading(self.loading_overlay, progress)
+
+    def _poll_loading(self, overlay, progress):
+        # The worker only writes plain attributes; the UI reads them on its own schedule
+        if getattr(self, 'loading_overlay', None) is not overlay:
+            return
+        self.loading_bar.set(progress.fraction)
+        self.loading_detail.configure(text="Cancelling..." if progress.cancelled else progress.describe())
+        self.after(100, lambda: self._poll_loading(overlay, progress))
 
     def hide_loading(self):
         if hasattr(self, 'loading_overlay') and self.loading_overlay:
             self.loading_overlay.destroy()
             del self.loading_overlay
 
+    def _run_io(self, msg, work, done):
+        """
+        Runs work(progress) on a worker thread behind a cancellable loading overlay.
+
+        done(result, error) is called on the UI thread afterwards; error is None,
+        an OperationCancelled, or whatever work raised.
+        """
+        progress = IOProgress()
+        self.show_loading(msg, progress)
+        
+        def run():
+            result = error = None
+            try:
+                result = work(progress)
+            except Exception as e:
+                error = e
+            self.after(0, lambda: finish(result, error))
+        
+        def finish(result, error):
+            self.hide_loading()
+            done(result, error)
+        threading.Thread(target=run, daemon=True).start()
+
+    def _get_frame(self, name):
+        """Returns a page frame, building it on first use."""
+        if name not in self.frames:
+            self.frame_builders[name]()
+            self.frames[name] = getattr(self, f"{name}_frame")
+        return self.frames[name]
+
     def select_frame(self, name):
         # Reset all nav button states
         self.btn_nav_home.configure(fg_color="transparent")
         self.btn_nav_playback.configure(fg_color="transparent")
+        self.btn_nav_library.configure(fg_color="transparent")
         self.btn_nav_webhooks.configure(fg_color="transparent")
         self.btn_nav_settings.configure(fg_color="transparent")
         
-        # Hide all frames
-        self.home_frame.grid_forget()
-        self.playback_frame.grid_forget()
-        self.webhooks_frame.grid_forget()
-        self.settings_frame.grid_forget()
+        # Hide all frames (pages never opened have not been built yet)
+        for frame in self.frames.values():
+            frame.grid_forget()
         
         # Show selected frame
-        if name == "home":
-            self.home_frame.grid(row=0, column=1, sticky="nsew")
-            self.btn_nav_home.configure(fg_color="#3f3f46")
-        elif name == "playback":
-            self.playback_frame.grid(row=0, column=1, sticky="nsew")
-            self.btn_nav_playback.configure(fg_color="#3f3f46")
-        elif name == "webhooks":
-            self.webhooks_frame.grid(row=0, column=1, sticky="nsew")
-            self.btn_nav_webhooks.configure(fg_color="#3f3f46")
-        elif name == "settings":
-            self.settings_frame.grid(row=0, column=1, sticky="nsew")
-            self.btn_nav_settings.configure(fg_color="#3f3f46")
+        self._get_frame(name).grid(row=0, column=1, sticky="nsew")
+        nav = {
+            "home": self.btn_nav_home,
+            "playback": self.btn_nav_playback,
+            "library": self.btn_nav_library,
+            "webhooks": self.btn_nav_webhooks,
+            "settings": self.btn_nav_settings,
+        }
+        nav[name].configure(fg_color="#3f3f46")
 
     def start_recording(self):
         # Stop playback if running and wait for it to finish
@@ -575,25 +934,57 @@ class App(ctk.CTk):
             if rec_key == "Custom": rec_key = self.settings.get("rec_key", "?")
             self.rec_overlay.show(stop_key=rec_key)
         
-        self.recorder.start()
+        # A new capture replaces the unsaved one, like the in-memory flow does
+        self._discard_journal()
+        if self.settings.get("spill_to_disk", False):
+            stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+            self.current_journal = os.path.join(self.settings.get("journal_dir", "journals"), f"recording-{stamp}{JOURNAL_EXT}")
+            self.recorder.start(
+                journal_path=self.current_journal,
+                metadata=self._screen_metadata(),
+                memory_cap=self.settings.get("record_memory_cap", 100000),
+                sampling=self.settings.get("move_sampling")
+            )
+        else:
+            self.recorder.start(sampling=self.settings.get("move_sampling"))
         self.webhook_manager.on_recording_started()
 
     def stop_recording(self):
         # if not self.recorder.recording and not self.recorder.mouse_listener: return # REMOVED: Cause of state desync
-        events = self.recorder.stop()
-        events = self._trim_hotkeys(events) # Clean up triggers
-        self.webhook_manager.on_recording_finished(len(events))
-        self.current_macro_data["flow"] = events
-        self.current_macro_data["metadata"] = {
-            "screen_width": self.winfo_screenwidth(),
-            "screen_height": self.winfo_screenheight(),
-            "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        }
+        events = self.recorder.stop(rebuild=False)
         self.rec_overlay.hide() # Always hide just in case
         self.btn_record.configure(state="normal")
         self.btn_play.configure(state="normal")
         self.btn_stop.configure(state="disabled", fg_color="#52525b")
-        self.status_label.configure(text=f"Recording finished. Captured {len(events)} actions.")
+        if not self.recorder.needs_rebuild:
+            self._finish_recording(events)
+            return
+        
+        # A spilled capture is read back from its journal off the Tk thread
+        def done(result, error):
+            if error:
+                # The journal is complete on disk; leave it for recovery on the next start
+                self.current_journal = None
+                self.current_macro_data["flow"] = []
+                self.refresh_workspace()
+                if isinstance(error, OperationCancelled):
+                    self.status_label.configure(text="Recording kept in its journal (rebuild cancelled).")
+                else:
+                    messagebox.showerror("Error", f"{error}")
+                return
+            self._finish_recording(result)
+        
+        self._run_io("Rebuilding Recording...", self.recorder.rebuild_spilled, done)
+
+    def _finish_recording(self, events):
+        events = self._trim_hotkeys(events) # Clean up triggers
+        self.webhook_manager.on_recording_finished(len(events))
+        self.current_macro_data["flow"] = events
+        self.current_macro_data["metadata"] = self._screen_metadata()
+        sampling = self.recorder.sampling_stats()
+        self.current_macro_data["metadata"]["sampling"] = sampling
+        rate = f" Mouse sampled at {sampling['kept_hz']:.0f}Hz." if sampling["moves_kept"] else ""
+        self.status_label.configure(text=f"Recording finished. Captured {len(events)} actions.{rate}")
         self.refresh_workspace()
         self._update_metadata_ui()
 
@@ -601,35 +992,33 @@ class App(ctk.CTk):
         """Removes the start/stop hotkey events from both ends of the recording."""
         if not events: return []
         
-        # Get components of the hotkey (e.g. "f8" or "ctrl+alt" -> {'f8'} or {'ctrl', 'alt'})
-        rec_key = self.settings.get("rec_key", "f8").lower()
-        parts = set([p.strip() for p in rec_key.split("+")])
-        
-        def normalize_key(k):
-            """Normalize key string for comparison"""
-            k = str(k).lower()
-            # Handle 'Key.ctrl_l', 'Key.alt_r', 'Key.f8' formats
-            if k.startswith("key."): k = k[4:]
-            # Handle ctrl_l -> ctrl, alt_r -> alt
-            for suffix in ['_l', '_r']:
-                if k.endswith(suffix):
-                    k = k[:-2]
-            return k
+        from backend.keys import hotkey_codes, code_of, base_code
+        
+        # Key codes of the hotkey (e.g. "f8" or "ctrl+alt"); sides and case fold to one code
+        parts = hotkey_codes(self.settings.get("rec_key", "f8"))
         
         def is_hotkey_part(event):
-            k = normalize_key(event.get("key", ""))
-            return k in parts
+            return base_code(code_of(event.get("key"))) in parts
+        
+        # Index based so spilled (columnar) recordings can be trimmed by slicing
+        start, end = 0, len(events)
         
         # Trim from HEAD: releases of the start hotkey (user lifting fingers after pressing to start)
-        while events and events[0].get("action") == "key_release" and is_hotkey_part(events[0]):
-            events.pop(0)
+        while start < end and events[start].get("action") == "key_release" and is_hotkey_part(events[start]):
+            start += 1
         
         # Trim from TAIL: any key events (press or release) that are part of stop hotkey
         # This catches: key_press of stop combo, and any lingering releases
-        while events and is_hotkey_part(events[-1]):
-            events.pop()
-        
-        return events
+        while start < end and is_hotkey_part(events[end - 1]):
+            end -= 1
+        
+        if start == 0 and end == len(events):
+            return events
+        if start and isinstance(events, list):
+            # Keep the gap before the first kept event, as slicing a columnar flow does
+            base = events[start - 1]["t_ns"]
+            return [dict(e, t_ns=e["t_ns"] - base) for e in events[start:end]]
+        return events[start:end]
 
     def stop_playback(self):
         """Forces playback to stop."""
@@ -650,15 +1039,22 @@ class App(ctk.CTk):
                 self.player.stop()
                 time.sleep(0.2) 
             
-            # Reset tracking
-            self._last_loop_count = 0
-            self.player.playing = True
-
             # Get loop settings
             loop_mode = self.settings.get("loop_mode", "once")
             loop_count = self.settings.get("loop_count", 3) if loop_mode == "count" else 1
             if loop_mode == "infinite":
                 loop_count = -1
+            
+            # Offer to pick up an interrupted run of this macro where it stopped
+            # The plan itself is compiled on the playback thread
+            motion = self._motion()
+            fingerprint = macro_fingerprint(self.current_macro_data.get("metadata", {}),
+                                            self.current_macro_data["flow"], motion)
+            resume = self._ask_resume(fingerprint, loop_mode, loop_count)
+            
+            # Reset tracking
+            self._last_loop_count = 0
+            self.player.playing = True
                 
             self.status_label.configure(text="Playing...")
             self.btn_record.configure(state="disabled")
@@ -668,12 +1064,109 @@ class App(ctk.CTk):
                 self.play_overlay.show(len(self.current_macro_data["flow"]), loop_mode, loop_count)
             
             self.webhook_manager.on_playback_started("Custom Macro", loop_mode, loop_count)
+            self._subscribe_progress()
             
-            self.playback_thread = threading.Thread(target=self._run_playback_thread, args=(loop_mode, loop_count), daemon=True)
+            self.playback_thread = threading.Thread(target=self._run_playback_thread,
+                                                    args=(loop_mode, loop_count, fingerprint, resume, motion), daemon=True)
             self.playback_thread.start()
 
-    def _run_playback_thread(self, loop_mode="once", total_loops=1):
-        current_loop = 0
+    def _motion(self):
+        """Mouse path synthesis spec from settings, or None to replay stored moves as-is."""
+        return motion_spec(self.settings.get("move_interpolation", "off"), self.settings.get("move_rate_hz", 125))
+
+    def _ask_resume(self, fingerprint, loop_mode, loop_count):
+        """Returns the checkpoint to resume from, or None to start over."""
+        path = self.settings.get("checkpoint_file", CHECKPOINT_FILE)
+        state = find_resume_point(fingerprint, path)
+        if not state:
+            return None
+        loop = state.get("loop", 1)
+        if loop_mode == "once" and loop > 1 or loop_mode == "count" and loop > loop_count:
+            return None # That run had already finished all the loops asked for now
+        mins, secs = divmod(int(state.get("position", 0)), 60)
+        where = f"{mins:02}:{secs:02} (event {state['index']}/{state['total']})"
+        if loop_mode != "once":
+            where += f", loop {loop}"
+        if messagebox.askyesno("Polaris - Resume", f"The last playback of this macro stopped at {where}.\n\nResume from there?"):
+            return state
+        clear_checkpoint(path)
+        return None
+
+    def start_playlist(self):
+        from backend.playlist import PlaylistItem
+        items = [PlaylistItem.from_dict(d) for d in self.settings.get("playlist", [])]
+        with self.playback_lock:
+            if not items:
+                messagebox.showwarning("Polaris", "The playlist is empty!")
+                return
+            if self.recorder.recording: return
+            if self.player.playing:
+                self.player.stop()
+                time.sleep(0.2)
+            
+            self._last_loop_count = 0
+            self.player.playing = True
+            
+            self.status_label.configure(text="Playing playlist...")
+            self.btn_record.configure(state="disabled")
+            self.btn_play.configure(state="disabled")
+            
+            if self.settings.get("show_overlay", True):
+                self.play_overlay.show(0, "playlist", len(items))
+            
+            self.webhook_manager.on_playback_started(f"Playlist ({len(items)} macros)", "playlist", len(items))
+            self._subscribe_progress()
+            
+            self.playback_thread = threading.Thread(target=self._run_playlist_thread,
+                                                    args=(items, self._remapping_loader()), daemon=True)
+            self.playback_thread.start()
+
+    def _remapping_loader(self):
+        """
+        A load_macro that also applies the resolution_remap setting, like _do_load.
+        Built on the Tk thread (it reads the screen size); safe to call from any thread.
+        """
+        curr_w = self.winfo_screenwidth()
+        curr_h = self.winfo_screenheight()
+        remap_mode = self.settings.get("resolution_remap", "warn")
+        
+        def loader(path):
+            data = load_macro(path)
+            if remap_mode in REMAP_MODES:
+                data = remap_macro(data, curr_w, curr_h, remap_mode) or data
+            return data
+        return loader
+
+    def _run_playlist_thread(self, items, loader):
+        from backend.playlist import PlaylistRunner
+        runner = PlaylistRunner(self.player, items,
+                                scheduler=self.settings.get("playback_scheduler", "deadline"),
+                                repeat=self.settings.get("playlist_repeat", False),
+                                loader=loader, motion=self._motion())
+        
+        def on_item_start(index, item):
+            self._last_loop_count = runner.items_played + 1
+            self.after(0, lambda: self.status_label.configure(text=f"Playlist: {item.name} ({index + 1}/{len(items)})"))
+            if hasattr(self, "playlist_view"):
+                self.after(0, lambda: self._refresh_playlist_view(index))
+            if self.settings.get("show_overlay", True):
+                self.after(0, lambda: self.play_overlay.update_loop(index + 1))
+        runner.on_item_start = on_item_start
+        
+        try:
+            runner.run()
+            self._last_loop_count = runner.items_played
+        finally:
+            self.player.playing = False
+            self.after(0, self._on_playback_finished)
+            if hasattr(self, "playlist_view"):
+                self.after(0, self._refresh_playlist_view)
+
+    def _run_playback_thread(self, loop_mode="once", total_loops=1, fingerprint=None, resume=None, motion=None):
+        current_loop = resume["loop"] - 1 if resume else 0
+        start_index = resume["index"] or None if resume else None
+        checkpoint = self._start_checkpoints(fingerprint)
+        completed = False
         try:
             while self.player.playing:
                 current_loop += 1
@@ -683,22 +1176,89 @@ class App(ctk.CTk):
                 if self.settings.get("show_overlay", True):
                     self.after(0, lambda l=current_loop: self.play_overlay.update_loop(l))
                 
-                self.player.play(self.current_macro_data)
+                self.player.play(self.current_macro_data, scheduler=self.settings.get("playback_scheduler", "deadline"),
+                                 start_index=start_index, motion=motion)
+                start_index = None
                 
                 # Check exit conditions
                 if not self.player.playing:
                     break
                 if loop_mode == "once":
+                    completed = True
                     break
                 elif loop_mode == "count" and current_loop >= total_loops:
+                    completed = True
                     break
                 # Infinite continues automatically
+                if checkpoint: checkpoint(current_loop + 1)
         finally:
             self.player.playing = False
+            if checkpoint: checkpoint(None, completed)
             self.after(0, self._on_playback_finished)
-        
+
+    def _start_checkpoints(self, fingerprint):
+        """
+        Saves the playback position every few seconds while a run is active.
+
+        Returns mark(next_loop, completed=False) for the playback thread: call it
+        between loops to checkpoint the start of the next one, and with
+        next_loop=None when the run is over (which stops the saving and deletes
+        the checkpoint if every loop completed). Returns None if disabled.
+        """
+        interval = self.settings.get("checkpoint_interval_sec", 2)
+        if not interval or not fingerprint:
+            return None
+        path = self.settings.get("checkpoint_file", CHECKPOINT_FILE)
+        lock = threading.Lock()
+        done_run = [0] # Snapshots from runs at or before this one are stale
+        
+        def on_progress(p):
+            # Notifier thread; only mid-run snapshots, the thread marks loop boundaries itself
+            with lock:
+                if not p["active"] or p["run"] <= done_run[0] or not p["index"]:
+                    return
+                save_checkpoint({"fingerprint": fingerprint, "index": p["index"], "total": p["total"],
+                                 "position": p["position"], "loop": self._last_loop_count}, path)
+        token = self.player.subscribe_progress(on_progress, interval)
+        
+        def mark(next_loop, completed=False):
+            with lock:
+                done_run[0] = self.player.progress.run
+                if next_loop is not None:
+                    save_checkpoint({"fingerprint": fingerprint, "index": 0, "total": self.player.progress.total,
+                                     "position": 0.0, "loop": next_loop}, path)
+                    return
+                p = self.player.get_progress()
+                if not completed and 0 < p["index"] < p["total"]:
+                    # Stopped or failed mid-run: keep the exact position, not the last periodic one
+                    save_checkpoint({"fingerprint": fingerprint, "index": p["index"], "total": p["total"],
+                                     "position": p["position"], "loop": self._last_loop_count}, path)
+            self.player.unsubscribe_progress(token)
+            if completed:
+                clear_checkpoint(path)
+        return mark
+        
+    def _subscribe_progress(self):
+        """Feeds Player progress to the overlay and webhook heartbeat while playing."""
+        self._unsubscribe_progress()
+        if self.settings.get("show_overlay", True):
+            # Notifier thread -> Tk thread; the overlay skips unchanged redraws
+            self._progress_subs.append(self.player.subscribe_progress(
+                lambda p: self.after(0, self.play_overlay.set_progress, p), interval=0.25))
+        
+        heartbeat = self.settings.get("webhook_heartbeat_sec", 0)
+        if heartbeat and self.webhook_manager.enabled:
+            self._progress_subs.append(self.player.subscribe_progress(
+                lambda p: self.webhook_manager.on_playback_progress(p, self._last_loop_count), interval=heartbeat))
+
+    def _unsubscribe_progress(self):
+        for token in self._progress_subs:
+            self.player.unsubscribe_progress(token)
+        self._progress_subs = []
+
     def _on_playback_finished(self):
         # Removed safety check that could hang the UI if state was inconsistent
+        self._unsubscribe_progress()
         self.status_label.configure(text="Playback finished.")
         self.play_overlay.hide()
         self.btn_record.configure(state="normal")
@@ -712,54 +1272,149 @@ class App(ctk.CTk):
         if not self.current_macro_data["flow"]: return
         f = filedialog.asksaveasfilename(defaultextension=".polaris", filetypes=[("Polaris Macro", "*.polaris")])
         if f:
-            self.show_loading("Exporting Macro...")
-            self.after(100, lambda: self._do_save(f))
+            self._do_save(f)
             
     def _do_save(self, f):
-        self.current_macro_data["metadata"] = {
-            "screen_width": self.winfo_screenwidth(),
-            "screen_height": self.winfo_screenheight(),
-            "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        }
-        save_macro(f, self.current_macro_data)
-        self.status_label.configure(text=f"Saved to {os.path.basename(f)}")
-        self.hide_loading()
-        self._update_metadata_ui()
+        # Encoding and writing happen off the UI thread on a shallow copy; the
+        # live macro only picks up the new metadata once the file is in place
+        # Refresh the screen fields but keep the rest (sampling report, remap/optimizer notes)
+        metadata = dict(self.current_macro_data.get("metadata", {}), **self._screen_metadata())
+        data = dict(self.current_macro_data, metadata=metadata)
+        fmt = self.settings.get("save_format", "binary")
+        level = self.settings.get("compression_level", 1)
+        
+        def done(_result, error):
+            if isinstance(error, OperationCancelled):
+                self.status_label.configure(text="Save cancelled.")
+                return
+            if error:
+                messagebox.showerror("Error", f"{error}")
+                return
+            self.current_macro_data["metadata"] = metadata
+            self._discard_journal() # The recording is safely on disk now
+            self.status_label.configure(text=f"Saved to {os.path.basename(f)}")
+            self._update_metadata_ui()
+        
+        self._run_io("Exporting Macro...", lambda progress: save_macro(f, data, fmt=fmt, level=level, progress=progress), done)
+
+    def optimize_current_macro(self):
+        """Shrinks the current macro with the optimizer passes configured in settings."""
+        if not self.current_macro_data["flow"] or self.player.playing or self.recorder.recording: return
+        from backend.optimizer import optimize_macro, format_reports
+        data = self.current_macro_data
+        before = len(data["flow"])
+        options = self.settings.get("optimizer", {})
+        
+        def done(result, error):
+            if isinstance(error, OperationCancelled):
+                self.status_label.configure(text="Optimization cancelled.")
+                return
+            if error:
+                messagebox.showerror("Error", f"{error}")
+                return
+            optimized, reports = result
+            self.current_macro_data = optimized
+            self.refresh_workspace()
+            self._update_metadata_ui()
+            removed = optimized["metadata"]["optimized"]["removed"]
+            self.status_label.configure(text=f"Optimized: {before} -> {before - removed} events.")
+            messagebox.showinfo("Polaris - Optimize", format_reports(reports, before))
+        
+        self._run_io("Optimizing Macro...", lambda progress: optimize_macro(data, options, progress), done)
 
     def load_macro_file(self):
         f = filedialog.askopenfilename(filetypes=[("Polaris Macro", "*.polaris")])
         if f:
-            self.show_loading("Importing Macro...")
-            self.after(100, lambda: self._do_load(f))
+            self._do_load(f)
             
     def _do_load(self, f):
-        try:
-            data = load_macro(f)
-            # Check for resolution mismatch
+        # Tk is only touched here and in done(); the worker gets plain values
+        curr_w = self.winfo_screenwidth()
+        curr_h = self.winfo_screenheight()
+        remap_mode = self.settings.get("resolution_remap", "warn")
+        
+        def work(progress):
+            data = load_macro(f, progress)
             md = data.get("metadata", {})
+            remapped = None
+            if remap_mode in REMAP_MODES and md.get("screen_width") and md.get("screen_height"):
+                # Rewrite the coordinates once, up front; playback then uses them as-is
+                progress.step(phase="Remapping")
+                remapped = remap_macro(data, curr_w, curr_h, remap_mode)
+                if remapped: data = remapped
+            progress.step(phase="Grouping")
+            get_flow_model(data) # Cached on the macro, so refresh_workspace() is cheap
+            return data, md, remapped
+        
+        def done(result, error):
+            if isinstance(error, OperationCancelled):
+                self.status_label.configure(text="Load cancelled.")
+                return
+            if error:
+                messagebox.showerror("Error", f"{error}")
+                return
+            data, md, remapped = result
+            # Check for resolution mismatch
             mac_w = md.get("screen_width")
             mac_h = md.get("screen_height")
-            
-            if mac_w and mac_h:
-                curr_w = self.winfo_screenwidth()
-                curr_h = self.winfo_screenheight()
-                if mac_w != curr_w or mac_h != curr_h:
-                    warn_msg = (
-                        f"Resolution Mismatch!\n\n"
-                        f"This macro was recorded at {mac_w}x{mac_h}, but your current screen is {curr_w}x{curr_h}.\n"
-                        f"Playback might be inaccurate or fail. Continue?"
-                    )
-                    if not messagebox.askyesno("Polaris - Warning", warn_msg):
-                        self.hide_loading()
-                        return
+            if mac_w and mac_h and not remapped and remap_mode not in REMAP_MODES and (mac_w != curr_w or mac_h != curr_h):
+                warn_msg = (
+                    f"Resolution Mismatch!\n\n"
+                    f"This macro was recorded at {mac_w}x{mac_h}, but your current screen is {curr_w}x{curr_h}.\n"
+                    f"Playback might be inaccurate or fail. Continue?"
+                )
+                if not messagebox.askyesno("Polaris - Warning", warn_msg):
+                    return
             
             self.current_macro_data = data
+            self.current_journal = None # Left on disk so the unsaved recording stays recoverable
             self.refresh_workspace()
             self._update_metadata_ui()
-            self.status_label.configure(text=f"Loaded {os.path.basename(f)}")
-        except Exception as e:
-            messagebox.showerror("Error", f"{e}")
-        self.hide_loading()
+            msg = f"Loaded {os.path.basename(f)}"
+            if remapped:
+                msg += f" (remapped {mac_w}x{mac_h} -> {curr_w}x{curr_h}, {remap_mode})"
+            self.status_label.configure(text=msg)
+        
+        self._run_io("Importing Macro...", work, done)
+
+    def _screen_metadata(self):
+        return {
+            "screen_width": self.winfo_screenwidth(),
+            "screen_height": self.winfo_screenheight(),
+            "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        }
+
+    def _discard_journal(self):
+        if self.current_journal and os.path.exists(self.current_journal):
+            try: os.remove(self.current_journal)
+            except OSError as e: print(f"Failed to remove journal: {e}")
+        self.current_journal = None
+
+    def _check_journal_recovery(self):
+        """Offers to turn journals left behind by a crashed session into .polaris files."""
+        for path in find_journals(self.settings.get("journal_dir", "journals")):
+            if path == self.current_journal:
+                continue
+            stamp = datetime.fromtimestamp(os.path.getmtime(path)).strftime("%Y-%m-%d %H:%M:%S")
+            choice = messagebox.askyesnocancel(
+                "Polaris - Recover Recording",
+                f"An unsaved recording from {stamp} was found.\n\n"
+                f"Yes: recover it to a .polaris file\nNo: discard it\nCancel: decide later"
+            )
+            if choice is None:
+                continue
+            if choice:
+                out = filedialog.asksaveasfilename(defaultextension=".polaris", filetypes=[("Polaris Macro", "*.polaris")])
+                if not out:
+                    continue
+                try:
+                    count = recover_journal(path, out, fmt=self.settings.get("save_format", "binary"))
+                    self.status_label.configure(text=f"Recovered {count} actions to {os.path.basename(out)}")
+                except Exception as e:
+                    messagebox.showerror("Error", f"Recovery failed: {e}")
+                    continue
+            try: os.remove(path)
+            except OSError as e: print(f"Failed to remove journal: {e}")
 
     def _update_metadata_ui(self):
         md = self.current_macro_data.get("metadata", {})
@@ -767,117 +1422,73 @@ class App(ctk.CTk):
         res = f"{md.get('screen_width', '-')}x{md.get('screen_height', '-')}"
         self.lbl_meta_res.configure(text=f"Res: {res}")
 
-    def refresh_workspace(self):
-        # Clear
-        for widget in self.workspace_frame.winfo_children(): widget.destroy()
-        
-        grouped_events = []
-        current_move_batch = []
-        buttons_down = set()
-        
-        def flush_batch():
-            nonlocal current_move_batch
-            if not current_move_batch: return
-            start_pos = current_move_batch[0]["coords"]
-            end_pos = current_move_batch[-1]["coords"]
-            count = len(current_move_batch)
-            is_drag = current_move_batch[0].get("_is_drag", False)
-            btn = current_move_batch[0].get("_drag_btn", "")
-            
-            icon = "🖐️" if is_drag else "〰️"
-            label = "Drag Path" if is_drag else "Mouse Movement"
-            details = f"[{btn}]" if is_drag and btn else ""
-            
-            grouped_events.append({
-                "action": "mouse_path_group",
-                "display_text": f"{icon}  {label} {details}  ({count} pts)",
-                "count": count, "is_drag": is_drag
-            })
-            current_move_batch = []
-
-        for event in self.current_macro_data["flow"]:
-            action = event.get("action")
-            if action == "mouse_click":
-                flush_batch()
-                btn = event.get("button")
-                pressed = event.get("pressed")
-                if pressed: buttons_down.add(btn)
-                else: buttons_down.discard(btn)
-                grouped_events.append(event)
-            elif action == "mouse_move":
-                is_dragging = len(buttons_down) > 0
-                drag_btn = list(buttons_down)[0] if is_dragging else ""
-                event["_is_drag"] = is_dragging
-                event["_drag_btn"] = drag_btn
-                current_move_batch.append(event)
-            else:
-                flush_batch()
-                grouped_events.append(event)
-        flush_batch()
+    def _update_stats_ui(self, model):
+        stats = model.stats()
+        if not stats["events"]:
+            self.lbl_meta_stats.configure(text="")
+            return
+        mins, secs = divmod(int(stats["duration"]), 60)
+        self.lbl_meta_stats.configure(text=f"Events: {stats['events']} ({mins:02}:{secs:02})")
 
-        MAX_ITEMS = 500
-        count_display = len(grouped_events)
+    def refresh_workspace(self):
+        # Grouping lives in a shared model cached on the macro, not in the event dicts
+        model = get_flow_model(self.current_macro_data)
+        flow = self.current_macro_data["flow"]
         
+        # Rows are formatted on demand as they scroll into view
+        self.workspace_frame.set_source(len(model), lambda i: self._format_workspace_row(i, model, flow))
+        self._update_stats_ui(model)
+
+    def _format_workspace_row(self, i, model, flow):
+        """Returns (text, bg_color) for one workspace row."""
         # Color palette
         C_DRAG = "#7c3aed" # Violet 600
         # Alternating row colors for readability
         ROW_A = "#27272a" # Zinc 800
         ROW_B = "#18181b" # Zinc 950
         
-        for i, item in enumerate(grouped_events):
-            if i >= MAX_ITEMS:
-                ctk.CTkLabel(self.workspace_frame, text=f"... and {count_display - MAX_ITEMS} more.", 
-                             fg_color="#f59e0b", text_color="black", corner_radius=6).pack(fill="x", padx=5, pady=2)
-                break
+        bg_col = ROW_A if i % 2 == 0 else ROW_B
+        text = ""
+        fg_col = bg_col # Default
+        
+        kind, start, count, drag_btn = model.group(i)
+        if kind == GROUP_PATH:
+            is_drag = bool(drag_btn)
+            icon = "🖐️" if is_drag else "〰️"
+            label = "Drag Path" if is_drag else "Mouse Movement"
+            details = f"[{drag_btn}]" if is_drag else ""
+            text = f"  {i+1:<4} {icon}  {label} {details}  ({count} pts)"
+            if is_drag: fg_col = C_DRAG
+            return text, fg_col
+        
+        item = flow[start]
+        at = item.get("action", "?")
+        if at == "mouse_click":
+            btn = str(item.get("button")).replace("Button.", "").upper()
+            state = "DOWN" if item.get("pressed") else "UP  "
+            icon = "🖱️ "
+            # Align text with spaces/f-string padding
+            text = f"  {i+1:<4} {icon}  CLICK  {btn:<6} {state}  @ {item.get('coords')}"
+            if item.get("pressed"): fg_col = "#7f1d1d" # Red 900 for down
+        
+        elif at == "key_press": 
+            k = item.get("key")
+            icon = "⌨️ "
+            text = f"  {i+1:<4} {icon}  PRESS  '{k}'"
             
-            bg_col = ROW_A if i % 2 == 0 else ROW_B
-            text = ""
-            at = item.get("action", "?")
-            fg_col = bg_col # Default
+        elif at == "key_release":
+            k = item.get("key")
+            icon = "⌨️ "
+            text = f"  {i+1:<4} {icon}  RELEASE  '{k}'"
             
-            if at == "mouse_path_group":
-                text = f"  {i+1:<4} {item['display_text']}"
-                is_drag = item.get("is_drag", False)
-                if is_drag: fg_col = C_DRAG
-                
-            elif at == "mouse_click":
-                btn = str(item.get("button")).replace("Button.", "").upper()
-                state = "DOWN" if item.get("pressed") else "UP  "
-                icon = "🖱️ "
-                # Align text with spaces/f-string padding
-                text = f"  {i+1:<4} {icon}  CLICK  {btn:<6} {state}  @ {item.get('coords')}"
-                if item.get("pressed"): fg_col = "#7f1d1d" # Red 900 for down
+        elif at == "mouse_scroll":
+            icon = "↕️ "
+            text = f"  {i+1:<4} {icon}  SCROLL  {item.get('dx')}, {item.get('dy')}"
             
-            elif at == "key_press": 
-                k = item.get("key")
-                icon = "⌨️ "
-                text = f"  {i+1:<4} {icon}  PRESS  '{k}'"
-                
-            elif at == "key_release":
-                k = item.get("key")
-                icon = "⌨️ "
-                text = f"  {i+1:<4} {icon}  RELEASE  '{k}'"
-                
-            elif at == "mouse_scroll":
-                icon = "↕️ "
-                text = f"  {i+1:<4} {icon}  SCROLL  {item.get('dx')}, {item.get('dy')}"
-                
-            else:
-                text = f"  {i+1:<4} {at}"
-
-            # Render Row (Optimized for scrolling performance)
-            lbl = ctk.CTkLabel(
-                self.workspace_frame, 
-                text=text, 
-                anchor="w", 
-                fg_color=fg_col, 
-                corner_radius=0, # Removed for buttery smooth scrolling
-                font=ctk.CTkFont(family="Consolas", size=12)
-            )
-            lbl.pack(fill="x", padx=2, pady=0.5, ipady=4)
-        
-        # Stabilize layout for the scrollable frame
-        self.workspace_frame.update_idletasks()
+        else:
+            text = f"  {i+1:<4} {at}"
+
+        return text, fg_col
 
 if __name__ == "__main__":
     app = App()
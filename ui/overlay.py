@@ -2,6 +2,9 @@ import customtkinter as ctk
 import time
 
 class BaseOverlay:
+    # Re-assert -topmost this often (ms) instead of on every tick
+    TOPMOST_INTERVAL_MS = 5000
+
     def __init__(self, root, title="Overlay", accent_color="#3f3f46"):
         self.root = root
         self.window = None
@@ -11,22 +14,26 @@ class BaseOverlay:
         self.title_text = title
         self.lbl_timer = None
         self.lbl_status = None
+        self.lbl_footer = None
+        self._after_id = None
+        self._last_topmost = 0.0
+        self._shown_text = {} # label -> text currently displayed
 
-    def show(self):
-        self.hide() # Clean up any existing window and references
-            
+    def _build(self):
+        """Creates the window and widgets once; show/hide only toggle visibility."""
         self.window = ctk.CTkToplevel(self.root)
+        self.window.withdraw()
         self.window.attributes('-topmost', True)
         self.window.overrideredirect(True)
         self.window.attributes('-alpha', 0.95)
-        
+
         # Geometry - Widened for hotkey text
         sw = self.window.winfo_screenwidth()
-        w, h = 320, 90
+        w, h = 320, self.height()
         x = (sw // 2) - (w // 2)
         y = 40
         self.window.geometry(f"{w}x{h}+{x}+{y}")
-        
+
         # Transparent Key Trick for Borders
         # We set the window bg to a specific color and make that color transparent
         # allowing the rounded frame to stand out cleanly.
@@ -36,50 +43,98 @@ class BaseOverlay:
         except: pass # Linux/Mac fallback might fail this, but win32 supports it
 
         # Main Container with Border
-        # Note: border_color in ctk frame is the border. 
+        # Note: border_color in ctk frame is the border.
         self.frame = ctk.CTkFrame(self.window, fg_color="#18181b", border_width=2, border_color=self.accent_color, corner_radius=16)
         self.frame.pack(expand=True, fill="both", padx=0, pady=0) # No padding needed if transparent key works
-        
+
         # Content
         # Title Line
         self.lbl_status = ctk.CTkLabel(self.frame, text=self.title_text, font=ctk.CTkFont(size=13, weight="bold"), text_color=self.accent_color)
         self.lbl_status.pack(pady=(12, 0))
-        
+
         # Timer / Main Info
         self.lbl_timer = ctk.CTkLabel(self.frame, text="00:00", font=ctk.CTkFont(family="Consolas", size=24, weight="bold"), text_color="white")
         self.lbl_timer.pack(pady=(0, 0))
-        
+
+        self.build_extra()
+
         # Footer
         self.lbl_footer = ctk.CTkLabel(self.frame, text="...", font=ctk.CTkFont(size=12), text_color="gray60")
         self.lbl_footer.pack(pady=(0, 10))
+        self._shown_text = {}
+
+    def height(self):
+        return 90
+
+    def build_extra(self):
+        """Hook for subclasses to add widgets between the timer and the footer."""
+        pass
+
+    def _window_alive(self):
+        if not self.window: return False
+        try: return bool(self.window.winfo_exists())
+        except: return False
+
+    def show(self):
+        if not self._window_alive():
+            self._build()
+        self._cancel_tick()
 
         self.running = True
         self.start_time = time.time()
+        self.set_text(self.lbl_timer, "00:00")
+        self.window.deiconify()
+        self._assert_topmost(force=True)
         self._update()
 
     def hide(self):
         self.running = False
-        if self.window:
-            try: self.window.destroy()
+        self._cancel_tick()
+        if self._window_alive():
+            try: self.window.withdraw()
             except: pass
-            self.window = None
-        # Clear references to widgets that were inside the destroyed window
-        self.lbl_timer = None
-        self.lbl_status = None
-        self.lbl_footer = None
+
+    def set_text(self, label, text):
+        """Reconfigures a label only when its displayed text actually changes."""
+        if label is None or self._shown_text.get(label) == text:
+            return
+        label.configure(text=text)
+        self._shown_text[label] = text
+
+    def _cancel_tick(self):
+        if self._after_id and self.window:
+            try: self.window.after_cancel(self._after_id)
+            except: pass
+        self._after_id = None
+
+    def _assert_topmost(self, force=False):
+        now = time.monotonic()
+        if force or (now - self._last_topmost) * 1000 >= self.TOPMOST_INTERVAL_MS:
+            self.window.attributes('-topmost', True)
+            self._last_topmost = now
 
     def _update(self):
-        if not self.running or not self.window: return
-        try:
-            if not self.window.winfo_exists(): return
-        except: return
-            
+        self._after_id = None
+        if not self.running or not self._window_alive(): return
+
         self.on_update()
-        self.window.after(100, self._update)
-        
+        self._assert_topmost()
+        self._after_id = self.window.after(self.next_tick_ms(), self._update)
+
+    def next_tick_ms(self):
+        """Delay until the displayed timer next changes (the next whole second)."""
+        elapsed_ms = int((time.time() - self.start_time) * 1000)
+        return 1000 - (elapsed_ms % 1000) + 5
+
     def on_update(self):
         pass
 
+    def _update_timer(self):
+        elapsed = time.time() - self.start_time
+        mins = int(elapsed // 60)
+        secs = int(elapsed % 60)
+        self.set_text(self.lbl_timer, f"{mins:02}:{secs:02}")
+
 class RecordingOverlay(BaseOverlay):
     def __init__(self, root):
         super().__init__(root, "🔴 RECORDING", "#e11d48") # Rose-600
@@ -89,16 +144,10 @@ class RecordingOverlay(BaseOverlay):
         self.stop_key_text = stop_key
         super().show()
         # Initial update of text
-        self.lbl_footer.configure(text=f"Press {self.stop_key_text} to Stop")
-        
+        self.set_text(self.lbl_footer, f"Press {self.stop_key_text} to Stop")
+
     def on_update(self):
-        elapsed = time.time() - self.start_time
-        mins = int(elapsed // 60)
-        secs = int(elapsed % 60)
-        if self.lbl_timer:
-            self.lbl_timer.configure(text=f"{mins:02}:{secs:02}")
-        # Keep on top
-        self.window.attributes('-topmost', True)
+        self._update_timer()
 
 class PlaybackOverlay(BaseOverlay):
     def __init__(self, root):
@@ -108,22 +157,36 @@ class PlaybackOverlay(BaseOverlay):
         self.total_loops = 1
         self.current_loop = 1
         self.lbl_loop = None
-    
+        self.progress_bar = None
+        self._bar_value = -1.0
+        self._progress_text = ""
+
+    def height(self):
+        return 104
+
+    def build_extra(self):
+        # Loop status label between timer and footer
+        self.lbl_loop = ctk.CTkLabel(self.frame, text="", font=ctk.CTkFont(size=12, weight="bold"), text_color="#a3e635")
+        self.lbl_loop.pack(pady=(0, 0))
+
+        # Progress through the current run
+        self.progress_bar = ctk.CTkProgressBar(self.frame, width=240, height=6, progress_color=self.accent_color)
+        self.progress_bar.pack(pady=(2, 4))
+        self.progress_bar.set(0)
+        self._bar_value = 0.0
+
     def show(self, total_actions=0, loop_mode="once", total_loops=1):
         self.action_count = total_actions
         self.loop_mode = loop_mode
         self.total_loops = total_loops
         self.current_loop = 1
+        self._progress_text = ""
         super().show()
-        
-        # Add loop status label between timer and footer
-        if self.lbl_loop is None:
-            self.lbl_loop = ctk.CTkLabel(self.frame, text="", font=ctk.CTkFont(size=12, weight="bold"), text_color="#a3e635")
-            self.lbl_loop.pack(pady=(0, 0))
-        
+        self._set_bar(0.0)
+
         self._update_loop_display()
-        self.lbl_footer.configure(text="Press Play Key to Stop")
-    
+        self.set_text(self.lbl_footer, "Press Play Key to Stop")
+
     def _update_loop_display(self):
         if self.loop_mode == "once":
             text = "Single Run"
@@ -131,25 +194,42 @@ class PlaybackOverlay(BaseOverlay):
             text = f"Loop {self.current_loop}/{self.total_loops}"
         elif self.loop_mode == "infinite":
             text = f"Loop {self.current_loop} (∞)"
+        elif self.loop_mode == "playlist":
+            text = f"Macro {self.current_loop}/{self.total_loops}"
         else:
             text = ""
-        
-        if self.lbl_loop:
-            self.lbl_loop.configure(text=text)
-    
+        if self._progress_text:
+            text = f"{text}  •  {self._progress_text}" if text else self._progress_text
+
+        self.set_text(self.lbl_loop, text)
+
     def update_loop(self, current_loop):
         """Update the current loop number (called from main thread)."""
         self.current_loop = current_loop
         self._update_loop_display()
 
-    def hide(self):
-        super().hide()
-        self.lbl_loop = None
+    def set_progress(self, snapshot):
+        """Shows a Player progress snapshot (called from main thread)."""
+        if not self.running or not self._window_alive():
+            return
+        self._set_bar(snapshot["fraction"])
+
+        eta = snapshot.get("eta")
+        if eta is None:
+            text = f"{snapshot['index']} actions"
+        else:
+            mins, secs = divmod(int(eta + 0.5), 60)
+            text = f"{int(snapshot['fraction'] * 100)}%  •  ETA {mins:02}:{secs:02}"
+        if snapshot.get("lateness_ms", 0) >= 50:
+            text += f"  •  {snapshot['lateness_ms']:.0f}ms late"
+        self._progress_text = text
+        self._update_loop_display()
+
+    def _set_bar(self, value):
+        # Skip redraws for changes smaller than a pixel or so
+        if self.progress_bar is not None and abs(value - self._bar_value) >= 0.004:
+            self.progress_bar.set(value)
+            self._bar_value = value
 
     def on_update(self):
-        elapsed = time.time() - self.start_time
-        mins = int(elapsed // 60)
-        secs = int(elapsed % 60)
-        if self.lbl_timer:
-            self.lbl_timer.configure(text=f"{mins:02}:{secs:02}")
-        self.window.attributes('-topmost', True)
+        self._update_timer()
@@ -5,9 +5,13 @@ import os
 class SplashScreen:
     """Modern windowless splash screen for app startup."""
     
-    def __init__(self):
-        self.root = ctk.CTk()
-        self.root.withdraw()  # Hide root window
+    def __init__(self, master=None):
+        # With a master (the withdrawn app window) the splash stays up while the app
+        # builds itself; without one it owns a hidden root of its own.
+        self.owns_root = master is None
+        self.root = ctk.CTk() if self.owns_root else master
+        if self.owns_root:
+            self.root.withdraw()  # Hide root window
         
         self.splash = ctk.CTkToplevel(self.root)
         self.splash.overrideredirect(True)
@@ -42,11 +46,16 @@ class SplashScreen:
         self.loading_label = ctk.CTkLabel(self.frame, text="Loading...", font=ctk.CTkFont(size=11), text_color="#52525b")
         self.loading_label.pack(pady=(30, 0))
         
-        # Fade in
-        self._fade_in()
+        # Fade in (shown at once when embedded: the app build blocks the event loop)
+        self.closing = False
+        if self.owns_root:
+            self._fade_in()
+        else:
+            self.splash.attributes('-alpha', 0.95)
+        self.splash.update()
     
     def _fade_in(self, alpha=0.0):
-        if alpha < 0.95:
+        if alpha < 0.95 and not self.closing:
             alpha += 0.05
             self.splash.attributes('-alpha', alpha)
             self.splash.after(20, lambda: self._fade_in(alpha))
@@ -58,6 +67,7 @@ class SplashScreen:
     
     def close(self):
         """Fade out and close splash."""
+        self.closing = True
         self._fade_out(0.95)
     
     def _fade_out(self, alpha):
@@ -67,7 +77,8 @@ class SplashScreen:
             self.splash.after(20, lambda: self._fade_out(alpha))
         else:
             self.splash.destroy()
-            self.root.destroy()
+            if self.owns_root:
+                self.root.destroy()
     
     def mainloop(self, duration_ms=1500):
         """Run splash for specified duration then close."""
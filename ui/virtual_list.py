@@ -0,0 +1,117 @@
+import customtkinter as ctk
+from typing import Callable, List, Optional, Tuple
+
+class VirtualList(ctk.CTkFrame):
+    """
+    Scrollable list that only renders the visible rows.
+
+    A small pool of row labels (one per visible line) is rebound to data as the
+    view scrolls, so the widget count stays constant no matter how many rows the
+    source has. Rows are produced on demand by row_fn(index) -> (text, bg_color).
+    """
+
+    def __init__(self, master, row_height: int = 26, font=None, command: Optional[Callable[[int], None]] = None, **kwargs):
+        super().__init__(master, **kwargs)
+        self.row_height = row_height
+        self.command = command # Called with the row index when a row is double-clicked
+        self.font = font or ctk.CTkFont(family="Consolas", size=12)
+        self.count = 0
+        self.first = 0
+        self.row_fn: Optional[Callable[[int], Tuple[str, str]]] = None
+        self.pool: List[ctk.CTkLabel] = []
+        self._shown: List[Optional[Tuple[str, str]]] = [] # What each pooled label displays now
+        self._bg = kwargs.get("fg_color", "#27272a")
+
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(0, weight=1)
+
+        self.body = ctk.CTkFrame(self, fg_color="transparent", corner_radius=0)
+        self.body.grid(row=0, column=0, sticky="nsew", padx=(4, 0), pady=4)
+        self.scrollbar = ctk.CTkScrollbar(self, command=self._on_scrollbar)
+        self.scrollbar.grid(row=0, column=1, sticky="ns", pady=4)
+
+        self.body.bind("<Configure>", self._on_resize)
+        self._bind_wheel(self.body)
+
+    # --- Public API ---
+
+    def set_source(self, count: int, row_fn: Callable[[int], Tuple[str, str]], keep_position: bool = False):
+        """Points the list at a new data source and re-renders the visible rows."""
+        self.count = count
+        self.row_fn = row_fn
+        if not keep_position:
+            self.first = 0
+        self._shown = [None] * len(self.pool) # Force a rebind
+        self._scroll_to(self.first)
+
+    def refresh(self):
+        """Re-renders the visible rows (e.g. after the underlying data changed)."""
+        self._shown = [None] * len(self.pool)
+        self._render()
+
+    def scroll_to(self, index: int):
+        self._scroll_to(index)
+
+    # --- Internals ---
+
+    def _visible_rows(self) -> int:
+        return max(1, self.body.winfo_height() // self.row_height)
+
+    def _bind_wheel(self, widget):
+        widget.bind("<MouseWheel>", self._on_wheel)
+        widget.bind("<Button-4>", lambda e: self._scroll_to(self.first - 3))
+        widget.bind("<Button-5>", lambda e: self._scroll_to(self.first + 3))
+
+    def _on_resize(self, event=None):
+        needed = self._visible_rows() + 1
+        while len(self.pool) < needed:
+            lbl = ctk.CTkLabel(self.body, text="", anchor="w", corner_radius=0, font=self.font,
+                               height=self.row_height, fg_color=self._bg)
+            lbl.place(x=0, y=len(self.pool) * self.row_height, relwidth=1)
+            lbl.bind("<Double-Button-1>", lambda e, j=len(self.pool): self._on_activate(j))
+            self._bind_wheel(lbl)
+            self.pool.append(lbl)
+            self._shown.append(None)
+        self._scroll_to(self.first)
+
+    def _on_activate(self, j: int):
+        i = self.first + j
+        if self.command and i < self.count:
+            self.command(i)
+
+    def _on_wheel(self, event):
+        # Windows reports multiples of 120, macOS small deltas
+        step = -event.delta // 120 if abs(event.delta) >= 120 else -event.delta
+        self._scroll_to(self.first + step * 3)
+
+    def _on_scrollbar(self, *args):
+        if not args:
+            return
+        visible = self._visible_rows()
+        if args[0] == "moveto":
+            self._scroll_to(int(float(args[1]) * self.count))
+        elif args[0] == "scroll":
+            amount = int(args[1])
+            if len(args) > 2 and args[2] == "pages":
+                amount *= visible
+            self._scroll_to(self.first + amount)
+
+    def _scroll_to(self, index: int):
+        visible = self._visible_rows()
+        self.first = max(0, min(index, self.count - visible))
+        self._render()
+
+    def _render(self):
+        for j, lbl in enumerate(self.pool):
+            i = self.first + j
+            row = self.row_fn(i) if self.row_fn and i < self.count else ("", self._bg)
+            # Only touch widgets whose content actually changed
+            if self._shown[j] != row:
+                lbl.configure(text=row[0], fg_color=row[1])
+                self._shown[j] = row
+
+        if self.count:
+            visible = self._visible_rows()
+            self.scrollbar.set(self.first / self.count, min(1.0, (self.first + visible) / self.count))
+        else:
+            self.scrollbar.set(0, 1)
@@ -0,0 +1,75 @@
+import json
+import os
+import time
+from typing import Any, Dict, Optional
+
+CHECKPOINT_FILE = "checkpoint.json"
+
+
+def macro_fingerprint(metadata: Dict[str, Any], flow, motion=None) -> Dict[str, Any]:
+    """
+    Identifies a macro well enough to tell whether a checkpoint belongs to it.
+
+    Cheap enough for the UI thread: only the flow's length and last timestamp
+    are read, nothing is compiled.
+
+    Args:
+        metadata: The macro's metadata.
+        flow: Its event list or ColumnarFlow.
+        motion: The motion spec it is played with; checkpoint indexes count
+                plan events, which differ once paths are synthesized.
+    """
+    return {
+        "events": len(flow),
+        "end_ns": flow[-1]["t_ns"] if len(flow) else 0,
+        "created_at": metadata.get("created_at"),
+        "motion": list(motion) if motion else None,
+    }
+
+
+def save_checkpoint(state: Dict[str, Any], path: str = CHECKPOINT_FILE) -> None:
+    """
+    Records how far a playback run got.
+
+    Written to a temp file and renamed into place, so a crash mid-write leaves
+    the previous checkpoint readable.
+    """
+    state = dict(state, saved_at=time.time())
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump(state, f)
+    os.replace(tmp, path)
+
+
+def load_checkpoint(path: str = CHECKPOINT_FILE) -> Optional[Dict[str, Any]]:
+    """The last saved checkpoint, or None if there is none (or it is unreadable)."""
+    try:
+        with open(path, 'r') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return state if isinstance(state, dict) else None
+
+
+def clear_checkpoint(path: str = CHECKPOINT_FILE) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        print(f"Failed to remove checkpoint: {e}")
+
+
+def find_resume_point(fingerprint: Dict[str, Any], path: str = CHECKPOINT_FILE) -> Optional[Dict[str, Any]]:
+    """
+    The saved checkpoint if it was taken on the macro with this fingerprint and
+    stopped partway. Returns None when there is nothing to resume.
+    """
+    state = load_checkpoint(path)
+    if not state or state.get("fingerprint") != fingerprint:
+        return None
+    index = state.get("index", 0)
+    # Index 0 is only worth resuming at the start of a later loop
+    if not 0 <= index < state.get("total", 0) or (index == 0 and state.get("loop", 1) <= 1):
+        return None
+    return state
@@ -0,0 +1,337 @@
+import bisect
+import collections
+import json
+import mmap
+import os
+import struct
+import zlib
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils.macro_format import (
+    ColumnarFlow, HEADER, U32, MAGIC, FLAG_ZLIB, FLAG_NS, ACTION_NAMES, _SWAP,
+    _encode_args, _iter_rows, _make_event, _read_block, _scaled, _varints, time_scale,
+)
+
+# Chunked .polaris container (v3), written by default for binary saves
+#
+#   header    <4sHHII  magic, version 3, flags, event count, metadata length
+#   metadata  UTF-8 JSON
+#   tables    u32 length + UTF-8 JSON, for the interned key and button strings
+#   chunks    one blob per CHUNK_EVENTS events, zlib-compressed if FLAG_ZLIB:
+#               actions  u8 per event
+#               times    int64 absolute nanoseconds per event (microseconds
+#                        without FLAG_NS, scaled on load like v2)
+#               u32 coords length, coords (deltas restart at 0 per chunk)
+#               refs     (rest of the blob)
+#   index     one INDEX_ENTRY per chunk
+#   trailer   <QI4s  index offset, chunk count, INDEX_MAGIC
+#
+# Every chunk decodes on its own, so chunks can be (de)compressed in parallel
+# and a reader can jump to any timestamp by bisecting the index and inflating
+# a single chunk. The index also carries per-chunk action counts, so summaries
+# never decompress anything.
+VERSION = 3
+CHUNK_EVENTS = 16384
+INDEX_MAGIC = b"PLRX"
+# offset, length, first event, event count, first/last timestamp (file units), counts per action
+INDEX_ENTRY = struct.Struct("<QIIIqq" + "I" * len(ACTION_NAMES))
+TRAILER = struct.Struct("<QI4s")
+
+# Below this many chunks, (de)compressing in-process beats spinning up a pool
+POOL_THRESHOLD = 8
+
+
+class ChunkInfo:
+    """One footer index entry."""
+
+    __slots__ = ("offset", "length", "first", "count", "first_ns", "last_ns", "by_action")
+
+    def __init__(self, offset, length, first, count, first_ns, last_ns, *by_action):
+        self.offset = offset
+        self.length = length
+        self.first = first
+        self.count = count
+        self.first_ns = first_ns
+        self.last_ns = last_ns
+        self.by_action = by_action
+
+
+# --- Chunk codecs (module-level so they run in worker processes) ---
+
+def _encode_chunk(args) -> bytes:
+    actions, times, xs, ys, rs, auxs, level = args
+    coords, refs = _encode_args(actions, xs, ys, rs, auxs)
+    times = array('q', times)
+    if _SWAP:
+        times.byteswap()
+    blob = b"".join((actions.tobytes(), times.tobytes(), U32.pack(len(coords)), coords, refs))
+    return zlib.compress(blob, level) if level else blob
+
+
+def _decode_chunk(args) -> Tuple[bytes, ...]:
+    """Returns the six column arrays of one chunk as raw bytes (cheap to send between processes)."""
+    blob, count, compressed, scale = args
+    if compressed:
+        try:
+            blob = zlib.decompress(blob)
+        except zlib.error as e:
+            raise ValueError(f"Corrupt .polaris chunk: {e}")
+    t0 = count
+    c0 = t0 + 8 * count
+    if len(blob) < c0 + U32.size:
+        raise ValueError("Corrupt .polaris chunk: too short")
+    actions = array('B', blob[:t0])
+    times = array('q', blob[t0:c0])
+    if _SWAP:
+        times.byteswap()
+    times = _scaled(times, scale)
+    (coords_len,) = U32.unpack_from(blob, c0)
+    c1 = c0 + U32.size + coords_len
+    coords = _varints(blob[c0 + U32.size:c1])
+    refs = _varints(blob[c1:])
+
+    xs, ys, rs, auxs = array('i'), array('i'), array('i'), array('i')
+    for _code, x, y, r, a in _iter_rows(actions, coords, refs):
+        xs.append(x)
+        ys.append(y)
+        rs.append(r)
+        auxs.append(a)
+    return actions.tobytes(), times.tobytes(), xs.tobytes(), ys.tobytes(), rs.tobytes(), auxs.tobytes()
+
+
+def _chunk_map(fn, jobs, count: int, workers: Optional[int]):
+    """
+    Runs fn over `count` jobs in order, on a process pool when there are enough of them.
+
+    jobs may be a generator: it is consumed only a few chunks ahead of the
+    results (Executor.map would submit, and so build, every job up front).
+    """
+    workers = workers or os.cpu_count() or 1
+    if count >= POOL_THRESHOLD and workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = collections.deque()
+            for job in jobs:
+                pending.append(pool.submit(fn, job))
+                if len(pending) >= 2 * workers:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+    else:
+        yield from map(fn, jobs)
+
+
+# --- Writing ---
+
+def write_flow(f, flow: ColumnarFlow, metadata: Dict[str, Any], level: int = 1,
+               chunk_events: int = CHUNK_EVENTS, workers: Optional[int] = None, progress=None) -> None:
+    """
+    Writes a ColumnarFlow as a chunked v3 container to a binary file object.
+
+    Chunks are written as soon as they are compressed, so the encoded file is
+    never held in memory as a whole.
+
+    Args:
+        f: Writable binary file.
+        flow: The columns to write.
+        metadata: JSON-serializable macro metadata.
+        level: zlib level (1-9) per chunk; 0 stores chunks raw.
+        chunk_events: Events per chunk (the seek granularity).
+        workers: Process pool size (default: CPU count; 1 disables the pool).
+        progress: Optional IOProgress, stepped after every chunk.
+    """
+    n = len(flow)
+    meta = json.dumps(metadata).encode("utf-8")
+    f.write(HEADER.pack(MAGIC, VERSION, FLAG_NS | (FLAG_ZLIB if level else 0), n, len(meta)))
+    f.write(meta)
+    for table in (flow.keys, flow.buttons):
+        block = json.dumps(table).encode("utf-8")
+        f.write(U32.pack(len(block)))
+        f.write(block)
+
+    bounds = [(s, min(s + chunk_events, n)) for s in range(0, n, chunk_events)]
+    # Sliced lazily, so only the chunks in flight are copied
+    jobs = ((flow.actions[s:e], flow.times_ns[s:e], flow.x[s:e], flow.y[s:e], flow.ref[s:e], flow.aux[s:e], level)
+            for s, e in bounds)
+    if progress:
+        progress.events_total = n
+        progress.step(events=0, phase="Compressing" if level else "Encoding")
+
+    index = []
+    offset = f.tell()
+    for (s, e), blob in zip(bounds, _chunk_map(_encode_chunk, jobs, len(bounds), workers)):
+        f.write(blob)
+        actions = flow.actions[s:e]
+        index.append(INDEX_ENTRY.pack(offset, len(blob), s, e - s, flow.times_ns[s], flow.times_ns[e - 1],
+                                      *(actions.count(code) for code in range(len(ACTION_NAMES)))))
+        offset += len(blob)
+        if progress: progress.step(events=e)
+
+    f.write(b"".join(index))
+    f.write(TRAILER.pack(offset, len(index), INDEX_MAGIC))
+
+
+# --- Reading ---
+
+class ChunkedReader:
+    """
+    Random access to a v3 file through its footer index.
+
+    The file is memory-mapped; only the chunks that are asked for are inflated.
+    Use as a context manager, or call close().
+    """
+
+    def __init__(self, filepath: str):
+        self._file = open(filepath, 'rb')
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._parse()
+        except Exception:
+            self.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if getattr(self, "_mm", None) is not None:
+            self._mm.close()
+            self._mm = None
+        self._file.close()
+
+    def _parse(self):
+        mm = self._mm
+        if len(mm) < HEADER.size + TRAILER.size:
+            raise ValueError("Truncated .polaris file")
+        magic, version, flags, n, meta_len = HEADER.unpack_from(mm, 0)
+        if magic != MAGIC:
+            raise ValueError("Not a binary .polaris file")
+        if version != VERSION:
+            raise ValueError(f"Not a chunked .polaris file (version {version})")
+        self.count = n
+        self.compressed = bool(flags & FLAG_ZLIB)
+        self.time_scale = time_scale(flags)
+
+        pos = HEADER.size
+        self.metadata = json.loads(bytes(mm[pos:pos + meta_len]).decode("utf-8"))
+        pos += meta_len
+        start, pos = _read_block(mm, pos)
+        self.keys = json.loads(bytes(mm[start:pos]).decode("utf-8"))
+        start, pos = _read_block(mm, pos)
+        self.buttons = json.loads(bytes(mm[start:pos]).decode("utf-8"))
+
+        index_at, chunks, index_magic = TRAILER.unpack_from(mm, len(mm) - TRAILER.size)
+        if index_magic != INDEX_MAGIC or index_at + chunks * INDEX_ENTRY.size != len(mm) - TRAILER.size:
+            raise ValueError("Corrupt .polaris file: bad chunk index")
+        self.chunks: List[ChunkInfo] = [ChunkInfo(*INDEX_ENTRY.unpack_from(mm, index_at + i * INDEX_ENTRY.size))
+                                        for i in range(chunks)]
+        for c in self.chunks:
+            c.first_ns *= self.time_scale
+            c.last_ns *= self.time_scale
+        if sum(c.count for c in self.chunks) != n:
+            raise ValueError("Corrupt .polaris file: chunk counts do not match the header")
+        # Sorted first timestamps / indexes for bisecting
+        self._first_ns = [c.first_ns for c in self.chunks]
+        self._first_index = [c.first for c in self.chunks]
+
+    @property
+    def duration(self) -> float:
+        return self.chunks[-1].last_ns / 1e9 if self.chunks else 0.0
+
+    def by_action(self) -> Dict[str, int]:
+        totals = [sum(c.by_action[code] for c in self.chunks) for code in range(len(ACTION_NAMES))]
+        return {name: n for name, n in zip(ACTION_NAMES, totals) if n}
+
+    def _job(self, i: int):
+        c = self.chunks[i]
+        return self._mm[c.offset:c.offset + c.length], c.count, self.compressed, self.time_scale
+
+    def read_chunk(self, i: int) -> Tuple[bytes, ...]:
+        """Decoded column bytes of chunk i (see _decode_chunk)."""
+        return _decode_chunk(self._job(i))
+
+    def chunk_at_time(self, seconds: float) -> int:
+        """Index of the chunk containing the first event at or after the given offset."""
+        t = round(seconds * 1e9)
+        i = min(bisect.bisect_left(self._first_ns, t), len(self.chunks) - 1)
+        # Equal timestamps can straddle a boundary: the earliest chunk reaching t wins
+        while i > 0 and self.chunks[i - 1].last_ns >= t:
+            i -= 1
+        return max(i, 0)
+
+    def chunk_at_index(self, index: int) -> int:
+        return max(0, bisect.bisect_right(self._first_index, index) - 1)
+
+    def seek_time(self, seconds: float) -> int:
+        """Event index of the first event at or after the given time offset (count if past the end)."""
+        if not self.chunks:
+            return 0
+        i = self.chunk_at_time(seconds)
+        times = array('q', self.read_chunk(i)[1])
+        return self.chunks[i].first + bisect.bisect_left(times, round(seconds * 1e9))
+
+    def read_flow(self, workers: Optional[int] = None, progress=None) -> ColumnarFlow:
+        """Decodes every chunk (in parallel for large files) into one ColumnarFlow."""
+        flow = ColumnarFlow()
+        flow.keys, flow.buttons = self.keys, self.buttons
+        if progress:
+            progress.events_total = self.count
+            progress.step(events=0, phase="Decoding")
+        jobs = (self._job(i) for i in range(len(self.chunks)))
+        columns = (flow.actions, flow.times_ns, flow.x, flow.y, flow.ref, flow.aux)
+        for chunk in _chunk_map(_decode_chunk, jobs, len(self.chunks), workers):
+            for column, data in zip(columns, chunk):
+                column.frombytes(data)
+            if progress: progress.step(events=len(flow.actions))
+        return flow
+
+    def iter_events(self, start: float = 0.0, start_index: Optional[int] = None):
+        """
+        Yields event dicts from a time offset (or event index), one chunk resident at a time.
+
+        Times are re-based on the seek point (an index seek uses the previous
+        event's time), so handing the iterator to the player resumes with the
+        right spacing.
+        """
+        if start_index is None:
+            start_index = self.seek_time(start) if start else 0
+            base = round(start * 1e9)
+        else:
+            base = None
+        keys, buttons = self.keys, self.buttons
+        for ci in range(self.chunk_at_index(start_index), len(self.chunks)):
+            actions, times, xs, ys, rs, auxs = (array(code, data) for code, data in zip("Bqiiii", self.read_chunk(ci)))
+            skip = max(0, start_index - self.chunks[ci].first)
+            if base is None:
+                # Index seek: time runs from the previous event
+                base = times[skip - 1] if skip else (self.chunks[ci - 1].last_ns if ci else 0)
+            for j in range(skip, len(actions)):
+                yield _make_event(actions[j], times[j] - base, xs[j], ys[j], rs[j], auxs[j], keys, buttons)
+
+
+def read_file(filepath: str, workers: Optional[int] = None, progress=None) -> Tuple[Dict[str, Any], ColumnarFlow]:
+    with ChunkedReader(filepath) as reader:
+        return reader.metadata, reader.read_flow(workers, progress)
+
+
+def read_summary(filepath: str) -> Dict[str, Any]:
+    """Metadata, per-action counts and duration straight from the header and index."""
+    with ChunkedReader(filepath) as reader:
+        return {
+            "metadata": reader.metadata,
+            "events": reader.count,
+            "duration": reader.duration,
+            "by_action": reader.by_action(),
+        }
+
+
+def iter_file(filepath: str, metadata: Dict[str, Any] = None, start: float = 0.0):
+    """Streams the events of a v3 file from an optional time offset; see ChunkedReader.iter_events."""
+    with ChunkedReader(filepath) as reader:
+        if metadata is not None:
+            metadata.update(reader.metadata)
+        yield from reader.iter_events(start)
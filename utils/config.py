@@ -1,6 +1,10 @@
+import atexit
+import copy
 import json
 import os
-from typing import Dict, Any
+import threading
+import time
+from typing import Dict, Any, Callable, List
 
 SETTINGS_FILE = "settings.json"
 DEFAULT_SETTINGS = {
@@ -14,28 +18,215 @@ DEFAULT_SETTINGS = {
     "show_overlay": True,
     "loop_mode": "once",        # "once", "count", "infinite"
     "loop_count": 3,            # Number of loops when mode is "count"
+    "playback_scheduler": "deadline", # "deadline" (drift-free) or "relative" (classic sleeps)
+    "move_interpolation": "off", # Synthesize mouse paths between stored moves: "off", "linear", "catmull_rom"
+    "move_rate_hz": 125,        # Output rate of synthesized mouse paths
+    "spill_to_disk": False,     # Stream recordings to a crash-safe journal while capturing
+    "record_memory_cap": 100000, # Max events held in memory while spilling to disk
+    "move_sampling": {},        # Overrides for Recorder.DEFAULT_SAMPLING (tolerance_px, min/max_interval_ms)
+    "journal_dir": "journals",
+    "save_format": "binary",    # "binary" (chunked columnar v3) or "json" (legacy GZIP JSON)
+    "compression_level": 1,     # zlib level for saved macros: 0 (none), 1 (fast), 6, 9 (smallest)
+    "optimizer": {},            # Overrides for backend.optimizer.DEFAULT_OPTIONS (pass toggles, tolerances)
+    "resolution_remap": "warn", # On load: "warn", or remap with "scale", "letterbox", "offset"
+    "playlist": [],             # [{"path": ..., "loops": n}] played in order by the playlist runner
+    "playlist_repeat": False,
+    "library_dir": "",          # Folder browsed by the Library page
+    "library_db": "library.db", # Metadata index for the library (sqlite)
+    "checkpoint_file": "checkpoint.json", # Last playback position, for resuming an interrupted run
+    "checkpoint_interval_sec": 2, # How often the position is saved while playing (0 = off)
     "webhook_url": "",
-    "webhook_enabled": False
+    "webhook_enabled": False,
+    "webhook_heartbeat_sec": 300 # Progress heartbeat while playing (0 = off)
 }
 
+# Allowed values for enumerated settings (types come from DEFAULT_SETTINGS)
+CHOICES = {
+    "loop_mode": ("once", "count", "infinite"),
+    "playback_scheduler": ("deadline", "relative"),
+    "move_interpolation": ("off", "linear", "catmull_rom"),
+    "move_rate_hz": (60, 125, 250, 500),
+    "save_format": ("binary", "json"),
+    "compression_level": (0, 1, 6, 9),
+    "resolution_remap": ("warn", "scale", "letterbox", "offset"),
+}
+
+def validate_setting(key: str, value: Any) -> bool:
+    """True if value is acceptable for key. Unknown keys are accepted as-is."""
+    if key not in DEFAULT_SETTINGS:
+        return True
+    default = DEFAULT_SETTINGS[key]
+    if isinstance(default, bool):
+        ok = isinstance(value, bool)
+    elif isinstance(default, (int, float)):
+        # Numbers are interchangeable, but bools are not numbers here
+        ok = isinstance(value, (int, float)) and not isinstance(value, bool)
+    else:
+        ok = isinstance(value, type(default))
+    if ok and key in CHOICES:
+        ok = value in CHOICES[key]
+    return ok
+
+def _write_atomic(path: str, settings: Dict[str, Any]) -> None:
+    """Writes to a temp file and renames it over the target, so a crash never leaves a truncated file."""
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump(settings, f, indent=4)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+class SettingsStore(dict):
+    """
+    Settings held in memory and persisted behind the caller's back.
+
+    Behaves like the plain dict load_settings() used to return. Assigning a key
+    notifies that key's subscribers and schedules a write. Writes are debounced
+    on a background thread (a burst of changes becomes one write) and go through
+    write-temp-then-rename. flush() forces pending changes out, and runs at exit.
+    """
+
+    # Wait for this much quiet before writing...
+    DEBOUNCE = 0.5
+    # ...but never hold changes back longer than this
+    MAX_DELAY = 2.0
+
+    def __init__(self, path: str = SETTINGS_FILE, values: Dict[str, Any] = None):
+        super().__init__(values or {})
+        self.path = path
+        self._subscribers: Dict[str, List[Callable[[str, Any, Any], None]]] = {}
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock() # One writer of the temp file at a time
+        self._changed = threading.Event()
+        self._first_change = 0.0
+        self._last_change = 0.0
+        self._dirty = False
+        self._writer = None
+        atexit.register(self.flush)
+
+    @classmethod
+    def load(cls, path: str = SETTINGS_FILE) -> "SettingsStore":
+        """Loads and validates settings, falling back per key (not wholesale) to defaults."""
+        store = cls(path, copy.deepcopy(DEFAULT_SETTINGS))
+        if not os.path.exists(path):
+            store.save()
+            return store
+
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+            if not isinstance(data, dict):
+                raise ValueError("top level is not an object")
+        except Exception as e:
+            # Keep the broken file for inspection instead of silently discarding it
+            print(f"Settings file unreadable ({e}); using defaults. A copy was kept as {path}.bad")
+            try: os.replace(path, f"{path}.bad")
+            except OSError: pass
+            store.save()
+            return store
+
+        invalid = []
+        for key, value in data.items():
+            if validate_setting(key, value):
+                dict.__setitem__(store, key, value)
+            else:
+                invalid.append(key)
+        if invalid:
+            print(f"Ignoring invalid settings (defaults used): {', '.join(sorted(invalid))}")
+            store.save()
+        return store
+
+    # --- dict interface ---
+
+    def __setitem__(self, key, value):
+        if not validate_setting(key, value):
+            raise ValueError(f"Invalid value for setting {key!r}: {value!r}")
+        with self._lock:
+            old = self.get(key)
+            super().__setitem__(key, value)
+        self.save()
+        if old != value:
+            for callback in list(self._subscribers.get(key, ())):
+                try:
+                    callback(key, value, old)
+                except Exception as e:
+                    print(f"Settings subscriber for {key!r} failed: {e}")
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    # --- Change notifications ---
+
+    def subscribe(self, key: str, callback: Callable[[str, Any, Any], None]):
+        """Calls callback(key, new_value, old_value) whenever key changes."""
+        self._subscribers.setdefault(key, []).append(callback)
+
+    def unsubscribe(self, key: str, callback):
+        subs = self._subscribers.get(key, [])
+        if callback in subs:
+            subs.remove(callback)
+
+    # --- Persistence ---
+
+    def save(self):
+        """Schedules a debounced write (also call after mutating a nested value in place)."""
+        now = time.monotonic()
+        with self._lock:
+            if not self._dirty:
+                self._dirty = True
+                self._first_change = now
+            self._last_change = now
+            if self._writer is None or not self._writer.is_alive():
+                self._writer = threading.Thread(target=self._write_loop, daemon=True)
+                self._writer.start()
+        self._changed.set()
+
+    def flush(self):
+        """Writes pending changes now, on the calling thread."""
+        # Held across snapshot and write, so the background writer and an exit-time
+        # flush never share the temp file, and an older snapshot never lands last
+        with self._write_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                self._dirty = False
+                snapshot = json.loads(json.dumps(self)) # Consistent copy taken under the lock
+            try:
+                _write_atomic(self.path, snapshot)
+            except Exception as e:
+                print(f"Failed to save settings: {e}")
+
+    def _write_loop(self):
+        while True:
+            self._changed.wait()
+            self._changed.clear()
+            while True:
+                with self._lock:
+                    if not self._dirty:
+                        break
+                    now = time.monotonic()
+                    due = min(self._last_change + self.DEBOUNCE, self._first_change + self.MAX_DELAY)
+                if now >= due:
+                    self.flush()
+                    break
+                time.sleep(due - now)
+
 def load_settings() -> Dict[str, Any]:
-    if not os.path.exists(SETTINGS_FILE):
-        save_settings(DEFAULT_SETTINGS)
-        return DEFAULT_SETTINGS.copy()
-    
-    try:
-        with open(SETTINGS_FILE, 'r') as f:
-            data = json.load(f)
-            # Merge with defaults
-            settings = DEFAULT_SETTINGS.copy()
-            settings.update(data)
-            return settings
-    except Exception:
-        return DEFAULT_SETTINGS.copy()
+    """Loads the settings store (a dict that saves itself; see SettingsStore)."""
+    return SettingsStore.load(SETTINGS_FILE)
 
 def save_settings(settings: Dict[str, Any]) -> None:
+    """Persists settings. A SettingsStore is written in the background; a plain dict right away."""
+    if isinstance(settings, SettingsStore):
+        settings.save()
+        return
     try:
-        with open(SETTINGS_FILE, 'w') as f:
-            json.dump(settings, f, indent=4)
+        _write_atomic(SETTINGS_FILE, settings)
     except Exception as e:
         print(f"Failed to save settings: {e}")
@@ -3,38 +3,256 @@ import os
 import gzip
 from typing import Dict, Any
 
-def save_macro(filepath: str, data: Dict[str, Any]) -> None:
+from utils import macro_format, chunked_format
+from utils.macro_format import ColumnarFlow
+
+GZIP_MAGIC = b"\x1f\x8b"
+# Bytes written/read between progress updates
+IO_CHUNK = 1 << 20
+
+def save_macro(filepath: str, data: Dict[str, Any], fmt: str = "binary", level: int = None,
+               progress=None) -> None:
     """
-    Save macro data to a .polaris (JSON) file, compressed with GZIP.
-    
+    Save macro data to a .polaris file.
+
+    The file is written next to the target and moved into place at the end, so
+    a failed or cancelled save never leaves a half-written macro behind.
+
     Args:
         filepath: Absolute or relative path to save the file.
         data: Dictionary containing metadata and flow data.
+        fmt: "binary" for the chunked columnar container, or "json" for
+             legacy GZIP-compressed JSON (readable by older builds).
+        level: Compression level 0-9 (default: 1 for binary chunks, 9 for gzip).
+        progress: Optional IOProgress; cancelling it aborts the save with
+                  OperationCancelled.
     """
     # Ensure the directory exists
-    os.makedirs(os.path.dirname(filepath), exist_ok=True)
-    
-    with gzip.open(filepath, 'wt', encoding='utf-8') as f:
-        json.dump(data, f, indent=4)
+    directory = os.path.dirname(filepath)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    # Runtime-only keys (e.g. the cached playback plan) start with an underscore
+    data = {k: v for k, v in data.items() if not k.startswith("_")}
+    if progress:
+        progress.events_total = len(data.get("flow", []))
+        progress.step(phase="Encoding")
+
+    blob = None
+    if fmt == "binary":
+        flow = ColumnarFlow.from_events(data.get("flow", []), progress)
+    else:
+        # Older builds only read 'delay'; newer ones prefer the exact 't_ns'
+        data["flow"] = list(macro_format.with_delays(data.get("flow", [])))
+        blob = json.dumps(data, indent=4).encode("utf-8")
+        if progress: progress.step(phase="Compressing")
+        blob = gzip.compress(blob, 9 if level is None else level)
+
+    tmp = filepath + ".tmp"
+    try:
+        with open(tmp, 'wb') as f:
+            if blob is None:
+                # Chunks are compressed (in parallel for big flows) and streamed out as they finish
+                chunked_format.write_flow(f, flow, data.get("metadata", {}), 1 if level is None else level,
+                                          progress=progress)
+            else:
+                _write_chunked(f, blob, progress)
+        os.replace(tmp, filepath)
+    except BaseException:
+        # Includes OperationCancelled: drop the partial file, keep the old macro
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+def _write_chunked(f, blob: bytes, progress=None):
+    if not progress:
+        f.write(blob)
+        return
+    view = memoryview(blob)
+    progress.bytes_total = len(blob)
+    progress.step(bytes_done=0, phase="Writing")
+    for pos in range(0, len(blob), IO_CHUNK):
+        f.write(view[pos:pos + IO_CHUNK])
+        progress.step(bytes_done=min(pos + IO_CHUNK, len(blob)))
+
+def sniff_format(filepath: str) -> str:
+    """Identifies a .polaris file as 'binary', 'gzip' or 'json' from its magic bytes."""
+    with open(filepath, 'rb') as f:
+        head = f.read(4)
+    if head == macro_format.MAGIC:
+        return "binary"
+    if head[:2] == GZIP_MAGIC:
+        return "gzip"
+    return "json"
 
-def load_macro(filepath: str) -> Dict[str, Any]:
+def load_macro(filepath: str, progress=None) -> Dict[str, Any]:
     """
-    Load macro data from a .polaris (JSON) file, supporting both GZIP and legacy plain JSON.
-    
+    Load macro data from a .polaris file: binary (chunked v3 or columnar v2),
+    GZIP JSON or legacy plain JSON.
+
     Args:
         filepath: Path to the .polaris file.
-        
+        progress: Optional IOProgress, updated with bytes read (JSON) or events
+                  decoded (binary); cancelling it raises OperationCancelled.
+
     Returns:
-        Dictionary containing the macro data.
+        Dictionary containing the macro data. Binary files yield a ColumnarFlow
+        as 'flow'; JSON files yield a list of event dicts, with legacy 'delay'
+        timing converted to absolute 't_ns' offsets.
     """
     if not os.path.exists(filepath):
         raise FileNotFoundError(f"Macro file not found: {filepath}")
-        
-    try:
-        # Try processing as GZIP first
-        with gzip.open(filepath, 'rt', encoding='utf-8') as f:
-            return json.load(f)
-    except (gzip.BadGzipFile, OSError):
-        # Fallback to plain text JSON (for legacy files)
+
+    fmt = sniff_format(filepath)
+    if fmt == "binary":
+        metadata, flow = macro_format.read_file(filepath, progress)
+        return {"flow": flow, "metadata": metadata}
+    if not progress:
+        if fmt == "gzip":
+            with gzip.open(filepath, 'rt', encoding='utf-8') as f:
+                return _timestamped(json.load(f))
+        # Plain text JSON (for legacy files)
         with open(filepath, 'r', encoding='utf-8') as f:
-            return json.load(f)
+            return _timestamped(json.load(f))
+
+    # Same formats, read in chunks so progress tracks the bytes consumed on disk
+    progress.bytes_total = os.path.getsize(filepath)
+    progress.step(bytes_done=0, phase="Reading")
+    chunks = []
+    with open(filepath, 'rb') as raw:
+        f = gzip.GzipFile(fileobj=raw) if fmt == "gzip" else raw
+        while True:
+            chunk = f.read(IO_CHUNK)
+            if not chunk:
+                break
+            chunks.append(chunk)
+            progress.step(bytes_done=raw.tell())
+    progress.step(phase="Parsing")
+    data = _timestamped(json.loads(b"".join(chunks).decode("utf-8")))
+    progress.events_total = len(data.get("flow", []))
+    progress.step(events=progress.events_total)
+    return data
+
+def _timestamped(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Converts a JSON macro's flow to absolute 't_ns' timing (see macro_format.timestamped)."""
+    data["flow"] = list(macro_format.timestamped(data.get("flow", [])))
+    return data
+
+class _JsonStream:
+    """Minimal incremental reader for a top-level JSON object over a text stream."""
+
+    CHUNK = 1 << 16
+
+    def __init__(self, f):
+        self.f = f
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self) -> bool:
+        if self.eof:
+            return False
+        chunk = self.f.read(self.CHUNK)
+        if not chunk:
+            self.eof = True
+            return False
+        # Drop consumed text so the buffer never grows with the file
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Skips whitespace and returns the next significant character ('' at EOF)."""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char: str):
+        if self.peek() != char:
+            raise ValueError(f"Malformed macro file: expected '{char}'")
+        self.pos += 1
+
+    def value(self):
+        """Decodes the next complete JSON value, reading more input as needed."""
+        self.peek()
+        while True:
+            try:
+                obj, end = self.decoder.raw_decode(self.buf, self.pos)
+                # A value ending exactly at the buffer edge may be cut short (e.g. a number)
+                if end < len(self.buf) or self.eof:
+                    self.pos = end
+                    return obj
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._fill()
+
+
+def _iter_json_events(f, metadata: Dict[str, Any]):
+    """Yields the 'flow' entries of a macro JSON object one at a time."""
+    stream = _JsonStream(f)
+    stream.expect("{")
+    while stream.peek() not in ("}", ""):
+        if stream.peek() == ",":
+            stream.pos += 1
+            continue
+        key = stream.value()
+        stream.expect(":")
+        if key != "flow":
+            value = stream.value()
+            if key == "metadata" and isinstance(value, dict):
+                metadata.update(value)
+            continue
+
+        stream.expect("[")
+        while True:
+            char = stream.peek()
+            if char == "]":
+                stream.pos += 1
+                break
+            if char == ",":
+                stream.pos += 1
+                continue
+            if not char:
+                raise ValueError("Malformed macro file: unterminated flow")
+            yield stream.value()
+
+def iter_macro_events(filepath: str, metadata: Dict[str, Any] = None, start: float = 0.0):
+    """
+    Yields a macro's events incrementally from disk, for any supported format.
+
+    Only a small read buffer is resident at a time, so playback can start as soon
+    as the first event is decoded. If a metadata dict is given it is filled as the
+    metadata is encountered (up front for binary files; for JSON files it may only
+    be complete once the flow has been consumed). A start offset in seconds skips
+    ahead; chunked binary files seek there through their index, other formats
+    have to read past the earlier events.
+    """
+    if not os.path.exists(filepath):
+        raise FileNotFoundError(f"Macro file not found: {filepath}")
+    if metadata is None:
+        metadata = {}
+
+    fmt = sniff_format(filepath)
+    if fmt == "binary":
+        yield from macro_format.iter_file(filepath, metadata, start)
+    else:
+        opener = gzip.open if fmt == "gzip" else open
+        with opener(filepath, 'rt', encoding='utf-8') as f:
+            events = macro_format.timestamped(_iter_json_events(f, metadata))
+            yield from macro_format.skip_to(events, start) if start else events
+
+def open_macro_stream(filepath: str, start: float = 0.0) -> Dict[str, Any]:
+    """
+    Returns a macro dict whose 'flow' is a one-shot event iterator.
+
+    The result can be handed to Player.play like a fully loaded macro.
+    """
+    metadata: Dict[str, Any] = {}
+    flow = iter_macro_events(filepath, metadata, start)
+    return {"flow": flow, "metadata": metadata}
@@ -0,0 +1,55 @@
+class OperationCancelled(Exception):
+    """Raised inside a save/load when its IOProgress was cancelled."""
+
+
+class IOProgress:
+    """
+    Progress and cancellation for one save or load.
+
+    The worker doing the I/O calls step() as it goes, which records how far it
+    got and raises OperationCancelled once cancel() has been called. Other
+    threads (e.g. the UI polling with after()) only read the attributes, so no
+    callbacks ever cross threads.
+    """
+
+    def __init__(self):
+        self.phase = ""
+        self.bytes_done = 0
+        self.bytes_total = 0
+        self.events = 0
+        self.events_total = 0
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+    def check(self):
+        if self.cancelled:
+            raise OperationCancelled()
+
+    def step(self, events: int = None, bytes_done: int = None, phase: str = None):
+        if events is not None:
+            self.events = events
+        if bytes_done is not None:
+            self.bytes_done = bytes_done
+        if phase is not None:
+            self.phase = phase
+        if self.cancelled:
+            raise OperationCancelled()
+
+    @property
+    def fraction(self) -> float:
+        """Best estimate of completion (0..1) from whichever total is known."""
+        if self.bytes_total:
+            return min(1.0, self.bytes_done / self.bytes_total)
+        if self.events_total:
+            return min(1.0, self.events / self.events_total)
+        return 0.0
+
+    def describe(self) -> str:
+        parts = [self.phase] if self.phase else []
+        if self.bytes_total:
+            parts.append(f"{self.bytes_done / 1e6:.1f}/{self.bytes_total / 1e6:.1f} MB")
+        if self.events:
+            parts.append(f"{self.events:,} events")
+        return " · ".join(parts)
@@ -0,0 +1,155 @@
+import json
+import os
+import struct
+import time
+import zlib
+from typing import Dict, Any, List, Optional
+
+# Append-only recording journal (.pjournal)
+#
+#   header  <4sHI  magic, version, metadata length, followed by UTF-8 JSON metadata
+#   chunk   <4sIII tag b"CHNK", event count, payload length, crc32 of payload,
+#           followed by the zlib-compressed JSON list of events
+#   end     <4sIII tag b"DONE" with zero fields, written on a clean close
+#
+# Every chunk is flushed and fsynced as it is written, so after a crash all
+# complete chunks are readable; a torn final chunk fails its CRC and is ignored.
+MAGIC = b"PLRJ"
+VERSION = 1
+HEADER = struct.Struct("<4sHI")
+RECORD = struct.Struct("<4sIII")
+TAG_CHUNK = b"CHNK"
+TAG_DONE = b"DONE"
+EXTENSION = ".pjournal"
+
+
+class JournalWriter:
+    """Streams events into a journal in compressed chunks."""
+
+    # Flush a chunk after this many events or this many seconds, whichever first
+    CHUNK_EVENTS = 2000
+    CHUNK_SECONDS = 1.0
+
+    def __init__(self, path: str, metadata: Optional[Dict[str, Any]] = None):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.count = 0
+        self._pending: List[Dict[str, Any]] = []
+        self._last_flush = time.monotonic()
+        self._f = open(path, 'wb')
+        meta = json.dumps(metadata or {}).encode("utf-8")
+        self._f.write(HEADER.pack(MAGIC, VERSION, len(meta)) + meta)
+        self._sync()
+
+    def append(self, event: Dict[str, Any]):
+        self._pending.append(event)
+        self.count += 1
+        if len(self._pending) >= self.CHUNK_EVENTS:
+            self.flush()
+
+    def tick(self):
+        """Flushes pending events if the time budget for a chunk has passed."""
+        if self._pending and time.monotonic() - self._last_flush >= self.CHUNK_SECONDS:
+            self.flush()
+
+    def flush(self):
+        self._last_flush = time.monotonic()
+        if not self._pending or self._f is None:
+            return
+        payload = zlib.compress(json.dumps(self._pending, separators=(",", ":")).encode("utf-8"), 1)
+        self._f.write(RECORD.pack(TAG_CHUNK, len(self._pending), len(payload), zlib.crc32(payload)) + payload)
+        self._pending = []
+        self._sync()
+
+    def close(self):
+        """Flushes the remaining events and marks the journal as cleanly finished."""
+        if self._f is None:
+            return
+        self.flush()
+        self._f.write(RECORD.pack(TAG_DONE, 0, 0, 0))
+        self._sync()
+        self._f.close()
+        self._f = None
+
+    def _sync(self):
+        self._f.flush()
+        os.fsync(self._f.fileno())
+
+
+def read_header(path: str) -> Dict[str, Any]:
+    """Returns the journal metadata."""
+    with open(path, 'rb') as f:
+        return _read_header(f)
+
+
+def _read_header(f) -> Dict[str, Any]:
+    raw = f.read(HEADER.size)
+    if len(raw) < HEADER.size:
+        raise ValueError("Journal header is truncated")
+    magic, version, meta_len = HEADER.unpack(raw)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("Not a Polaris recording journal")
+    return json.loads(f.read(meta_len).decode("utf-8"))
+
+
+def iter_journal(path: str, status: Optional[Dict[str, Any]] = None):
+    """
+    Yields the events of every intact chunk in order.
+
+    If a status dict is given, 'complete' is set to whether the journal was closed
+    cleanly and 'torn' to whether a damaged trailing chunk was skipped.
+    """
+    status = status if status is not None else {}
+    status["complete"] = False
+    status["torn"] = False
+    with open(path, 'rb') as f:
+        _read_header(f)
+        while True:
+            raw = f.read(RECORD.size)
+            if not raw:
+                return
+            if len(raw) < RECORD.size:
+                status["torn"] = True
+                return
+            tag, count, length, crc = RECORD.unpack(raw)
+            if tag == TAG_DONE:
+                status["complete"] = True
+                return
+            payload = f.read(length)
+            if tag != TAG_CHUNK or len(payload) < length or zlib.crc32(payload) != crc:
+                status["torn"] = True
+                return
+            yield from json.loads(zlib.decompress(payload).decode("utf-8"))
+
+
+def is_complete(path: str) -> bool:
+    status: Dict[str, Any] = {}
+    for _ in iter_journal(path, status):
+        pass
+    return status["complete"]
+
+
+def find_journals(directory: str) -> List[str]:
+    """Lists journals left in a directory, oldest first."""
+    if not os.path.isdir(directory):
+        return []
+    paths = [os.path.join(directory, name) for name in os.listdir(directory) if name.endswith(EXTENSION)]
+    return sorted(paths, key=os.path.getmtime)
+
+
+def recover_journal(path: str, out_path: str, fmt: str = "binary") -> int:
+    """
+    Rebuilds a normal .polaris file from a (possibly interrupted) journal.
+
+    Returns the number of recovered events.
+    """
+    # Imported here to keep the journal writer free of the file format modules
+    from utils.file_manager import save_macro
+    from utils.macro_format import ColumnarFlow
+
+    metadata = read_header(path)
+    flow = ColumnarFlow.from_events(iter_journal(path))
+    save_macro(out_path, {"flow": flow, "metadata": metadata}, fmt=fmt)
+    return len(flow)
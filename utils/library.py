@@ -0,0 +1,227 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils import macro_format
+from utils.file_manager import sniff_format, iter_macro_events
+
+MACRO_EXT = ".polaris"
+# Below this many changed files, indexing in-process beats spinning up a pool
+POOL_THRESHOLD = 16
+
+ACTION_COLUMNS = {
+    "mouse_move": "moves",
+    "mouse_click": "clicks",
+    "mouse_scroll": "scrolls",
+    "key_press": "key_presses",
+    "key_release": "key_releases",
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS macros (
+    path          TEXT PRIMARY KEY,
+    name          TEXT NOT NULL,
+    mtime         REAL NOT NULL,
+    size          INTEGER NOT NULL,
+    format        TEXT,
+    created_at    TEXT,
+    screen_width  INTEGER,
+    screen_height INTEGER,
+    events        INTEGER,
+    duration      REAL,
+    moves         INTEGER,
+    clicks        INTEGER,
+    scrolls       INTEGER,
+    key_presses   INTEGER,
+    key_releases  INTEGER,
+    error         TEXT,
+    indexed_at    REAL
+);
+CREATE INDEX IF NOT EXISTS macros_name ON macros(name);
+"""
+
+COLUMNS = ("path", "name", "mtime", "size", "format", "created_at", "screen_width", "screen_height",
+           "events", "duration", "moves", "clicks", "scrolls", "key_presses", "key_releases", "error", "indexed_at")
+
+# Sortable columns exposed to the UI (anything else falls back to name)
+SORT_KEYS = ("name", "created_at", "duration", "events", "size", "mtime", "screen_width")
+
+
+def summarize_file(path: str, mtime: float, size: int) -> Dict[str, Any]:
+    """
+    Builds an index row for one macro file.
+
+    Binary files are summarized from the header and action column only; JSON
+    files are streamed so memory stays flat. Runs in worker processes, so it
+    must stay a module-level function.
+    """
+    row = {"path": path, "name": os.path.basename(path), "mtime": mtime, "size": size,
+           "indexed_at": time.time(), "error": None}
+    try:
+        fmt = sniff_format(path)
+        row["format"] = fmt
+        if fmt == "binary":
+            summary = macro_format.read_summary(path)
+            metadata = summary["metadata"]
+            events, duration, by_action = summary["events"], summary["duration"], summary["by_action"]
+        else:
+            metadata = {}
+            counts = Counter()
+            last = 0
+            for event in iter_macro_events(path, metadata):
+                counts[event.get("action")] += 1
+                last = event["t_ns"]
+            duration = last / 1e9
+            events, by_action = sum(counts.values()), counts
+
+        row.update({
+            "created_at": metadata.get("created_at"),
+            "screen_width": metadata.get("screen_width"),
+            "screen_height": metadata.get("screen_height"),
+            "events": events,
+            "duration": duration,
+        })
+        for action, column in ACTION_COLUMNS.items():
+            row[column] = by_action.get(action, 0)
+    except Exception as e:
+        row["error"] = str(e)
+    return row
+
+
+def _summarize_args(args: Tuple[str, float, int]) -> Dict[str, Any]:
+    return summarize_file(*args)
+
+
+class LibraryIndex:
+    """
+    On-disk (sqlite) index of macro metadata and summary stats for a directory.
+
+    refresh() only re-reads files whose mtime or size changed since they were
+    indexed and drops rows for deleted files; big batches are summarized on a
+    process pool. query() answers browsing, filtering and sorting from the
+    index alone, without opening any macro file.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Used from the UI thread and a refresh thread; sqlite serializes the writes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.executescript(SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def scan(self, directory: str, recursive: bool = True) -> Dict[str, Tuple[float, int]]:
+        """Returns {path: (mtime, size)} for the macro files under directory."""
+        found = {}
+        stack = [directory]
+        while stack:
+            try:
+                entries = os.scandir(stack.pop())
+            except OSError:
+                continue
+            with entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        if recursive:
+                            stack.append(entry.path)
+                    elif entry.name.lower().endswith(MACRO_EXT):
+                        st = entry.stat()
+                        found[os.path.abspath(entry.path)] = (st.st_mtime, st.st_size)
+        return found
+
+    def refresh(self, directory: str, recursive: bool = True, workers: Optional[int] = None,
+                progress=None) -> Dict[str, int]:
+        """
+        Brings the index for directory up to date.
+
+        Args:
+            directory: Folder to scan for .polaris files.
+            recursive: Include subfolders.
+            workers: Process pool size (default: CPU count).
+            progress: Optional callback(done, total) as files are summarized.
+
+        Returns:
+            Counts of files seen, (re)indexed, removed and failed.
+        """
+        found = self.scan(directory, recursive)
+        prefix = os.path.join(os.path.abspath(directory), "")
+        with self._lock:
+            known = {path: (mtime, size) for path, mtime, size in self._conn.execute(
+                "SELECT path, mtime, size FROM macros WHERE path LIKE ? ESCAPE '\\'", (_like_prefix(prefix),))}
+
+        stale = [(path, mtime, size) for path, (mtime, size) in found.items() if known.get(path) != (mtime, size)]
+        removed = [path for path in known if path not in found]
+
+        rows = []
+        if len(stale) >= POOL_THRESHOLD and (workers is None or workers > 1):
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                for row in pool.map(_summarize_args, stale, chunksize=max(1, len(stale) // 64)):
+                    rows.append(row)
+                    if progress: progress(len(rows), len(stale))
+        else:
+            for args in stale:
+                rows.append(summarize_file(*args))
+                if progress: progress(len(rows), len(stale))
+
+        with self._lock, self._conn:
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO macros ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+                [tuple(row.get(c) for c in COLUMNS) for row in rows])
+            self._conn.executemany("DELETE FROM macros WHERE path = ?", [(p,) for p in removed])
+
+        return {
+            "files": len(found),
+            "indexed": len(rows),
+            "removed": len(removed),
+            "errors": sum(1 for row in rows if row["error"]),
+        }
+
+    def query(self, directory: Optional[str] = None, search: str = "", sort: str = "name",
+              descending: bool = False, resolution: Optional[Tuple[int, int]] = None) -> List[Dict[str, Any]]:
+        """
+        Lists indexed macros from the index only.
+
+        Args:
+            directory: Restrict to files under this folder.
+            search: Case-insensitive substring of the file name.
+            sort: One of SORT_KEYS.
+            descending: Reverse the sort order.
+            resolution: Only macros recorded at this (width, height).
+        """
+        clauses, params = [], []
+        if directory:
+            clauses.append("path LIKE ? ESCAPE '\\'")
+            params.append(_like_prefix(os.path.join(os.path.abspath(directory), "")))
+        if search:
+            clauses.append("name LIKE ? ESCAPE '\\'")
+            params.append("%" + _like_escape(search) + "%")
+        if resolution:
+            clauses.append("screen_width = ? AND screen_height = ?")
+            params.extend(resolution)
+
+        order = sort if sort in SORT_KEYS else "name"
+        sql = f"SELECT {', '.join(COLUMNS)} FROM macros"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += f" ORDER BY {order} {'DESC' if descending else 'ASC'}, name ASC"
+
+        with self._lock:
+            return [dict(zip(COLUMNS, r)) for r in self._conn.execute(sql, params)]
+
+
+def _like_escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _like_prefix(prefix: str) -> str:
+    return _like_escape(prefix) + "%"
@@ -0,0 +1,568 @@
+import json
+import mmap
+import struct
+import sys
+import zlib
+from array import array
+from collections.abc import Sequence
+from typing import Dict, Any, List, Iterable, Tuple
+
+# Binary .polaris container (v2). Still read everywhere; new binary saves use
+# the chunked v3 container in utils/chunked_format.py.
+#
+#   header    <4sHHII  magic, version, flags, event count, metadata length
+#   metadata  UTF-8 JSON
+#   tables    u32 length + UTF-8 JSON, for the interned key and button strings
+#   columns   u32 length + bytes, in order:
+#               actions  u8 action code per event
+#               times    int64 absolute nanoseconds per event (microseconds
+#                        in files written without FLAG_NS)
+#               coords   zigzag varint x/y deltas, mouse events only
+#               refs     varint per event: button index << 1 | pressed (click),
+#                        key table index (key), zigzag dx, dy (scroll)
+#
+# All fixed-width values are little-endian. With FLAG_ZLIB set in the header
+# the four column blocks are each stored zlib-compressed; the metadata and
+# tables are never compressed, so summaries can still read them directly.
+# Older files without FLAG_NS have their times scaled to nanoseconds on load.
+MAGIC = b"PLRS"
+VERSION = 2
+HEADER = struct.Struct("<4sHHII")
+U32 = struct.Struct("<I")
+
+# Header flags
+FLAG_ZLIB = 1
+FLAG_NS = 2     # Times are nanoseconds (otherwise legacy microseconds)
+
+# Events decoded/encoded between progress updates
+PROGRESS_EVERY = 4096
+
+# Action codes
+A_MOVE = 0
+A_CLICK = 1
+A_SCROLL = 2
+A_KEY_PRESS = 3
+A_KEY_RELEASE = 4
+
+ACTION_NAMES = ("mouse_move", "mouse_click", "mouse_scroll", "key_press", "key_release")
+ACTION_CODES = {name: code for code, name in enumerate(ACTION_NAMES)}
+
+_SWAP = sys.byteorder != "little"
+
+
+class ColumnarFlow(Sequence):
+    """
+    A macro flow stored column-wise in typed arrays.
+
+    Behaves like a sequence of event dicts, but dicts are only built when an
+    item is accessed; assigning an item overwrites its row in place. Hot paths
+    (plan compilation, stats) read the columns directly.
+    """
+
+    COLUMNS = ("actions", "times_ns", "x", "y", "ref", "aux")
+
+    def __init__(self):
+        self.actions = array('B')
+        self.times_ns = array('q')  # Absolute offsets from the start of the macro
+        self.x = array('i')
+        self.y = array('i')
+        self.ref = array('i')       # Button/key table index, or scroll dx
+        self.aux = array('i')       # Pressed flag, or scroll dy
+        self.keys: List[str] = []
+        self.buttons: List[str] = []
+
+    def __len__(self):
+        return len(self.actions)
+
+    def __iter__(self):
+        for i in range(len(self.actions)):
+            yield self._event(i)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self._slice(index)
+        n = len(self.actions)
+        if index < 0:
+            index += n
+        if not 0 <= index < n:
+            raise IndexError("flow index out of range")
+        return self._event(index)
+
+    def __setitem__(self, index: int, event: Dict[str, Any]):
+        """Overwrites one row from an event dict carrying 't_ns'."""
+        n = len(self.actions)
+        if index < 0:
+            index += n
+        if not 0 <= index < n:
+            raise IndexError("flow index out of range")
+        row = self._encode(event, {k: i for i, k in enumerate(self.keys)},
+                           {b: i for i, b in enumerate(self.buttons)})
+        if row is None:
+            raise ValueError(f"Unknown action: {event.get('action')!r}")
+        for name, value in zip(self.COLUMNS, row):
+            getattr(self, name)[index] = value
+
+    def _event(self, i: int) -> Dict[str, Any]:
+        return _make_event(self.actions[i], self.times_ns[i], self.x[i], self.y[i],
+                           self.ref[i], self.aux[i], self.keys, self.buttons)
+
+    def _slice(self, s: slice) -> "ColumnarFlow":
+        out = ColumnarFlow()
+        out.keys = self.keys
+        out.buttons = self.buttons
+        start, stop, step = s.indices(len(self.actions))
+        if step != 1:
+            raise ValueError("ColumnarFlow only supports contiguous slices")
+        for name in self.COLUMNS:
+            setattr(out, name, getattr(self, name)[start:stop])
+        # Re-base the timeline so the slice keeps the gap before its first event
+        if start:
+            base = self.times_ns[start - 1]
+            out.times_ns = array('q', [t - base for t in out.times_ns])
+        return out
+
+    @classmethod
+    def from_events(cls, events: Iterable[Dict[str, Any]], progress=None) -> "ColumnarFlow":
+        """
+        Builds columns from event dicts (e.g. a freshly recorded or legacy flow;
+        legacy delays are converted with timestamped()).
+
+        If an IOProgress is given it is stepped every PROGRESS_EVERY events,
+        which also lets the conversion be cancelled.
+        """
+        if isinstance(events, ColumnarFlow):
+            return events
+
+        flow = cls()
+        key_index: Dict[str, int] = {}
+        button_index: Dict[str, int] = {}
+        columns = [getattr(flow, name) for name in cls.COLUMNS]
+        for event in timestamped(events):
+            row = flow._encode(event, key_index, button_index)
+            if row is None:
+                continue
+            for column, value in zip(columns, row):
+                column.append(value)
+            if progress and len(flow.actions) % PROGRESS_EVERY == 0:
+                progress.step(events=len(flow.actions))
+        return flow
+
+    def _encode(self, event: Dict[str, Any], key_index: Dict[str, int], button_index: Dict[str, int]):
+        """Column values (in COLUMNS order) for one event, or None for an unknown action."""
+        code = ACTION_CODES.get(event.get("action"))
+        if code is None:
+            return None
+        coords = event.get("coords") or (0, 0)
+        x, y, ref, aux = int(coords[0]), int(coords[1]), 0, 0
+
+        if code == A_CLICK:
+            button = str(event.get("button"))
+            ref = button_index.get(button)
+            if ref is None:
+                ref = button_index[button] = len(self.buttons)
+                self.buttons.append(button)
+            aux = 1 if event.get("pressed") else 0
+        elif code == A_SCROLL:
+            ref, aux = int(event.get("dx", 0)), int(event.get("dy", 0))
+        elif code != A_MOVE:
+            key = event.get("key")
+            ref = key_index.get(key)
+            if ref is None:
+                ref = key_index[key] = len(self.keys)
+                self.keys.append(key)
+            x = y = 0
+        return code, event["t_ns"], x, y, ref, aux
+
+
+def timestamped(events: Iterable[Dict[str, Any]]):
+    """
+    Yields events with their absolute 't_ns' offset, converting legacy ones.
+
+    Older flows stored a float 'delay' (seconds since the previous event). Each
+    delay is rounded to whole nanoseconds on its own and summed as an integer,
+    so the converted timeline does not drift however long the flow is. Events
+    that already carry 't_ns' pass through unchanged, minus any 'delay' written
+    alongside it for older builds (see with_delays).
+    """
+    t = 0
+    for event in events:
+        if "t_ns" in event:
+            t = event["t_ns"]
+            if "delay" in event:
+                event = {k: v for k, v in event.items() if k != "delay"}
+            yield event
+            continue
+        t += round(event.get("delay", 0) * 1e9)
+        event = {k: v for k, v in event.items() if k != "delay"}
+        event["t_ns"] = t
+        yield event
+
+
+def with_delays(events: Iterable[Dict[str, Any]]):
+    """
+    Yields events carrying both 't_ns' and the legacy 'delay' (seconds since the
+    previous event), for JSON files that older builds, which only read 'delay',
+    must still play with the right timing.
+    """
+    prev = 0
+    for event in timestamped(events):
+        t = event["t_ns"]
+        event = dict(event)
+        event["delay"] = (t - prev) / 1e9
+        prev = t
+        yield event
+
+
+def _make_event(code: int, t_ns: int, x: int, y: int, ref: int, aux: int,
+                keys: List[str], buttons: List[str]) -> Dict[str, Any]:
+    """Builds the classic event dict for one decoded row."""
+    event: Dict[str, Any] = {"action": ACTION_NAMES[code], "t_ns": t_ns}
+    if code == A_MOVE:
+        event["coords"] = (x, y)
+    elif code == A_CLICK:
+        event["coords"] = (x, y)
+        event["button"] = buttons[ref]
+        event["pressed"] = bool(aux)
+    elif code == A_SCROLL:
+        event["coords"] = (x, y)
+        event["dx"] = ref
+        event["dy"] = aux
+    else:
+        event["key"] = keys[ref]
+    return event
+
+
+# --- Varint helpers ---
+
+def _zigzag(n: int) -> int:
+    return (n << 1) ^ (n >> 63)
+
+def _unzigzag(n: int) -> int:
+    return (n >> 1) ^ -(n & 1)
+
+def _put_varint(out: bytearray, n: int):
+    while n > 0x7F:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+
+def _varints(data: bytes):
+    """Yields unsigned varints from data."""
+    n = shift = 0
+    for byte in data:
+        n |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+        else:
+            yield n
+            n = shift = 0
+
+
+# --- Encoding ---
+
+def _encode_args(actions, xs, ys, rs, auxs, progress=None) -> Tuple[bytearray, bytearray]:
+    """Encodes the per-event argument columns into the coords and refs varint streams."""
+    coords = bytearray()
+    refs = bytearray()
+    px = py = 0
+    for i in range(len(actions)):
+        code = actions[i]
+        if code <= A_SCROLL:
+            x, y = xs[i], ys[i]
+            _put_varint(coords, _zigzag(x - px))
+            _put_varint(coords, _zigzag(y - py))
+            px, py = x, y
+        if code == A_CLICK:
+            _put_varint(refs, rs[i] << 1 | (auxs[i] & 1))
+        elif code == A_SCROLL:
+            _put_varint(refs, _zigzag(rs[i]))
+            _put_varint(refs, _zigzag(auxs[i]))
+        elif code != A_MOVE:
+            _put_varint(refs, rs[i])
+        if progress and i % PROGRESS_EVERY == 0:
+            progress.step(events=i)
+    return coords, refs
+
+
+def encode_flow(flow: ColumnarFlow, metadata: Dict[str, Any], level: int = 0, progress=None) -> bytes:
+    """
+    Serializes a ColumnarFlow and its metadata into a v2 container.
+
+    Legacy writer: save_macro writes v3 (chunked_format.write_flow). This is
+    kept only to produce v2 files for older Polaris builds and reader tests.
+
+    Args:
+        flow: The columns to write.
+        metadata: JSON-serializable macro metadata.
+        level: zlib level (1-9) for the column blocks; 0 stores them raw.
+        progress: Optional IOProgress, stepped as events are encoded.
+    """
+    n = len(flow)
+    meta = json.dumps(metadata).encode("utf-8")
+    keys = json.dumps(flow.keys).encode("utf-8")
+    buttons = json.dumps(flow.buttons).encode("utf-8")
+
+    times = array('q', flow.times_ns)
+    if _SWAP:
+        times.byteswap()
+
+    coords, refs = _encode_args(flow.actions, flow.x, flow.y, flow.ref, flow.aux, progress)
+    if progress: progress.step(events=n)
+
+    columns = [flow.actions.tobytes(), times.tobytes(), bytes(coords), bytes(refs)]
+    flags = FLAG_NS
+    if level:
+        flags |= FLAG_ZLIB
+        for i, block in enumerate(columns):
+            if progress: progress.step(phase="Compressing")
+            columns[i] = zlib.compress(block, level)
+
+    parts = [HEADER.pack(MAGIC, VERSION, flags, n, len(meta)), meta]
+    for block in [keys, buttons] + columns:
+        parts.append(U32.pack(len(block)))
+        parts.append(block)
+    return b"".join(parts)
+
+
+# --- Decoding ---
+
+def _read_block(buf, pos: int) -> Tuple[int, int]:
+    """Returns (start, end) of the length-prefixed block at pos."""
+    (length,) = U32.unpack_from(buf, pos)
+    start = pos + U32.size
+    if start + length > len(buf):
+        raise ValueError("Truncated .polaris file")
+    return start, start + length
+
+
+def _parse_layout(buf) -> Dict[str, Any]:
+    """Reads the header, metadata and tables, and locates the column blocks."""
+    magic, version, flags, n, meta_len = HEADER.unpack_from(buf, 0)
+    if magic != MAGIC:
+        raise ValueError("Not a binary .polaris file")
+    if version != VERSION:
+        raise ValueError(f"Unsupported .polaris version: {version}")
+
+    pos = HEADER.size
+    layout: Dict[str, Any] = {"count": n, "compressed": bool(flags & FLAG_ZLIB), "time_scale": time_scale(flags)}
+    layout["metadata"] = json.loads(bytes(buf[pos:pos + meta_len]).decode("utf-8"))
+    pos += meta_len
+
+    start, pos = _read_block(buf, pos)
+    layout["keys"] = json.loads(bytes(buf[start:pos]).decode("utf-8"))
+    start, pos = _read_block(buf, pos)
+    layout["buttons"] = json.loads(bytes(buf[start:pos]).decode("utf-8"))
+
+    for name in ("actions", "times", "coords", "refs"):
+        start, pos = _read_block(buf, pos)
+        layout[name] = (start, pos)
+
+    if not layout["compressed"]:
+        _check_columns(layout, layout["actions"], layout["times"])
+    return layout
+
+
+def time_scale(flags: int) -> int:
+    """Multiplier from a file's stored times to nanoseconds."""
+    return 1 if flags & FLAG_NS else 1000
+
+
+def _scaled(times: array, scale: int) -> array:
+    return times if scale == 1 else array('q', [t * scale for t in times])
+
+
+def _check_columns(layout: Dict[str, Any], actions: Tuple, times: Tuple):
+    n = layout["count"]
+    if actions[-1] - actions[-2] != n or times[-1] - times[-2] != n * 8:
+        raise ValueError("Corrupt .polaris file: column length mismatch")
+
+
+def _column(buf, layout: Dict[str, Any], name: str):
+    """
+    Returns (source, start, end) for a column block.
+
+    Raw columns are read in place from buf; compressed ones are inflated into
+    a new bytes object first.
+    """
+    start, end = layout[name]
+    if not layout["compressed"]:
+        return buf, start, end
+    try:
+        data = zlib.decompress(buf[start:end])
+    except zlib.error as e:
+        raise ValueError(f"Corrupt .polaris file: {e}")
+    return data, 0, len(data)
+
+
+def _iter_rows(actions: Iterable[int], coords, refs):
+    """Decodes the varint streams alongside the action codes into (code, x, y, ref, aux)."""
+    x = y = 0
+    for code in actions:
+        r = a = 0
+        if code <= A_SCROLL:
+            x += _unzigzag(next(coords))
+            y += _unzigzag(next(coords))
+            if code == A_CLICK:
+                v = next(refs)
+                r, a = v >> 1, v & 1
+            elif code == A_SCROLL:
+                r = _unzigzag(next(refs))
+                a = _unzigzag(next(refs))
+            yield code, x, y, r, a
+        else:
+            yield code, 0, 0, next(refs), 0
+
+
+def decode_flow(buf, progress=None) -> Tuple[Dict[str, Any], ColumnarFlow]:
+    """
+    Parses a v2 container from any buffer (bytes, mmap) into (metadata, flow).
+
+    If an IOProgress is given its events_total is set from the header and it is
+    stepped every PROGRESS_EVERY decoded events (which is where a cancel lands).
+    """
+    layout = _parse_layout(buf)
+    if progress:
+        progress.events_total = layout["count"]
+        progress.step(phase="Decoding")
+
+    flow = ColumnarFlow()
+    flow.keys = layout["keys"]
+    flow.buttons = layout["buttons"]
+    actions = _column(buf, layout, "actions")
+    times = _column(buf, layout, "times")
+    _check_columns(layout, actions, times)
+    src, start, end = actions
+    flow.actions.frombytes(src[start:end])
+    src, start, end = times
+    flow.times_ns.frombytes(src[start:end])
+    if _SWAP:
+        flow.times_ns.byteswap()
+    flow.times_ns = _scaled(flow.times_ns, layout["time_scale"])
+
+    # Rebuild the per-event argument columns in a single pass
+    src, start, end = _column(buf, layout, "coords")
+    coords = _varints(bytes(src[start:end]))
+    src, start, end = _column(buf, layout, "refs")
+    refs = _varints(bytes(src[start:end]))
+    xs, ys, rs, auxs = flow.x, flow.y, flow.ref, flow.aux
+    for i, (_code, x, y, r, a) in enumerate(_iter_rows(flow.actions, coords, refs)):
+        xs.append(x)
+        ys.append(y)
+        rs.append(r)
+        auxs.append(a)
+        if progress and i % PROGRESS_EVERY == 0:
+            progress.step(events=i)
+
+    if progress: progress.step(events=layout["count"])
+    return layout["metadata"], flow
+
+
+def file_version(filepath: str) -> int:
+    """Container version from a binary file's header (2 columnar, 3 chunked)."""
+    with open(filepath, 'rb') as f:
+        head = f.read(HEADER.size)
+    if len(head) < HEADER.size or head[:4] != MAGIC:
+        raise ValueError("Not a binary .polaris file")
+    return HEADER.unpack(head)[1]
+
+
+def read_file(filepath: str, progress=None) -> Tuple[Dict[str, Any], ColumnarFlow]:
+    """Memory-maps a binary file and decodes its columns without building event dicts."""
+    if file_version(filepath) != VERSION:
+        from utils import chunked_format
+        return chunked_format.read_file(filepath, progress=progress)
+    with open(filepath, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return decode_flow(mm, progress)
+
+
+def read_summary(filepath: str) -> Dict[str, Any]:
+    """
+    Metadata, per-action counts and duration of a v2 file.
+
+    Only the header, the action column and the last timestamp are touched;
+    coordinates and references are never decoded. Chunked files answer from
+    their index alone.
+    """
+    if file_version(filepath) != VERSION:
+        from utils import chunked_format
+        return chunked_format.read_summary(filepath)
+    with open(filepath, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            layout = _parse_layout(mm)
+            src, a0, a1 = actions = _column(mm, layout, "actions")
+            times = _column(mm, layout, "times")
+            _check_columns(layout, actions, times)
+            actions = src[a0:a1]
+            counts = {name: actions.count(code) for code, name in enumerate(ACTION_NAMES)}
+            duration = 0.0
+            if layout["count"]:
+                src, _t0, t1 = times
+                (last,) = struct.unpack_from("<q", src, t1 - 8)
+                duration = last * layout["time_scale"] / 1e9
+            return {
+                "metadata": layout["metadata"],
+                "events": layout["count"],
+                "duration": duration,
+                "by_action": {name: n for name, n in counts.items() if n},
+            }
+
+
+def skip_to(events, start: float):
+    """Drops events before start (seconds) and re-bases the rest so the offset becomes 0."""
+    base = round(start * 1e9)
+    for event in timestamped(events):
+        t = event["t_ns"]
+        if t >= base:
+            yield dict(event, t_ns=t - base)
+
+
+def _varints_chunked(buf, start: int, end: int, chunk: int = 1 << 16):
+    """Like _varints, but reads buf[start:end] in fixed-size slices."""
+    n = shift = 0
+    for pos in range(start, end, chunk):
+        for byte in buf[pos:min(pos + chunk, end)]:
+            n |= (byte & 0x7F) << shift
+            if byte & 0x80:
+                shift += 7
+            else:
+                yield n
+                n = shift = 0
+
+
+def iter_file(filepath: str, metadata: Dict[str, Any] = None, start: float = 0.0):
+    """
+    Yields the events of a binary file one at a time straight from the memory map.
+
+    Nothing but the current event is materialized, so memory stays flat regardless
+    of the macro length. If a metadata dict is given it is filled from the header
+    before the first event is yielded. With a start offset (seconds), events
+    before it are skipped and times are measured from the offset; chunked
+    files jump straight to the right chunk.
+    """
+    if file_version(filepath) != VERSION:
+        from utils import chunked_format
+        yield from chunked_format.iter_file(filepath, metadata, start)
+        return
+    if start:
+        yield from skip_to(iter_file(filepath, metadata), start)
+        return
+    with open(filepath, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            layout = _parse_layout(mm)
+            if metadata is not None:
+                metadata.update(layout["metadata"])
+            keys, buttons = layout["keys"], layout["buttons"]
+            # Compressed columns have to be inflated up front; raw ones stream from the map
+            asrc, a0, a1 = _column(mm, layout, "actions")
+            tsrc, t0, t1 = _column(mm, layout, "times")
+            _check_columns(layout, (a0, a1), (t0, t1))
+            coords = _varints_chunked(*_column(mm, layout, "coords"))
+            refs = _varints_chunked(*_column(mm, layout, "refs"))
+            actions = (code for pos in range(a0, a1, 1 << 16) for code in asrc[pos:min(pos + (1 << 16), a1)])
+            unpack_time = struct.Struct("<q").unpack_from
+            scale = layout["time_scale"]
+
+            for i, (code, x, y, r, a) in enumerate(_iter_rows(actions, coords, refs)):
+                (t,) = unpack_time(tsrc, t0 + 8 * i)
+                yield _make_event(code, t * scale, x, y, r, a, keys, buttons)
@@ -0,0 +1,67 @@
+from array import array
+from typing import Any, Dict, Optional, Tuple
+
+from utils.macro_format import ColumnarFlow
+
+# Remap modes
+REMAP_SCALE = "scale"         # Stretch each axis to the new screen (aspect may change)
+REMAP_LETTERBOX = "letterbox" # Uniform scale to fit, centered with bars
+REMAP_OFFSET = "offset"       # No scaling, recorded area centered on the new screen
+REMAP_MODES = (REMAP_SCALE, REMAP_LETTERBOX, REMAP_OFFSET)
+
+Transform = Tuple[float, float, float, float] # (scale_x, scale_y, offset_x, offset_y)
+
+
+def compute_transform(src_w: int, src_h: int, dst_w: int, dst_h: int, mode: str = REMAP_SCALE) -> Transform:
+    """Returns the (sx, sy, ox, oy) mapping recorded coordinates onto the target screen."""
+    if mode == REMAP_SCALE:
+        return dst_w / src_w, dst_h / src_h, 0.0, 0.0
+    if mode == REMAP_LETTERBOX:
+        s = min(dst_w / src_w, dst_h / src_h)
+        return s, s, (dst_w - src_w * s) / 2, (dst_h - src_h * s) / 2
+    if mode == REMAP_OFFSET:
+        return 1.0, 1.0, (dst_w - src_w) / 2, (dst_h - src_h) / 2
+    raise ValueError(f"Unknown remap mode: {mode}")
+
+
+def remap_flow(flow: ColumnarFlow, transform: Transform) -> ColumnarFlow:
+    """
+    Applies a transform to every coordinate in one pass over the x/y columns.
+
+    The other columns and the key/button tables are shared with the input, so
+    only the two coordinate arrays are newly allocated.
+    """
+    sx, sy, ox, oy = transform
+    out = ColumnarFlow()
+    out.actions, out.times_ns, out.ref, out.aux = flow.actions, flow.times_ns, flow.ref, flow.aux
+    out.keys, out.buttons = flow.keys, flow.buttons
+
+    # Column-wise: one comprehension per axis, identity axes are shared as-is
+    out.x = flow.x if (sx, ox) == (1.0, 0.0) else array('i', [round(x * sx + ox) for x in flow.x])
+    out.y = flow.y if (sy, oy) == (1.0, 0.0) else array('i', [round(y * sy + oy) for y in flow.y])
+    return out
+
+
+def remap_macro(data: Dict[str, Any], screen_w: int, screen_h: int, mode: str = REMAP_SCALE) -> Optional[Dict[str, Any]]:
+    """
+    Remaps a loaded macro to the given screen size.
+
+    Returns a new macro dict whose flow is columnar and already remapped, so
+    the compiled playback plan (and anything saved from it) carries the new
+    coordinates and playback does no per-event math. The metadata then
+    describes the new screen and records the original one under
+    'remapped_from'. Returns None if the macro has no recorded resolution or
+    already matches.
+    """
+    md = data.get("metadata", {})
+    src_w, src_h = md.get("screen_width"), md.get("screen_height")
+    if not src_w or not src_h or (src_w, src_h) == (screen_w, screen_h):
+        return None
+
+    transform = compute_transform(src_w, src_h, screen_w, screen_h, mode)
+    flow = remap_flow(ColumnarFlow.from_events(data.get("flow", [])), transform)
+
+    metadata = dict(md)
+    metadata["screen_width"], metadata["screen_height"] = screen_w, screen_h
+    metadata["remapped_from"] = {"screen_width": src_w, "screen_height": src_h, "mode": mode}
+    return {"flow": flow, "metadata": metadata}
@@ -0,0 +1,38 @@
+import os
+import time
+from typing import List, Tuple
+
+# Cold-start budget; override with POLARIS_STARTUP_BUDGET_MS
+DEFAULT_BUDGET_MS = 1200
+
+class StartupTimer:
+    """Records named startup phases and reports them against a time budget."""
+
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.last = self.origin
+        self.phases: List[Tuple[str, float]] = []
+
+    def mark(self, phase: str):
+        """Closes the current phase under the given name."""
+        now = time.perf_counter()
+        self.phases.append((phase, (now - self.last) * 1000))
+        self.last = now
+
+    @property
+    def total_ms(self) -> float:
+        return (self.last - self.origin) * 1000
+
+    def report(self) -> bool:
+        """Prints the breakdown. Returns False if the startup budget was exceeded."""
+        try:
+            budget = float(os.environ.get("POLARIS_STARTUP_BUDGET_MS", DEFAULT_BUDGET_MS))
+        except ValueError:
+            budget = DEFAULT_BUDGET_MS
+
+        print("Startup timing:")
+        for phase, ms in self.phases:
+            print(f"  {phase:<28} {ms:8.1f} ms")
+        within = self.total_ms <= budget
+        print(f"  {'total':<28} {self.total_ms:8.1f} ms (budget {budget:.0f} ms{'' if within else ', EXCEEDED'})")
+        return within
@@ -1,11 +1,24 @@
-import requests
 import json
+import queue
 import threading
+import time
 from datetime import datetime
 
+_NO_ITEM = object()
+
 class WebhookManager:
     """Handles sending aesthetic embedded updates to Discord-compatible webhooks."""
-    
+
+    # Bounded outbox; when full the oldest pending message is dropped
+    QUEUE_SIZE = 100
+    # Discord accepts up to 10 embeds per message, so bursts merge into one post
+    MAX_EMBEDS = 10
+    # Wait this long after the first message of a burst for more to merge
+    COALESCE_WINDOW = 0.5
+    MAX_RETRIES = 5
+    BACKOFF_BASE = 1.0
+    BACKOFF_MAX = 60.0
+
     def __init__(self, url=None, enabled=False):
         self.url = url
         self.enabled = enabled
@@ -14,6 +27,13 @@ class WebhookManager:
         self.color_warning = 0xf1c40f # Gold
         self.color_error = 0xe74c3c   # Red
 
+        # Single persistent dispatcher (started lazily on the first message)
+        self._queue = queue.Queue(maxsize=self.QUEUE_SIZE)
+        self._worker = None
+        self._worker_lock = threading.Lock()
+        self._session = None
+        self.dropped = 0
+
     def update_settings(self, url, enabled):
         self.url = url
         self.enabled = enabled
@@ -21,14 +41,128 @@ class WebhookManager:
     def _send_async(self, payload):
         if not self.enabled or not self.url:
             return
-            
-        def _target():
+
+        self._ensure_worker()
+        item = (self.url, payload)
+        while True:
+            try:
+                self._queue.put_nowait(item)
+                return
+            except queue.Full:
+                # Backpressure: keep the newest status, drop the oldest pending one
+                try:
+                    self._queue.get_nowait()
+                    self._queue.task_done()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+    def close(self, timeout=5.0):
+        """
+        Flushes pending messages in order and stops the dispatcher.
+
+        Waits at most `timeout` seconds in total; anything still unsent after
+        that is abandoned with the (daemon) dispatcher thread.
+        """
+        worker = self._worker
+        if worker is None:
+            return
+        deadline = time.monotonic() + timeout
+        try:
+            self._queue.put(None, timeout=timeout) # Sentinel: drain everything before it, then exit
+        except queue.Full:
+            pass
+        worker.join(max(0.0, deadline - time.monotonic()))
+        self._worker = None
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+    # --- Dispatcher ---
+
+    def _ensure_worker(self):
+        with self._worker_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, daemon=True)
+                self._worker.start()
+
+    def _get_session(self):
+        if self._session is None:
+            # Imported lazily: requests is only needed once a webhook actually fires
+            import requests
+            from requests.adapters import HTTPAdapter
+            self._session = requests.Session()
+            self._session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=1))
+            self._session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=1))
+        return self._session
+
+    def _run(self):
+        pending = _NO_ITEM # An item taken from the queue that could not be merged
+        while True:
+            item = pending if pending is not _NO_ITEM else self._queue.get()
+            pending = _NO_ITEM
+            if item is None:
+                self._queue.task_done()
+                return
+
+            url, payload = item
+            merged = 1
+            # Coalesce a burst of messages to the same URL into one post
+            deadline = time.monotonic() + self.COALESCE_WINDOW
+            while len(payload.get("embeds", [])) < self.MAX_EMBEDS:
+                remaining = deadline - time.monotonic()
+                try:
+                    nxt = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if nxt is None or nxt[0] != url or not self._can_merge(payload, nxt[1]):
+                    pending = nxt
+                    break
+                payload = self._merge(payload, nxt[1])
+                merged += 1
+
+            self._post(url, payload)
+            for _ in range(merged):
+                self._queue.task_done()
+
+    def _can_merge(self, a, b):
+        return ("embeds" in a and "embeds" in b and "content" not in a and "content" not in b
+                and len(a["embeds"]) + len(b["embeds"]) <= self.MAX_EMBEDS)
+
+    def _merge(self, a, b):
+        merged = dict(a)
+        merged["embeds"] = a["embeds"] + b["embeds"]
+        return merged
+
+    def _post(self, url, payload):
+        """Posts with retries, honouring HTTP 429 Retry-After and backing off on failures."""
+        for attempt in range(self.MAX_RETRIES):
+            delay = min(self.BACKOFF_BASE * (2 ** attempt), self.BACKOFF_MAX)
             try:
-                requests.post(self.url, json=payload, timeout=5)
+                resp = self._get_session().post(url, json=payload, timeout=5)
+                if resp.status_code == 429:
+                    delay = self._retry_after(resp, delay)
+                elif resp.status_code < 500:
+                    if resp.status_code >= 400:
+                        print(f"Webhook rejected ({resp.status_code}): {resp.text[:200]}")
+                    return
             except Exception as e:
                 print(f"Webhook failed: {e}")
-                
-        threading.Thread(target=_target, daemon=True).start()
+            time.sleep(delay)
+        print("Webhook failed: giving up after retries.")
+
+    def _retry_after(self, resp, default):
+        """Seconds to wait from a 429 response (header, or Discord's JSON body)."""
+        value = resp.headers.get("Retry-After")
+        if value is None:
+            try:
+                value = resp.json().get("retry_after")
+            except (ValueError, AttributeError):
+                value = None
+        try:
+            return min(max(float(value), 0.0), self.BACKOFF_MAX)
+        except (TypeError, ValueError):
+            return default
 
     def send_status(self, title, description, status_type="info", fields=None):
         """Sends a structured embed message."""
@@ -85,5 +219,24 @@ class WebhookManager:
             {"name": "Loops Completed", "value": str(loop_count), "inline": True}
         ])
 
+    def on_playback_progress(self, snapshot, loop=None):
+        """Periodic heartbeat built from a Player progress snapshot."""
+        if not snapshot.get("active"):
+            return # Start/finish already have their own messages
+        
+        mins, secs = divmod(int(snapshot["elapsed"]), 60)
+        fields = [
+            {"name": "Progress", "value": f"{int(snapshot['fraction'] * 100)}% ({snapshot['index']} actions)", "inline": True},
+            {"name": "Elapsed", "value": f"{mins:02}:{secs:02}", "inline": True}
+        ]
+        if snapshot.get("eta") is not None:
+            mins, secs = divmod(int(snapshot["eta"]), 60)
+            fields.append({"name": "ETA", "value": f"{mins:02}:{secs:02}", "inline": True})
+        if loop:
+            fields.append({"name": "Loop", "value": str(loop), "inline": True})
+        fields.append({"name": "Lateness", "value": f"{snapshot['lateness_ms']:.1f} ms", "inline": True})
+        
+        self.send_status("⏱️ Playback Heartbeat", "Automation sequence is still running.", "info", fields)
+
     def on_playback_error(self, error_msg):
         self.send_status("❌ Playback Error", f"An error occurred during execution: `{error_msg}`", "error")